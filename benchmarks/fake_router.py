@@ -0,0 +1,90 @@
+"""
+Minimal WAMP router for the push api benchmarks: welcomes the client, confirms subscriptions and publishes the given
+messages to every subscribed topic, as fast as possible or at the given rate. The send time is put into the 'date'
+field of the trade events, so the client might measure the delivery latency.
+
+    router = FakeRouter(messages=100000)
+    url = await router.start()
+
+Routers of many processes might share the port with 'reuse_port', so the router is not the bottleneck.
+"""
+import asyncio
+import itertools
+import json
+import time
+
+from aiohttp import web
+
+__author__ = 'andrew.shvv@gmail.com'
+
+HELLO, WELCOME, SUBSCRIBE, SUBSCRIBED, EVENT = 1, 2, 32, 33, 36
+
+
+def trades_message(seq):
+    return [
+        {"type": "orderBookModify", "data": {"type": "bid", "rate": "0.00999999", "amount": "1.00000000"}},
+        {"type": "newTrade", "data": {"tradeID": str(seq), "type": "buy", "rate": "0.01000001",
+                                      "amount": "1.00000000", "total": "0.01000001", "date": repr(time.time())}},
+    ]
+
+
+class FakeRouter:
+    def __init__(self, messages=10000, rate=None, host="127.0.0.1", port=0, message=trades_message, reuse_port=False):
+        self.messages = messages
+        self.rate = rate
+        self.host = host
+        self.port = port
+        self.reuse_port = reuse_port
+        self.message = message
+        self.runner = None
+        self.publications = itertools.count(1)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/", self.handle)
+
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port, reuse_port=self.reuse_port)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+        return "ws://{}:{}/".format(self.host, port)
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse(protocols=("wamp.2.json",))
+        await ws.prepare(request)
+
+        publishing = []
+
+        async for msg in ws:
+            data = json.loads(msg.data)
+
+            if data[0] == HELLO:
+                await ws.send_str(json.dumps([WELCOME, 1, {"roles": {"broker": {}}}]))
+
+            elif data[0] == SUBSCRIBE:
+                request_id, topic = data[1], data[3]
+                await ws.send_str(json.dumps([SUBSCRIBED, request_id, request_id]))
+                publishing.append(asyncio.ensure_future(self.publish(ws, request_id)))
+
+        for task in publishing:
+            task.cancel()
+        return ws
+
+    async def publish(self, ws, subscription):
+        interval = 1 / self.rate if self.rate else 0
+
+        for seq in range(1, self.messages + 1):
+            event = [EVENT, subscription, next(self.publications), {}, self.message(seq), {"seq": seq}]
+            await ws.send_str(json.dumps(event))
+
+            if interval:
+                await asyncio.sleep(interval)
+            elif not seq % 100:
+                # let the other subscriptions publish as well
+                await asyncio.sleep(0)
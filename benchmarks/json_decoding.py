@@ -0,0 +1,63 @@
+"""
+Compares installed JSON decoders on the large payloads shaped as 'returnOrderBook(currency_pair="all")' and
+'returnTradeHistory' responses. Payloads are generated, or read from the recorded response files:
+
+    python benchmarks/json_decoding.py [order_book.json trade_history.json]
+"""
+import json
+import random
+import sys
+import time
+
+from poloniex import constants
+from poloniex.decoder import DECODERS
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+def order_books(depth=1000):
+    def levels():
+        return [["{:.8f}".format(random.random()), random.random() * 100] for _ in range(depth)]
+
+    return {pair: {"asks": levels(), "bids": levels(), "isFrozen": "0", "seq": random.randint(1, 10 ** 8)}
+            for pair in constants.CURRENCY_PAIRS}
+
+
+def trade_history(count=50000):
+    return [{
+        "globalTradeID": 10 ** 7 + i,
+        "tradeID": i,
+        "date": "2017-05-07 07:11:23",
+        "type": random.choice(["buy", "sell"]),
+        "rate": "{:.8f}".format(random.random()),
+        "amount": "{:.8f}".format(random.random() * 100),
+        "total": "{:.8f}".format(random.random())
+    } for i in range(count)]
+
+
+def measure(decode, body, rounds=5):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        decode(body)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(*paths):
+    if paths:
+        fixtures = [(path, open(path, "rb").read()) for path in paths]
+    else:
+        fixtures = [("returnOrderBook(all)", json.dumps(order_books()).encode()),
+                    ("returnTradeHistory", json.dumps(trade_history()).encode())]
+
+    for name, body in fixtures:
+        print("{} ({:.1f} MB)".format(name, len(body) / 2 ** 20))
+        for decoder, decode in sorted(DECODERS.items()):
+            elapsed = measure(decode, body)
+            print("    {:<8} {:8.1f} ms {:8.1f} MB/s".format(decoder, elapsed * 1000, len(body) / 2 ** 20 / elapsed))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,65 @@
+"""
+Measures throughput of converting prices and amounts of the 'returnTradeHistory' and 'returnOrderBook' responses:
+float() in the python loop compared to the exact fixed point and decimal modes of 'NumericDecoder':
+
+    python benchmarks/numeric_decoding.py [rows]
+"""
+import random
+import sys
+import time
+
+from poloniex.numeric import NumericDecoder, FIXED, DECIMAL, TRADE_FIELDS
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+def trade_history(count):
+    return [{
+        "globalTradeID": i,
+        "tradeID": i,
+        "date": "2017-05-07 07:11:23",
+        "type": "buy",
+        "rate": "{:.8f}".format(random.random()),
+        "amount": "{:.8f}".format(random.random() * 100),
+        "total": "{:.8f}".format(random.random())
+    } for i in range(count)]
+
+
+def order_book(count):
+    return {
+        "asks": [["{:.8f}".format(random.random()), random.random() * 100] for _ in range(count)],
+        "bids": [["{:.8f}".format(random.random()), random.random() * 100] for _ in range(count)],
+        "isFrozen": "0",
+        "seq": 1
+    }
+
+
+def floats(trades):
+    return [{field: float(value) if field in TRADE_FIELDS else value for field, value in trade.items()}
+            for trade in trades]
+
+
+def measure(convert, payload, rows):
+    started = time.perf_counter()
+    convert(payload)
+    return rows / (time.perf_counter() - started)
+
+
+def main(rows=100000):
+    trades = trade_history(rows)
+    book = order_book(rows // 2)
+
+    cases = [
+        ("trades float()", floats, trades),
+        ("trades fixed", NumericDecoder(FIXED).trade_history, trades),
+        ("trades decimal", NumericDecoder(DECIMAL).trade_history, trades),
+        ("order book fixed", NumericDecoder(FIXED).order_book, book),
+        ("order book decimal", NumericDecoder(DECIMAL).order_book, book),
+    ]
+
+    for name, convert, payload in cases:
+        print("{:<20} {:12.0f} rows/sec".format(name, measure(convert, payload, rows)))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
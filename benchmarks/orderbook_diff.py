@@ -0,0 +1,73 @@
+"""
+Measures handling of the polled 'returnOrderBook(currency_pair="all")' snapshots where only some markets change
+between polls: loading every book from scratch compared to applying the changes found by 'SnapshotDiffer':
+
+    python benchmarks/orderbook_diff.py [markets] [changed markets] [polls]
+"""
+import random
+import sys
+import time
+
+from poloniex.orderbook import OrderBook, SnapshotDiffer
+
+__author__ = 'andrew.shvv@gmail.com'
+
+DEPTH = 50
+
+
+def side(start, step):
+    return [["{:.8f}".format(start + step * i), "{:.8f}".format(random.random() * 100)] for i in range(DEPTH)]
+
+
+def snapshots(markets, changed, polls):
+    """
+    Yields snapshots of all markets, every next one has a few levels of 'changed' markets modified.
+    """
+    books = {"BTC_{}".format(i): {"asks": side(1.01, 0.0001), "bids": side(0.99, -0.0001), "isFrozen": "0", "seq": 1}
+             for i in range(markets)}
+    yield books
+
+    for _ in range(polls - 1):
+        books = dict(books)
+        for currency_pair in random.sample(sorted(books), changed):
+            book = dict(books[currency_pair])
+            book["bids"] = list(book["bids"])
+            for i in random.sample(range(DEPTH), 3):
+                book["bids"][i] = [book["bids"][i][0], "{:.8f}".format(random.random() * 100)]
+            book["seq"] += 1
+            books[currency_pair] = book
+        yield books
+
+
+def rebuild(polled):
+    books = {}
+    for snapshot in polled:
+        for currency_pair, book in snapshot.items():
+            books.setdefault(currency_pair, OrderBook(currency_pair)).load(book)
+
+
+def apply_changes(polled):
+    books = {}
+    differ = SnapshotDiffer()
+    for snapshot in polled:
+        for change in differ.diff(snapshot):
+            book = books.setdefault(change.currency_pair, OrderBook(change.currency_pair))
+            for price, amount in change.bids:
+                book.bids.update(price, amount)
+            for price, amount in change.asks:
+                book.asks.update(price, amount)
+            book.seq = change.seq
+
+
+def main(markets=100, changed=10, polls=200):
+    polled = list(snapshots(markets, changed, polls))
+
+    for name, handle in [("rebuild", rebuild), ("diff", apply_changes)]:
+        started = time.perf_counter()
+        handle(polled)
+        elapsed = time.perf_counter() - started
+        print("{:<10} {:10.2f} ms/poll".format(name, elapsed / polls * 1000))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,45 @@
+"""
+Measures the cost of building request parameters of the commands, the network is replaced with the stub 'api_call':
+
+    python benchmarks/params_building.py [calls]
+"""
+import sys
+import time
+
+from poloniex.api import sync
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+class PublicApi(sync.PublicApi):
+    def api_call(self, *args, **kwargs):
+        return {}
+
+
+class TradingApi(sync.TradingApi):
+    def api_call(self, *args, **kwargs):
+        return {}
+
+
+def measure(call, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return calls / (time.perf_counter() - started)
+
+
+def main(calls=100000):
+    public = PublicApi()
+    trading = TradingApi(api_key="key", api_sec="sec")
+
+    cases = [
+        ("returnTicker", lambda: public.returnTicker()),
+        ("buy", lambda: trading.buy(currency_pair="BTC_ETH", rate="0.01", amount="1")),
+    ]
+
+    for name, call in cases:
+        print("{:<14} {:10.0f} calls/sec".format(name, measure(call, calls)))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
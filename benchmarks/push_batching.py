@@ -0,0 +1,112 @@
+"""
+Compares the per event delivery of the push api with the batched one: events per second which reach the handler, and
+the delivery latency from the router send time to the handler call. The fake router runs in the separate process:
+
+    python benchmarks/push_batching.py [messages] [topics] [max batch size] [rate of messages per second]
+"""
+import asyncio
+import multiprocessing
+import statistics
+import sys
+import time
+
+import aiohttp
+
+from fake_router import FakeRouter
+from poloniex import constants
+from poloniex.api.async import PushApi
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# trades message of the fake router has two events
+EVENTS_PER_MESSAGE = 2
+
+
+def serve(messages, rate, urls):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    router = FakeRouter(messages=messages, rate=rate or None)
+    urls.put(loop.run_until_complete(router.start()))
+    loop.run_forever()
+
+
+class Collector:
+    def __init__(self, expected):
+        self.expected = expected
+        self.received = 0
+        self.started = None
+        self.finished = None
+        self.latencies = []
+        self.done = asyncio.Event()
+
+    def collect(self, event):
+        now = time.time()
+        if self.started is None:
+            self.started = time.perf_counter()
+
+        self.received += 1
+        if hasattr(event, "trade_id"):
+            self.latencies.append(now - float(event.date))
+
+        if self.received >= self.expected:
+            self.finished = time.perf_counter()
+            self.done.set()
+
+    def on_event(self, event):
+        self.collect(event)
+
+    def on_batch(self, batch):
+        for events in batch.values():
+            for event in events:
+                self.collect(event)
+
+    def report(self, name):
+        rate = self.received / (self.finished - self.started)
+        latencies = sorted(self.latencies)
+        print("{:<18} {:10.0f} events/sec  latency median {:7.2f} ms  p99 {:7.2f} ms".format(
+            name, rate, statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99)] * 1000))
+
+
+async def measure(url, topics, batch_size, expected):
+    collector = Collector(expected)
+
+    async with aiohttp.ClientSession() as session:
+        push = PushApi(session)
+        push.wamp.url = url
+
+        if batch_size:
+            batcher = push.subscribe_batch(topics, collector.on_batch, max_size=batch_size)
+        else:
+            for topic in topics:
+                push.subscribe(topic, collector.on_event, typed=True)
+
+        task = asyncio.ensure_future(push.start())
+        await collector.done.wait()
+
+        if batch_size:
+            await batcher.flush()
+        await push.stop()
+        await task
+
+    return collector
+
+
+def main(messages=20000, topics=4, batch_size=100, rate=0):
+    topics = constants.CURRENCY_PAIRS[:topics]
+    expected = messages * len(topics) * EVENTS_PER_MESSAGE
+    loop = asyncio.get_event_loop()
+
+    for name, size in [("per event", 0), ("batched ({})".format(batch_size), batch_size)]:
+        urls = multiprocessing.Queue()
+        router = multiprocessing.Process(target=serve, args=(messages, rate, urls), daemon=True)
+        router.start()
+
+        try:
+            collector = loop.run_until_complete(measure(urls.get(), topics, size, expected))
+            collector.report(name)
+        finally:
+            router.terminate()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,63 @@
+"""
+Measures push events delivered per second on one core by the keyword arguments wrappers and the typed event wrappers,
+the websocket is left out, wrappers are fed with the decoded messages:
+
+    python benchmarks/push_events.py [messages]
+
+Typed events are still allocated one per event: the ticker gains from skipping the keyword arguments dictionary,
+trades gain nothing, as the keyword arguments wrapper passes on the decoded event dictionaries it already has.
+"""
+import asyncio
+import sys
+import time
+
+from poloniex.api.async import ticker_wrapper, trades_wrapper, typed_ticker_wrapper, typed_trades_wrapper
+
+__author__ = 'andrew.shvv@gmail.com'
+
+TICKER = ["BTC_ETH", "0.01000000", "0.01000001", "0.00999999", "0.01000000", "100.00000000", "10000.00000000", 0,
+          "0.01100000", "0.00900000"]
+
+
+def trades_message():
+    return [
+        {"type": "orderBookModify", "data": {"type": "bid", "rate": "0.00999999", "amount": "1.00000000"}},
+        {"type": "orderBookRemove", "data": {"type": "ask", "rate": "0.01000001"}},
+        {"type": "newTrade", "data": {"tradeID": "1", "type": "buy", "rate": "0.01000001", "amount": "1.00000000",
+                                      "total": "0.01000001", "date": "2017-05-07 07:11:23"}},
+    ]
+
+
+def kwargs_handler(**kwargs):
+    pass
+
+
+def typed_handler(event):
+    pass
+
+
+async def measure(wrapper, messages, events_per_message):
+    started = time.perf_counter()
+    for message in messages:
+        await wrapper(message, seq=1)
+    return len(messages) * events_per_message / (time.perf_counter() - started)
+
+
+def main(count=100000):
+    loop = asyncio.get_event_loop()
+
+    # trades wrapper mutates the events, every run gets its own messages
+    cases = [
+        ("ticker kwargs", ticker_wrapper(kwargs_handler), lambda: [TICKER] * count, 1),
+        ("ticker typed", typed_ticker_wrapper(typed_handler), lambda: [TICKER] * count, 1),
+        ("trades kwargs", trades_wrapper("BTC_ETH", kwargs_handler), lambda: [trades_message() for _ in range(count)], 3),
+        ("trades typed", typed_trades_wrapper("BTC_ETH", typed_handler), lambda: [trades_message() for _ in range(count)], 3),
+    ]
+
+    for name, wrapper, messages, events_per_message in cases:
+        rate = loop.run_until_complete(measure(wrapper, messages(), events_per_message))
+        print("{:<14} {:12.0f} events/sec".format(name, rate))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
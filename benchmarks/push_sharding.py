@@ -0,0 +1,95 @@
+"""
+Measures events per second delivered to the handlers by the sharded push api with the growing number of shards.
+Fake routers run in as many processes as the shards and share the port, so they keep up with the clients:
+
+    python benchmarks/push_sharding.py [messages per topic] [topics] [max shards]
+"""
+import asyncio
+import multiprocessing
+import socket
+import sys
+import time
+
+from fake_router import FakeRouter
+from poloniex import constants
+from poloniex.sharded import ShardedPushApi
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# trades message of the fake router has two events
+EVENTS_PER_MESSAGE = 2
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(messages, port, ready):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    router = FakeRouter(messages=messages, port=port, reuse_port=True)
+    loop.run_until_complete(router.start())
+    ready.set()
+    loop.run_forever()
+
+
+async def measure(url, topics, shards, expected):
+    push = ShardedPushApi(shards=shards, url=url)
+    received = 0
+    started = None
+    done = asyncio.Event()
+
+    def handler(event):
+        nonlocal received, started
+        if started is None:
+            started = time.perf_counter()
+
+        received += 1
+        if received == expected:
+            done.set()
+
+    for topic in topics:
+        push.subscribe(topic, handler, typed=True)
+
+    task = asyncio.ensure_future(push.start())
+    await done.wait()
+    rate = received / (time.perf_counter() - started)
+
+    await push.stop()
+    await task
+    return rate
+
+
+def main(messages=20000, topics=16, max_shards=None):
+    max_shards = max_shards or multiprocessing.cpu_count()
+    topics = constants.CURRENCY_PAIRS[:topics]
+    expected = messages * len(topics) * EVENTS_PER_MESSAGE
+    loop = asyncio.get_event_loop()
+
+    shards = 1
+    while shards <= max_shards:
+        port = free_port()
+        routers = []
+
+        for _ in range(shards):
+            ready = multiprocessing.Event()
+            router = multiprocessing.Process(target=serve, args=(messages, port, ready), daemon=True)
+            router.start()
+            ready.wait()
+            routers.append(router)
+
+        try:
+            url = "ws://127.0.0.1:{}/".format(port)
+            rate = loop.run_until_complete(measure(url, topics, shards, expected))
+            print("{:>3} shards {:12.0f} events/sec".format(shards, rate))
+        finally:
+            for router in routers:
+                router.terminate()
+
+        shards *= 2
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
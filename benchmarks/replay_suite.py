@@ -0,0 +1,212 @@
+"""
+Replays the recorded push and public api traffic (see 'poloniex.replay') against the clients and reports push events
+per second, handler latency percentiles (frame received - handler called), and public api calls per second of the
+sync and async clients. Without the recording the synthetic one is generated. The replay server runs in the separate
+process, speed 0 plays the recording as fast as possible:
+
+    python benchmarks/replay_suite.py [recording] [speed] [rest calls]
+"""
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+
+from poloniex import constants
+from poloniex.api import sync
+from poloniex.api.base import PARAMETERS
+from poloniex.replay import Recorder, ReplayServer, load, FRAME_IN, FRAME_OUT, RESPONSE, SUBSCRIBE, SUBSCRIBED, \
+    EVENT
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# 'async' is the keyword within the coroutines, so the module is used under another name
+async_api = importlib.import_module("poloniex.api.async")
+
+ARGUMENTS = {param: argument for argument, param in PARAMETERS.items()}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def synthesize(path, topics=8, frames=50000, rate=5000):
+    """
+    Writes the recording of trades events of the 'topics' markets at 'rate' frames per second and a few responses.
+    """
+    clock = FakeClock()
+    pairs = constants.CURRENCY_PAIRS[:topics]
+
+    with Recorder(path, clock=clock) as recorder:
+        for subscription, pair in enumerate(pairs, 1):
+            recorder.frame(json.dumps([SUBSCRIBE, subscription, {}, pair]), outgoing=True)
+            recorder.frame(json.dumps([SUBSCRIBED, subscription, subscription]))
+
+        for i in range(frames):
+            clock.now = i / rate
+            subscription = i % len(pairs) + 1
+            seq = i // len(pairs) + 1
+            message = [
+                {"type": "orderBookModify", "data": {"type": "bid", "rate": "0.00999999", "amount": "1.00000000"}},
+                {"type": "newTrade", "data": {"tradeID": str(seq), "type": "buy", "rate": "0.01000001",
+                                              "amount": "1.00000000", "total": "0.01000001",
+                                              "date": "2017-05-07 07:11:23"}},
+            ]
+            recorder.frame(json.dumps([EVENT, subscription, i + 1, {}, message, {"seq": seq}]))
+
+        ticker = {pair: {"last": "0.01000000", "lowestAsk": "0.01000001", "highestBid": "0.00999999"}
+                  for pair in pairs}
+        recorder.response({"command": "returnTicker"}, 200, json.dumps(ticker))
+
+        book = {"asks": [["0.0{}".format(1000001 + i), 1.0] for i in range(50)],
+                "bids": [["0.00{}".format(9999999 - i), 1.0] for i in range(50)],
+                "isFrozen": "0", "seq": 1}
+        recorder.response({"command": "returnOrderBook", "currencyPair": pairs[0], "depth": "50"}, 200,
+                          json.dumps(book))
+
+
+def serve(path, speed, urls):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = ReplayServer(path, speed=speed)
+    loop.run_until_complete(server.start())
+    urls.put((server.ws_url, server.public_url))
+    loop.run_forever()
+
+
+def inspect_recording(path):
+    topics = []
+    frames = 0
+    requests = []
+
+    for record in load(path):
+        if record[1] == FRAME_OUT:
+            raw = json.loads(record[2])
+            if raw[0] == SUBSCRIBE:
+                topics.append(raw[3])
+        elif record[1] == FRAME_IN and record[2].startswith("[{},".format(EVENT)):
+            frames += 1
+        elif record[1] == RESPONSE:
+            requests.append(record[2])
+
+    return topics, frames, requests
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+
+async def measure_push(url, topics, frames):
+    latencies = []
+    received = 0
+    delivered = 0
+    frame_received = 0
+
+    async with aiohttp.ClientSession() as session:
+        push = async_api.PushApi(session, url=url)
+        on_message = push.wamp.on_message
+        done = asyncio.Event()
+
+        async def measured(data):
+            nonlocal received, frame_received
+            frame_received = time.perf_counter()
+            await on_message(data)
+
+            if data.startswith("[{},".format(EVENT)):
+                received += 1
+                if received == frames:
+                    done.set()
+
+        def handler(event):
+            nonlocal delivered
+            delivered += 1
+            latencies.append(time.perf_counter() - frame_received)
+
+        push.wamp.on_message = measured
+        for topic in topics:
+            push.subscribe(topic, handler, typed=True)
+
+        task = asyncio.ensure_future(push.start())
+        started = time.perf_counter()
+        await done.wait()
+        elapsed = time.perf_counter() - started
+
+        await push.stop()
+        await task
+
+    latencies.sort()
+    print("push    {:10.0f} events/sec  latency p50 {:.3f} ms  p99 {:.3f} ms  max {:.3f} ms".format(
+        delivered / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), latencies[-1] * 1000))
+
+
+def command_call(api, params):
+    kwargs = {}
+    for param, value in params.items():
+        if param == "command":
+            continue
+        if param in ("start", "end"):
+            value = datetime.fromtimestamp(int(value), timezone.utc)
+        kwargs[ARGUMENTS.get(param, param)] = value
+
+    return getattr(api, params["command"])(**kwargs)
+
+
+def measure_sync_rest(url, requests, calls):
+    api = sync.PublicApi()
+    api.url = url
+
+    started = time.perf_counter()
+    for i in range(calls):
+        command_call(api, requests[i % len(requests)])
+    print("sync    {:10.0f} calls/sec".format(calls / (time.perf_counter() - started)))
+
+
+async def measure_async_rest(url, requests, calls, concurrency=10):
+    async with aiohttp.ClientSession() as session:
+        api = async_api.PublicApi(session)
+        api.url = url
+
+        async def worker(offset):
+            for i in range(offset, calls, concurrency):
+                await command_call(api, requests[i % len(requests)])
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(offset) for offset in range(concurrency)])
+        print("async   {:10.0f} calls/sec".format(calls / (time.perf_counter() - started)))
+
+
+def main(path=None, speed=0, calls=2000):
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "synthetic.jsonl.gz")
+        synthesize(path)
+
+    topics, frames, requests = inspect_recording(path)
+    urls = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(path, float(speed), urls), daemon=True)
+    server.start()
+
+    try:
+        ws_url, public_url = urls.get()
+        loop = asyncio.get_event_loop()
+
+        if frames:
+            loop.run_until_complete(measure_push(ws_url, topics, frames))
+        if requests:
+            measure_sync_rest(public_url, requests, calls)
+            loop.run_until_complete(measure_async_rest(public_url, requests, calls))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) if arg.isdigit() else arg for arg in sys.argv[1:]])
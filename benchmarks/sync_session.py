@@ -0,0 +1,73 @@
+"""
+Compares per-call latency of the sync public api when every call opens a new connection (module-level
+'requests.get', the old behaviour) with the pooled keep-alive session. Runs against a local stub HTTP server:
+
+    python benchmarks/sync_session.py [calls]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import requests
+
+from poloniex.api import sync
+
+__author__ = 'andrew.shvv@gmail.com'
+
+TICKER = json.dumps({
+    "BTC_ETH": {"last": "0.01000000", "lowestAsk": "0.01000001", "highestBid": "0.00999999"}
+}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(TICKER)))
+        self.end_headers()
+        self.wfile.write(TICKER)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class LegacyPublicApi(sync.PublicApi):
+    def api_call(self, *args, **kwargs):
+        response = requests.get(self.url, *args, **kwargs)
+        return response.json()
+
+
+def measure(api, calls):
+    api.returnTicker()
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        api.returnTicker()
+    return (time.perf_counter() - started) / calls
+
+
+def main(calls=500):
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}/public?".format(server.server_address[1])
+
+    for name, api in [("requests.get", LegacyPublicApi()),
+                      ("pooled session", sync.PublicApi())]:
+        api.url = url
+        print("{:<16} {:8.1f} us/call".format(name, measure(api, calls) * 10 ** 6))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,70 @@
+"""
+Measures text frames per second handled by the push client: autobahn parsing of every frame against the fast path
+for events. Frames are read from the file with one frame per line (e.g. recorded with 'poloniex.replay'), or
+generated like the trades frames of the fake router:
+
+    python benchmarks/wamp_parsing.py [frames] [path]
+"""
+import asyncio
+import json
+import sys
+import time
+
+from fake_router import EVENT, trades_message
+from poloniex.decoder import DECODERS
+from poloniex.wamp.client import WAMPClient
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+def generate(count):
+    return [json.dumps([EVENT, 1, seq, {}, trades_message(seq), {"seq": seq}]) for seq in range(1, count + 1)]
+
+
+def load(path, count):
+    with open(path) as frames:
+        frames = [line.rstrip("\n") for line in frames if line.strip()]
+    return (frames * (count // len(frames) + 1))[:count]
+
+
+async def handler(args, **kwargs):
+    pass
+
+
+def subscribe(wamp, frames):
+    for frame in frames:
+        raw = json.loads(frame)
+        if raw[0] == EVENT:
+            wamp.subscriptions[raw[1]] = {'topic': str(raw[1]), 'handler': handler, 'queue': None}
+
+
+async def autobahn_path(wamp, frames):
+    for frame in frames:
+        wamp_msg = wamp.recv(frame)
+        await wamp.get_handler(wamp_msg.MESSAGE_TYPE)(wamp_msg)
+
+
+async def fast_path(wamp, frames):
+    for frame in frames:
+        await wamp.on_message(frame)
+
+
+def main(count=100000, path=None):
+    frames = load(path, count) if path else generate(count)
+    loop = asyncio.get_event_loop()
+
+    cases = [("autobahn", "json", autobahn_path)]
+    cases.extend(("fast path", decoder, fast_path) for decoder in DECODERS)
+
+    for name, decoder, path in cases:
+        wamp = WAMPClient(url=None, session=None, decoder=decoder)
+        subscribe(wamp, frames)
+
+        started = time.perf_counter()
+        loop.run_until_complete(path(wamp, frames))
+        rate = len(frames) / (time.perf_counter() - started)
+        print("{:<10} {:<6} {:12.0f} frames/sec".format(name, decoder, rate))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) if arg.isdigit() else arg for arg in sys.argv[1:]])
@@ -0,0 +1,266 @@
+import asyncio
+from decimal import Decimal
+
+from poloniex.logger import getLogger
+from poloniex.numeric import to_decimal
+
+__author__ = 'andrew.shvv@gmail.com'
+
+ZERO = Decimal(0)
+
+logger = getLogger(__name__)
+
+
+def split_pair(currency_pair):
+    """
+    'BTC_ETH' -> ('BTC', 'ETH'): the currency prices are given in and the traded currency.
+    """
+    base, quote = currency_pair.split("_")
+    return base, quote
+
+
+class Balance:
+    __slots__ = ("available", "on_orders", "btc_value")
+
+    def __init__(self, available=ZERO, on_orders=ZERO, btc_value=ZERO):
+        self.available = available
+        self.on_orders = on_orders
+        self.btc_value = btc_value
+
+    def __repr__(self):
+        return "Balance(available={}, on_orders={})".format(self.available, self.on_orders)
+
+
+class AccountMirror:
+    """
+    Local state of the open orders and balances of the account. It is loaded from the snapshot once, then updated
+    from the responses of the trading api: placed and cancelled orders, fills of 'returnOrderTrades', and replaced by
+    the snapshots ('returnOpenOrders', 'returnCompleteBalances') whenever they are requested, e.g. by 'run'. Updates
+    are optimistic: fees and fills unknown to the client are corrected by the next snapshot.
+
+        mirror = AccountMirror()
+        mirror.attach(trading)
+        await mirror.reconcile(trading)
+        mirror.open_orders("BTC_ETH"), mirror.available("BTC")
+    """
+
+    def __init__(self):
+        # currency pair -> order number -> order
+        self.orders = {}
+        # order number -> currency pair
+        self.order_pairs = {}
+        # order number -> ids of the trades applied
+        self.fills = {}
+        # currency -> Balance
+        self.balances = {}
+
+        self.snapshots = 0
+        self.mismatches = 0
+
+        self.handlers = {
+            "buy": self.on_place,
+            "sell": self.on_place,
+            "cancelOrder": self.on_cancel,
+            "returnOrderTrades": self.on_order_trades,
+            "returnOpenOrders": self.on_open_orders,
+            "returnCompleteBalances": self.on_balances,
+            "returnBalances": self.on_available,
+        }
+
+    def attach(self, trading):
+        trading.observers.append(self)
+
+    def __call__(self, command, params, response):
+        handler = self.handlers.get(command)
+        if handler is not None:
+            handler(params or {}, response)
+
+    # queries
+
+    def open_orders(self, currency_pair):
+        return list(self.orders.get(currency_pair, {}).values())
+
+    def order(self, order_number):
+        currency_pair = self.order_pairs.get(str(order_number))
+        if currency_pair is None:
+            return None
+        return self.orders[currency_pair][str(order_number)]
+
+    def balance(self, currency):
+        balance = self.balances.get(currency)
+        if balance is None:
+            balance = self.balances[currency] = Balance()
+        return balance
+
+    def available(self, currency):
+        return self.balance(currency).available
+
+    def on_orders(self, currency):
+        return self.balance(currency).on_orders
+
+    # orders
+
+    def _add_order(self, currency_pair, order):
+        order_number = str(order["orderNumber"])
+        self.orders.setdefault(currency_pair, {})[order_number] = order
+        self.order_pairs[order_number] = currency_pair
+
+    def _remove_order(self, order_number):
+        currency_pair = self.order_pairs.pop(order_number, None)
+        self.fills.pop(order_number, None)
+        if currency_pair is None:
+            return None
+        return self.orders[currency_pair].pop(order_number, None)
+
+    def _reserve(self, currency_pair, type_, rate, amount):
+        """
+        Moves the funds needed for the order between available and on orders, negative amount releases them.
+        """
+        base, quote = split_pair(currency_pair)
+        currency, value = (base, rate * amount) if type_ == "buy" else (quote, amount)
+
+        balance = self.balance(currency)
+        balance.available -= value
+        balance.on_orders += value
+
+    def _fill(self, currency_pair, type_, amount, total):
+        base, quote = split_pair(currency_pair)
+
+        if type_ == "buy":
+            self.balance(base).available -= total
+            self.balance(quote).available += amount
+        else:
+            self.balance(quote).available -= amount
+            self.balance(base).available += total
+
+    def on_place(self, params, response):
+        currency_pair = params["currencyPair"]
+        type_ = params["command"]
+        rate = to_decimal(params["rate"])
+        amount = to_decimal(params["amount"])
+        order_number = str(response["orderNumber"])
+
+        # trades filled right away are also returned by 'returnOrderTrades' later, they must not be applied again
+        applied = set()
+        for trade in response.get("resultingTrades", ()):
+            filled = to_decimal(trade["amount"])
+            self._fill(currency_pair, type_, filled, to_decimal(trade["total"]))
+            applied.add(str(trade["tradeID"]))
+            amount -= filled
+
+        if amount > ZERO:
+            self._reserve(currency_pair, type_, rate, amount)
+            self._add_order(currency_pair, {
+                "orderNumber": order_number,
+                "type": type_,
+                "rate": rate,
+                "amount": amount,
+                "total": rate * amount,
+            })
+            if applied:
+                self.fills[order_number] = applied
+
+    def on_cancel(self, params, response):
+        order_number = str(params["orderNumber"])
+        currency_pair = self.order_pairs.get(order_number)
+
+        order = self._remove_order(order_number)
+        if order is not None:
+            self._reserve(currency_pair, order["type"], order["rate"], -order["amount"])
+
+    def on_order_trades(self, params, response):
+        order_number = str(params["orderNumber"])
+        order = self.order(order_number)
+        if order is None:
+            return
+
+        currency_pair = self.order_pairs[order_number]
+        applied = self.fills.setdefault(order_number, set())
+
+        for trade in response:
+            # trade ids are strings in the order placement response and numbers in 'returnOrderTrades'
+            trade_id = str(trade["tradeID"])
+            if trade_id in applied:
+                continue
+            applied.add(trade_id)
+
+            amount = min(to_decimal(trade["amount"]), order["amount"])
+            self._reserve(currency_pair, order["type"], order["rate"], -amount)
+            self._fill(currency_pair, order["type"], amount, to_decimal(trade["total"]))
+
+            order["amount"] -= amount
+            order["total"] = order["rate"] * order["amount"]
+
+        if order["amount"] <= ZERO:
+            self._remove_order(order_number)
+
+    # snapshots
+
+    def _load_orders(self, currency_pair, orders):
+        loaded = {}
+        for order in orders:
+            order = dict(order,
+                         orderNumber=str(order["orderNumber"]),
+                         rate=to_decimal(order["rate"]),
+                         amount=to_decimal(order["amount"]),
+                         total=to_decimal(order["total"]))
+            order.pop("currencyPair", None)
+            loaded[order["orderNumber"]] = order
+
+        previous = self.orders.get(currency_pair, {})
+        if set(previous) != set(loaded):
+            self.mismatches += 1
+
+        for order_number in previous:
+            self.order_pairs.pop(order_number, None)
+            if order_number not in loaded:
+                self.fills.pop(order_number, None)
+
+        self.orders[currency_pair] = loaded
+        for order_number in loaded:
+            self.order_pairs[order_number] = currency_pair
+
+    def on_open_orders(self, params, response):
+        self.snapshots += 1
+
+        if params.get("currencyPair", "all") == "all":
+            for currency_pair in set(self.orders) - set(response):
+                self._load_orders(currency_pair, [])
+            for currency_pair, orders in response.items():
+                self._load_orders(currency_pair, orders)
+        else:
+            self._load_orders(params["currencyPair"], response)
+
+    def on_balances(self, params, response):
+        self.snapshots += 1
+        self.balances = {currency: Balance(to_decimal(balance["available"]),
+                                           to_decimal(balance["onOrders"]),
+                                           to_decimal(balance["btcValue"]))
+                         for currency, balance in response.items()}
+
+    def on_available(self, params, response):
+        for currency, available in response.items():
+            self.balance(currency).available = to_decimal(available)
+
+    # reconciliation
+
+    async def reconcile(self, trading):
+        """
+        Takes the snapshots of the open orders and balances with the async trading api the mirror is attached to.
+        """
+        await trading.returnOpenOrders(currency_pair="all")
+        await trading.returnCompleteBalances()
+
+    async def run(self, trading, interval=60):
+        """
+        Reconciles the state every 'interval' seconds till cancelled.
+        """
+        while True:
+            try:
+                await self.reconcile(trading)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Unable to reconcile the account state")
+
+            await asyncio.sleep(interval)
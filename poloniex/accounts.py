@@ -0,0 +1,123 @@
+import asyncio
+
+import aiohttp
+
+from poloniex.api import async
+from poloniex.error import PoloniexError
+from poloniex.nonce import Nonce
+from poloniex.scheduler import AsyncScheduler, DEFAULT_RATE
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# seconds the resolved address of the exchange is kept by the shared connector
+DNS_CACHE_TTL = 300
+
+
+def create_session(limit=100):
+    """
+    Session of all accounts: one pool of keep-alive connections, so the DNS lookups and TLS handshakes are shared.
+    Should be created within the running event loop.
+    """
+    connector = aiohttp.TCPConnector(limit=limit, ttl_dns_cache=DNS_CACHE_TTL)
+    return aiohttp.ClientSession(connector=connector)
+
+
+class AccountManager:
+    """
+    Trading apis of many accounts on one event loop. Accounts share the session, but each key has its own nonce
+    source and its own rate budget, so a busy account neither delays the others nor breaks their nonce order.
+    Fan-out calls are made for all accounts concurrently, the failure of one account doesn't fail the others:
+
+        async with AccountManager() as accounts:
+            accounts.add("main", api_key, api_sec)
+            accounts.add("sub1", sub_key, sub_sec)
+            balances = await accounts.returnCompleteBalances()   # {"main": {...}, "sub1": PoloniexError(...)}
+
+    'api_kwargs' are given to every trading api, e.g. 'retry', 'metrics' or 'transforms'.
+    """
+
+    def __init__(self, session=None, rate=DEFAULT_RATE, limit=100, **api_kwargs):
+        self.session = session
+        self.rate = rate
+        self.limit = limit
+        self.api_kwargs = api_kwargs
+
+        # name -> trading api
+        self.accounts = {}
+        self._own_session = False
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def start(self):
+        if self.session is None:
+            self.session = create_session(limit=self.limit)
+            self._own_session = True
+
+        for api in self.accounts.values():
+            api.session = self.session
+
+    async def close(self):
+        if self._own_session:
+            await self.session.close()
+            self.session = None
+            self._own_session = False
+
+    def add(self, name, api_key, api_sec, nonce=None, scheduler=None):
+        """
+        'nonce' should be given if the key is used by other processes too, see 'nonce.FileNonce'.
+        """
+        if name in self.accounts:
+            raise PoloniexError("Account '{}' is already added".format(name))
+
+        api = async.TradingApi(self.session,
+                               api_key=api_key,
+                               api_sec=api_sec,
+                               nonce=nonce or Nonce(),
+                               scheduler=scheduler or AsyncScheduler(rate=self.rate),
+                               **self.api_kwargs)
+
+        self.accounts[name] = api
+        return api
+
+    def remove(self, name):
+        return self.accounts.pop(name)
+
+    def __getitem__(self, name):
+        return self.accounts[name]
+
+    def __contains__(self, name):
+        return name in self.accounts
+
+    def __iter__(self):
+        return iter(self.accounts)
+
+    def __len__(self):
+        return len(self.accounts)
+
+    async def gather(self, command, *args, names=None, **kwargs):
+        """
+        Calls the command of the trading api for the accounts (all by default) concurrently. Returns the dictionary
+        of account name -> response, or the exception the call of the account failed with.
+        """
+        names = list(self.accounts) if names is None else list(names)
+        calls = [getattr(self.accounts[name], command)(*args, **kwargs) for name in names]
+
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        return dict(zip(names, results))
+
+    async def returnBalances(self, names=None):
+        return await self.gather("returnBalances", names=names)
+
+    async def returnCompleteBalances(self, names=None):
+        return await self.gather("returnCompleteBalances", names=names)
+
+    async def returnOpenOrders(self, currency_pair="all", names=None):
+        return await self.gather("returnOpenOrders", currency_pair=currency_pair, names=names)
+
+    async def returnTradeHistory(self, currency_pair="all", names=None, **kwargs):
+        return await self.gather("returnTradeHistory", currency_pair=currency_pair, names=names, **kwargs)
@@ -1,19 +1,34 @@
+import asyncio
 import inspect
+from collections import deque
 from datetime import datetime, timedelta
 
-from poloniex import constants
-from poloniex.api.base import command_operator, BasePublicApi, BaseTradingApi
-from poloniex.error import PoloniexError
+import aiohttp
+
+from poloniex import constants, events
+from poloniex.api.base import command_operator, check_period, status_error, BasePublicApi, BaseTradingApi
+from poloniex.decoder import get_decoder
+from poloniex.error import PoloniexError, TransientError
 from poloniex.logger import getLogger
+from poloniex.utils import split_range, fresh_candles
 from poloniex.wamp.client import WAMPClient
 
 __author__ = "andrew.shvv@gmail.com"
 
 logger = getLogger(__name__)
 
+# errors the idempotent commands are retried on, see 'retry.RetryPolicy'
+TRANSIENT_ERRORS = (TransientError, aiohttp.ClientError, asyncio.TimeoutError)
+
+
+def is_async(handler):
+    return inspect.iscoroutinefunction(handler) or inspect.isgeneratorfunction(handler)
+
 
 def ticker_wrapper(handler):
-    async def decorator(data):
+    handler_is_async = is_async(handler)
+
+    async def decorator(data, **kwargs):
         currency_pair = data[0]
         last = data[1]
         lowest_ask = data[2]
@@ -25,7 +40,7 @@ def ticker_wrapper(handler):
         day_high = data[8]
         day_low = data[9]
 
-        kwargs = {
+        event = {
             "currency_pair": currency_pair,
             "last": last,
             "lowest_ask": lowest_ask,
@@ -38,20 +53,22 @@ def ticker_wrapper(handler):
             "day_low": day_low
         }
 
-        if inspect.isgeneratorfunction(handler):
-            await handler(**kwargs)
+        if handler_is_async:
+            await handler(**event)
         else:
-            handler(**kwargs)
+            handler(**event)
 
     return decorator
 
 
 def trades_wrapper(topic, handler):
-    async def decorator(data):
+    handler_is_async = is_async(handler)
+
+    async def decorator(data, **kwargs):
         for event in data:
             event["currency_pair"] = topic
 
-            if inspect.isgeneratorfunction(handler):
+            if handler_is_async:
                 await handler(**event)
             else:
                 handler(**event)
@@ -60,7 +77,9 @@ def trades_wrapper(topic, handler):
 
 
 def trollbox_wrapper(handler):
-    async def decorator(data):
+    handler_is_async = is_async(handler)
+
+    async def decorator(data, **kwargs):
         if len(data) != 5:
             return
 
@@ -70,7 +89,7 @@ def trollbox_wrapper(handler):
         text = data[3]
         reputation = data[4]
 
-        kwargs = {
+        event = {
             "id": message_id,
             "username": username,
             "type": type_,
@@ -78,19 +97,97 @@ def trollbox_wrapper(handler):
             "reputation": reputation
         }
 
-        if inspect.isgeneratorfunction(handler):
-            await handler(**kwargs)
+        if handler_is_async:
+            await handler(**event)
+        else:
+            handler(**event)
+
+    return decorator
+
+
+def typed_ticker_wrapper(handler):
+    handler_is_async = is_async(handler)
+
+    async def decorator(data, **kwargs):
+        event = events.Ticker(*data[:10])
+
+        if handler_is_async:
+            await handler(event)
+        else:
+            handler(event)
+
+    return decorator
+
+
+def typed_trades_wrapper(topic, handler):
+    handler_is_async = is_async(handler)
+    market_event = events.market_event
+
+    async def decorator(data, seq=None, **kwargs):
+        for event in data:
+            event = market_event(topic, event, seq)
+
+            if handler_is_async:
+                await handler(event)
+            else:
+                handler(event)
+
+    return decorator
+
+
+def typed_trollbox_wrapper(handler):
+    handler_is_async = is_async(handler)
+
+    async def decorator(data, **kwargs):
+        if len(data) != 5:
+            return
+
+        type_, message_id, username, text, reputation = data
+        event = events.TrollboxMessage(message_id, username, type_, text, reputation)
+
+        if handler_is_async:
+            await handler(event)
         else:
-            handler(**kwargs)
+            handler(event)
 
     return decorator
 
 
+def batch_wrapper(topic, batcher):
+    message_events = events.message_events
+
+    async def decorator(data, seq=None, **kwargs):
+        await batcher.extend(topic, message_events(topic, data, seq))
+
+    return decorator
+
+
+def topic_wrapper(topic, handler, typed=False):
+    """
+    Wraps the handler of the topic to be called with the event fields as keyword arguments or, with 'typed', with
+    the single event object.
+    """
+    if topic in constants.CURRENCY_PAIRS:
+        return typed_trades_wrapper(topic, handler) if typed else trades_wrapper(topic, handler)
+
+    elif topic == "trollbox":
+        return typed_trollbox_wrapper(handler) if typed else trollbox_wrapper(handler)
+
+    elif topic == "ticker":
+        return typed_ticker_wrapper(handler) if typed else ticker_wrapper(handler)
+
+    elif topic not in constants.AVAILABLE_SUBSCRIPTIONS:
+        raise NotImplementedError("Topic not available")
+
+    return handler
+
+
 class PushApi:
     url = "wss://api.poloniex.com"
 
-    def __init__(self, session):
-        self.wamp = WAMPClient(url=self.url, session=session)
+    def __init__(self, session, url=None, decoder=None, recorder=None, metrics=None):
+        self.wamp = WAMPClient(url=url or self.url, session=session, decoder=decoder, recorder=recorder,
+                               metrics=metrics)
 
     async def start(self):
         await self.wamp.start()
@@ -104,34 +201,149 @@ class PushApi:
         [queue, subscriptions] = self.wamp.subsciptions
         return len(queue) + len(subscriptions) != 0
 
-    def subscribe(self, topic, handler):
-        if topic in constants.CURRENCY_PAIRS:
-            handler = trades_wrapper(topic, handler)
-            self.wamp.subscribe(topic=topic, handler=handler)
+    def metrics(self):
+        return self.wamp.metrics()
 
-        elif topic is "trollbox":
-            handler = trollbox_wrapper(handler)
-            self.wamp.subscribe(topic=topic, handler=handler)
+    def subscribe(self, topic, handler, typed=False, on_resync=None, policy=None, maxsize=1000):
+        """
+        Subscribes handler to the topic. By default the handler is called with the event fields as keyword arguments,
+        with 'typed' it is called with the single event object from 'poloniex.events'. 'on_resync' is called whenever
+        events of the topic might have been missed: after the reconnect or on the sequence gap. With the 'policy'
+        ('block', 'drop_oldest' or 'conflate') messages of the topic are queued and handled by the worker of the topic.
+        """
+        handler = topic_wrapper(topic, handler, typed)
+        self.wamp.subscribe(topic=topic, handler=handler, on_resync=on_resync, policy=policy, maxsize=maxsize)
 
-        elif topic is "ticker":
-            handler = ticker_wrapper(handler)
-            self.wamp.subscribe(topic=topic, handler=handler)
+    def subscribe_batch(self, topics, handler, max_size=100, max_latency=0.05):
+        """
+        Subscribes handler to the topics in the batch mode: handler is called with the dictionary of typed events
+        grouped by topic, see 'events.EventBatcher'.
+        """
+        batcher = events.EventBatcher(handler, max_size=max_size, max_latency=max_latency)
 
-        elif topic in constants.AVAILABLE_SUBSCRIPTIONS:
-            self.wamp.subscribe(topic=topic, handler=handler)
+        for topic in topics:
+            if topic not in constants.AVAILABLE_SUBSCRIPTIONS:
+                raise NotImplementedError("Topic not available")
 
-        else:
-            raise NotImplementedError("Topic not available")
+            self.wamp.subscribe(topic=topic, handler=batch_wrapper(topic, batcher))
+
+        return batcher
+
+
+class ChartDataBackfill:
+    """
+    Asynchronous iterator over candles of the long range in time order. Chunks of the range are fetched concurrently,
+    but no more than 'concurrency' of them are requested or kept in memory at once.
+    """
+
+    def __init__(self, api, currency_pair, start, end=None, period=300, concurrency=4):
+        check_period(period)
+
+        self.api = api
+        self.currency_pair = currency_pair
+        self.period = period
+        self.concurrency = concurrency
+
+        self.chunks = split_range(start, end, constants.CHART_DATA_CHUNKS[period])
+        self.pending = deque()
+        self.candles = iter(())
+        self.last = None
+
+    def _fill(self, limit):
+        while len(self.pending) < limit:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+
+            chunk_start, chunk_end = chunk
+            self.pending.append(asyncio.ensure_future(self.api.returnChartData(currency_pair=self.currency_pair,
+                                                                              start=chunk_start,
+                                                                              end=chunk_end,
+                                                                              period=self.period)))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            candle = next(self.candles, None)
+            if candle is not None:
+                self.last = candle["date"]
+                return candle
+
+            self._fill(self.concurrency)
+            if not self.pending:
+                raise StopAsyncIteration
+
+            try:
+                candles = await self.pending.popleft()
+            except BaseException:
+                await self.aclose()
+                raise
+
+            # the candles of this chunk are held till iterated, so one chunk less is requested ahead
+            self._fill(self.concurrency - 1)
+            self.candles = fresh_candles(candles, self.last)
+
+    def close(self):
+        """
+        Cancels the chunks requested ahead, should be called if the iteration is stopped early.
+        """
+        self.chunks = iter(())
+        while self.pending:
+            self.pending.popleft().cancel()
+
+    async def aclose(self):
+        """
+        Cancels the chunks requested ahead and waits for them to finish, the iteration is stopped
+        on the failure of any chunk.
+        """
+        pending = list(self.pending)
+        self.close()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
 
 
 class PublicApi(BasePublicApi):
-    def __init__(self, session):
+    transient_errors = TRANSIENT_ERRORS
+
+    def __init__(self, session, scheduler=None, transforms=None, store=None, cache=None, decoder=None, raw=False,
+                 recorder=None, metrics=None, retry=None):
         self.session = session
+        self.scheduler = scheduler
+        self.transforms = transforms or {}
+        self.store = store
+        self.cache = cache
+        self.recorder = recorder
+        self.metrics = metrics
+        self.retry = retry
+        self.decode = get_decoder(decoder)
+        self.raw = raw
 
     async def api_call(self, *args, **kwargs):
+        return await self.request(*args, **kwargs)
+
+    async def request(self, *args, raw=None, **kwargs):
+        timer = self.metrics.timer(kwargs["params"]["command"]) if self.metrics is not None else None
+
         async with self.session.get(self.url, *args, **kwargs) as response:
             logger.debug(response)
-            response = await response.json()
+            body = await response.read()
+            if timer is not None:
+                timer.lap("network")
+
+            if self.recorder is not None:
+                self.recorder.response(kwargs.get("params"), response.status, body)
+
+            if response.status != 200:
+                raise status_error(response.status, body, self.decode, self.url)
+
+            if self.raw if raw is None else raw:
+                return body
+
+            response = self.decode(body)
+            if timer is not None:
+                timer.lap("decode")
 
             if ("error" in response) and (response["error"] is not None):
                 raise PoloniexError(response["error"])
@@ -191,21 +403,53 @@ class PublicApi(BasePublicApi):
         """
         pass
 
+    def backfill_chart_data(self, currency_pair, start, end=None, period=300, concurrency=4):
+        """
+        Returns asynchronous iterator over candles of the long range, see 'ChartDataBackfill'.
+        """
+        return ChartDataBackfill(self, currency_pair, start, end=end, period=period, concurrency=concurrency)
+
 
 class TradingApi(BaseTradingApi):
-    def __init__(self, session, *args, **kwargs):
+    transient_errors = TRANSIENT_ERRORS
+
+    def __init__(self, session, *args, scheduler=None, decoder=None, raw=False, transforms=None, metrics=None,
+                 retry=None, **kwargs):
         self.session = session
+        self.scheduler = scheduler
+        self.transforms = transforms or {}
+        self.metrics = metrics
+        self.retry = retry
+        self.decode = get_decoder(decoder)
+        self.raw = raw
 
         super(TradingApi, self).__init__(*args, **kwargs)
 
     async def api_call(self, *args, **kwargs):
+        timer = self.metrics.timer(kwargs["data"]["command"]) if self.metrics is not None else None
+
         data, headers = self.secure_request(kwargs.get('data', {}), kwargs.get('headers', {}))
+        if timer is not None:
+            timer.lap("sign")
 
         kwargs['data'] = data
         kwargs['headers'] = headers
 
         async with self.session.post(self.url, *args, **kwargs) as response:
-            return await response.json()
+            body = await response.read()
+            if timer is not None:
+                timer.lap("network")
+
+            if response.status != 200:
+                raise status_error(response.status, body, self.decode, self.url)
+
+            if self.raw:
+                return body
+
+            response = self.decode(body)
+            if timer is not None:
+                timer.lap("decode")
+            return response
 
     @command_operator
     async def returnBalances(self):
@@ -1,143 +1,368 @@
 import hashlib
 import hmac
-import time
 import urllib
 from inspect import signature, iscoroutinefunction
 
 from poloniex import constants
-from poloniex.error import PoloniexError, AddressAlreadyExist
+from poloniex.error import PoloniexError, AddressAlreadyExist, TransientError
 from poloniex.logger import getLogger
-from poloniex.utils import switch
+from poloniex.nonce import Nonce
 
 __author__ = "andrew.shvv@gmail.com"
 
 logger = getLogger(__name__)
 
 
-def apply_defaults(func, *args, **kwargs):
-    kwargs = signature(func).bind_partial(*args, **kwargs)
-    kwargs.apply_defaults()
-    return dict(kwargs.arguments)
+def to_timestamp(value):
+    if value:
+        return value.timestamp()
+    return value
+
+
+def check_period(value):
+    if value and value not in constants.CHART_DATA_PERIODS:
+        raise PoloniexError("Period '{}' not available.".format(value))
+    return value
+
+
+def status_error(status, body, decode, url):
+    """
+    Error of the unsuccessful response with the message of the exchange if the body has one, e.g. the nonce error.
+    Overloaded or failing server is expected to answer the next request, so such errors are transient.
+    """
+    error = TransientError if status >= 500 or status == 429 else PoloniexError
+
+    try:
+        response = decode(body)
+    except ValueError:
+        response = None
+
+    if isinstance(response, dict) and response.get("error") is not None:
+        return error(response["error"])
+    return error('Got {} when calling {}.'.format(status, url))
+
+
+PARAMETERS = {
+    "currency_pair": "currencyPair",
+    "order_number": "orderNumber",
+}
+
+CONVERTERS = {
+    "start": to_timestamp,
+    "end": to_timestamp,
+    "period": check_period,
+}
+
+
+class Command:
+    """
+    Precompiled description of the api command: http method and the mapping of the python arguments to the request
+    parameters, together with the converter of the argument value if any.
+    """
+    __slots__ = ("name", "method", "params")
+
+    def __init__(self, name, method, arguments):
+        self.name = name
+        self.method = method
+        self.params = tuple((argument, PARAMETERS.get(argument, argument), CONVERTERS.get(argument))
+                            for argument in arguments)
+
+    def build(self, kwargs):
+        params = {"command": self.name}
+        for argument, param, converter in self.params:
+            value = kwargs.get(argument)
+            if converter is not None:
+                value = converter(value)
+            params[param] = value
+
+        return params
+
+
+def register(method, **commands):
+    return {name: Command(name, method, arguments) for name, arguments in commands.items()}
+
+
+def binder(func):
+    """
+    Inspects signature of the command once and returns function which binds call arguments to the argument names
+    with the defaults applied.
+    """
+    parameters = list(signature(func).parameters.values())[1:]
+    names = tuple(parameter.name for parameter in parameters)
+    defaults = {parameter.name: parameter.default for parameter in parameters
+                if parameter.default is not parameter.empty}
+    known = frozenset(names)
+
+    def bind(args, kwargs):
+        if len(args) > len(names):
+            raise TypeError("{}() takes {} positional arguments but {} were given".format(func.__name__,
+                                                                                          len(names),
+                                                                                          len(args)))
+        arguments = dict(defaults)
+
+        if args:
+            arguments.update(zip(names, args))
+
+        if kwargs:
+            if not known.issuperset(kwargs):
+                unexpected = ", ".join(sorted(set(kwargs) - known))
+                raise TypeError("{}() got unexpected keyword arguments: {}".format(func.__name__, unexpected))
+
+            if args and not kwargs.keys().isdisjoint(names[:len(args)]):
+                raise TypeError("{}() got multiple values for the same argument".format(func.__name__))
+
+            arguments.update(kwargs)
+
+        return arguments
+
+    return bind
+
+
+def instrumented(call, command):
+    """
+    Records the latency and the errors of the call when the api is given the metrics registry, the timer is passed
+    to the call to record its stages.
+    """
+    if iscoroutinefunction(call):
+        async def async_decorator(self, *args, **kwargs):
+            if self.metrics is None:
+                return await call(self, args, kwargs, None)
+
+            timer = self.metrics.timer(command)
+            try:
+                return await call(self, args, kwargs, timer)
+            except Exception as e:
+                self.metrics.error(command, e)
+                raise
+            finally:
+                timer.total()
+
+        return async_decorator
+    else:
+        def decorator(self, *args, **kwargs):
+            if self.metrics is None:
+                return call(self, args, kwargs, None)
+
+            timer = self.metrics.timer(command)
+            try:
+                return call(self, args, kwargs, timer)
+            except Exception as e:
+                self.metrics.error(command, e)
+                raise
+            finally:
+                timer.total()
+
+        return decorator
+
+
+def request_timeout(api, remaining):
+    """
+    Keyword arguments of the request which has to end in 'remaining' seconds, the api timeout is kept if it is shorter.
+    """
+    if remaining is None:
+        return {}
+
+    timeout = api.timeout
+    if timeout is None:
+        return {"timeout": remaining}
+    if isinstance(timeout, tuple):
+        return {"timeout": tuple(remaining if part is None else min(part, remaining) for part in timeout)}
+    return {"timeout": min(timeout, remaining)}
 
 
 def command_operator(func):
+    command = func.__name__
+    bind = binder(func)
+
     if iscoroutinefunction(func):
-        async def async_decorator(self, *args, **kwargs):
-            kwargs = apply_defaults(func, *args, **kwargs)
-            method, params = self.get_params(func.__name__, **kwargs)
+        async def async_acquire(self, timer):
+            if self.scheduler is not None:
+                await self.scheduler.acquire(command)
+                if timer is not None:
+                    timer.lap("wait")
+
+        async def async_fetch(self, method, params, timer):
+            await async_acquire(self, timer)
 
             if method == "post":
-                response = await self.api_call(data=params)
-            elif method == "get":
-                response = await self.api_call(params=params)
+                return await self.api_call(data=params)
+            return await self.api_call(params=params)
+
+        async def async_fetch_page(self, params, timer):
+            await async_acquire(self, timer)
+
+            # history is stored decoded, so it is returned decoded even in the raw mode
+            return await self.request(params=params, raw=False)
+
+        async def async_send(self, method, params, timer, cached=True):
+            # stored history and cached responses are answered without taking the rate limit token,
+            # every page of the history which is missing in the store takes its own token
+            if self.store is not None and self.store.handles(params):
+                response = await self.store.query_async(params,
+                                                        lambda params: async_fetch_page(self, params, timer))
+            elif cached and self.cache is not None and self.cache.handles(params):
+                response = await self.cache.query_async(params,
+                                                        lambda params: async_fetch(self, method, params, timer))
             else:
+                response = await async_fetch(self, method, params, timer)
+
+            if timer is not None:
+                timer.restart()
+            response = self.response_handler(response, command=command, params=params)
+            if timer is not None:
+                timer.lap("handler")
+            return response
+
+        async def async_call(self, args, kwargs, timer):
+            kwargs = bind(args, kwargs)
+            method, params = self.get_params(command, **kwargs)
+
+            if method not in ("get", "post"):
                 raise PoloniexError("Not available method '{}'".format(method))
 
-            return self.response_handler(response, command=func.__name__)
+            if self.retry is not None and self.retry.handles(command):
+                # every attempt gets its own copy of the parameters, the trading api signs them in place;
+                # the hedged attempt would join the in-flight request of the cache, so it goes past it
+                return await self.retry.call_async(command,
+                                                   lambda hedged: async_send(self, method, dict(params), timer,
+                                                                             cached=not hedged),
+                                                   self.transient_errors)
 
-        return async_decorator
+            return await async_send(self, method, params, timer)
+
+        return instrumented(async_call, command)
     else:
-        def decorator(self, *args, **kwargs):
-            kwargs = apply_defaults(func, *args, **kwargs)
-            method, params = self.get_params(func.__name__, **kwargs)
+        def acquire(self, timer):
+            if self.scheduler is not None:
+                self.scheduler.acquire(command)
+                if timer is not None:
+                    timer.lap("wait")
+
+        def fetch(self, method, params, timer, timeout=None):
+            acquire(self, timer)
 
+            kwargs = request_timeout(self, timeout)
             if method == "post":
-                response = self.api_call(data=params)
-            elif method == "get":
-                response = self.api_call(params=params)
+                return self.api_call(data=params, **kwargs)
+            return self.api_call(params=params, **kwargs)
+
+        def fetch_page(self, params, timer, timeout=None):
+            acquire(self, timer)
+            return self.request(params=params, raw=False, **request_timeout(self, timeout))
+
+        def send(self, method, params, timer, timeout=None):
+            if self.store is not None and self.store.handles(params):
+                response = self.store.query(params, lambda params: fetch_page(self, params, timer, timeout))
+            elif self.cache is not None and self.cache.handles(params):
+                response = self.cache.query(params, lambda params: fetch(self, method, params, timer, timeout))
             else:
+                response = fetch(self, method, params, timer, timeout)
+
+            if timer is not None:
+                timer.restart()
+            response = self.response_handler(response, command=command, params=params)
+            if timer is not None:
+                timer.lap("handler")
+            return response
+
+        def call(self, args, kwargs, timer):
+            kwargs = bind(args, kwargs)
+            method, params = self.get_params(command, **kwargs)
+
+            if method not in ("get", "post"):
                 raise PoloniexError("Not available method '{}'".format(method))
 
-            return self.response_handler(response, command=func.__name__)
+            if self.retry is not None and self.retry.handles(command):
+                return self.retry.call(command,
+                                       lambda timeout: send(self, method, dict(params), timer, timeout),
+                                       self.transient_errors)
 
-        return decorator
+            return send(self, method, params, timer)
+
+        return instrumented(call, command)
 
 
 class BasePublicApi:
     url = "https://poloniex.com/public?"
+    scheduler = None
+
+    # command -> function applied to the successful response, see 'columnar.transforms' and 'numeric.NumericDecoder'
+    transforms = {}
+
+    # local cache of the history, see 'store.HistoryStore'
+    store = None
+
+    # cache of the idempotent commands responses, see 'cache.ResponseCache'
+    cache = None
+
+    # registry of the calls latency, see 'metrics.MetricsRegistry'
+    metrics = None
+
+    # retries and hedging of the idempotent commands, see 'retry.RetryPolicy'
+    retry = None
+    transient_errors = (TransientError,)
+
+    commands = register("get",
+                        returnTicker=(),
+                        return24hVolume=(),
+                        returnOrderBook=("currency_pair", "depth"),
+                        returnChartData=("currency_pair", "period", "start", "end"),
+                        returnCurrencies=(),
+                        returnTradeHistory=("currency_pair", "start", "end"))
 
     def api_call(self, *args, **kwargs):
         raise NotImplementedError("'api_call' method should be implemented.")
 
     def get_params(self, command, **kwargs):
-        currency_pair = kwargs.get("currency_pair")
-
-        depth = kwargs.get("depth")
-
-        start = kwargs.get("start")
-        if start:
-            start = start.timestamp()
-
-        end = kwargs.get("end")
-        if end:
-            end = end.timestamp()
-
-        period = kwargs.get("period")
-        if period and period not in constants.CHART_DATA_PERIODS:
-            raise PoloniexError("Period '{}' not available.".format(period))
-
-        for case in switch(command):
-            if case("returnTicker"):
-                method = "get"
-                params = {"command": command}
-                break
-
-            if case("return24hVolume"):
-                method = "get"
-                params = {"command": command}
-                break
-
-            if case("returnOrderBook"):
-                method = "get"
-                params = {
-                    "command": command,
-                    "currencyPair": currency_pair,
-                    "depth": depth
-                }
-                break
-
-            if case("returnChartData"):
-                method = "get"
-                params = {
-                    "command": command,
-                    "currencyPair": currency_pair,
-                    "period": period,
-                    "start": start,
-                    "end": end
-                }
-                break
-
-            if case("returnCurrencies"):
-                method = "get"
-                params = {"command": command}
-                break
-
-            if case("returnTradeHistory"):
-                method = "get"
-                params = {
-                    "command": command,
-                    "currencyPair": currency_pair,
-                    "start": start,
-                    "end": end
-                }
-                break
-
-            if case():
-                raise NotImplementedError("There is no command '{}'.".format(command))
-
-        return method, params
-
-    def response_handler(self, response, **kwargs):
+        try:
+            command = self.commands[command]
+        except KeyError:
+            raise NotImplementedError("There is no command '{}'.".format(command))
+
+        return command.method, command.build(kwargs)
+
+    def response_handler(self, response, command=None, **kwargs):
+        if isinstance(response, bytes):
+            # raw mode, the body is returned undecoded
+            return response
+
         if ("error" in response) and (response["error"] is not None):
             raise PoloniexError(response["error"])
 
+        transform = self.transforms.get(command)
+        if transform is not None:
+            response = transform(response)
+
         return response
 
 
 class BaseTradingApi:
     url = "https://poloniex.com/tradingApi?"
-
-    def __init__(self, api_key, api_sec):
+    scheduler = None
+    store = None
+    cache = None
+    metrics = None
+    retry = None
+    transient_errors = (TransientError,)
+
+    # command -> function applied to the successful response, see 'numeric.NumericDecoder'
+    transforms = {}
+
+    commands = register("post",
+                        returnBalances=(),
+                        returnCompleteBalances=(),
+                        returnDepositAddresses=(),
+                        generateNewAddress=("currency",),
+                        returnDepositsWithdrawals=("start", "end"),
+                        returnOpenOrders=("currency_pair",),
+                        returnTradeHistory=("currency_pair", "start", "end"),
+                        returnOrderTrades=("order_number",),
+                        buy=("currency_pair", "rate", "amount"),
+                        sell=("currency_pair", "rate", "amount"),
+                        withdraw=("currency", "amount", "address"),
+                        cancelOrder=("order_number",))
+
+    def __init__(self, api_key, api_sec, nonce=None):
         if type(api_key) is not str:
             raise Exception("API_KEY must be string")
 
@@ -147,9 +372,15 @@ class BaseTradingApi:
         self.api_key = api_key
         self.api_sec = api_sec.encode()
 
+        # nonce source should be shared by all clients which use the same key
+        self.nonces = nonce or Nonce()
+
+        # functions called with (command, params, response) of every successful response, see 'account.AccountMirror'
+        self.observers = []
+
     @property
     def nonce(self):
-        return int(time.time() * 1000)
+        return self.nonces.next()
 
     def secure_request(self, data, headers):
         data.update(nonce=self.nonce)
@@ -164,134 +395,32 @@ class BaseTradingApi:
         return data, headers
 
     def get_params(self, command, **kwargs):
-        currency_pair = kwargs.get("currency_pair")
-
-        currency = kwargs.get("currency")
-
-        start = kwargs.get("start")
-        if start:
-            start = start.timestamp()
-
-        end = kwargs.get("end")
-        if end:
-            end = end.timestamp()
-
-        rate = kwargs.get("rate")
-        amount = kwargs.get("amount")
-        address = kwargs.get("address")
-        order_number = kwargs.get("order_number")
-
-        for case in switch(command):
-            if case("returnBalances"):
-                method = "post"
-                params = {"command": command}
-                break
-
-            if case("returnCompleteBalances"):
-                method = "post"
-                params = {"command": command}
-                break
-
-            if case("returnDepositAddresses"):
-                method = "post"
-                params = {"command": command}
-                break
-
-            if case("generateNewAddress"):
-                method = "post"
-                params = {
-                    "command": command,
-                    "currency": currency
-                }
-                break
-
-            if case("returnDepositsWithdrawals"):
-                method = "post"
-                params = {
-                    "command": command,
-                    "start": start,
-                    "end": end
-                }
-                break
-
-            if case("returnOpenOrders"):
-                method = "post"
-                params = {
-                    "command": command,
-                    "currencyPair": currency_pair
-                }
-                break
-
-            if case("returnTradeHistory"):
-                method = "post"
-                params = {
-                    "command": command,
-                    "currencyPair": currency_pair,
-                    "start": start,
-                    "end": end
-                }
-                break
-
-            if case("returnOrderTrades"):
-                method = "post"
-                params = {
-                    "command": command,
-                    "orderNumber": order_number
-                }
-                break
-
-            if case("buy"):
-                method = "post"
-                params = {
-                    "command": command,
-                    "currencyPair": currency_pair,
-                    "rate": rate,
-                    "amount": amount
-                }
-                break
-
-            if case("sell"):
-                method = "post"
-                params = {
-                    "command": command,
-                    "currencyPair": currency_pair,
-                    "rate": rate,
-                    "amount": amount
-                }
-                break
-
-            if case("withdraw"):
-                method = "post"
-                params = {
-                    "currency": currency,
-                    "amount": amount,
-                    "address": address
-                }
-                break
-
-            if case("cancelOrder"):
-                method = "post"
-                params = {
-                    "command": "cancelOrder",
-                    "orderNumber": order_number
-                }
-                break
-
-            if case():
-                raise NotImplementedError("There is no command '{}'.".format(command))
-
-        return method, params
-
-    def response_handler(self, response, command, **kwargs):
+        try:
+            command = self.commands[command]
+        except KeyError:
+            raise NotImplementedError("There is no command '{}'.".format(command))
+
+        return command.method, command.build(kwargs)
+
+    def response_handler(self, response, command, params=None, **kwargs):
+        if isinstance(response, bytes):
+            # raw mode, the body is returned undecoded
+            return response
+
         if ("error" in response) and (response["error"] is not None):
             raise PoloniexError(response["error"])
 
-        for case in switch(command):
-            if case("generateNewAddress"):
-                if response["success"] == 0:
-                    if "address" in response:
-                        raise AddressAlreadyExist("Address [{}] already exist".format(response["address"]))
-                    elif "response" in response:
-                        raise PoloniexError(response["response"])
+        if command == "generateNewAddress" and response["success"] == 0:
+            if "address" in response:
+                raise AddressAlreadyExist("Address [{}] already exist".format(response["address"]))
+            elif "response" in response:
+                raise PoloniexError(response["response"])
+
+        for observer in self.observers:
+            observer(command, params, response)
+
+        transform = self.transforms.get(command)
+        if transform is not None:
+            response = transform(response)
 
         return response
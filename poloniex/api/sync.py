@@ -2,23 +2,91 @@ from datetime import datetime
 from datetime import timedelta
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from poloniex.error import PoloniexError
-from poloniex.api.base import command_operator, BasePublicApi, BaseTradingApi
+from poloniex import constants
+from poloniex.decoder import get_decoder
+from poloniex.error import TransientError
+from poloniex.api.base import command_operator, check_period, status_error, BasePublicApi, BaseTradingApi
+from poloniex.utils import split_range, fresh_candles
 
 __author__ = 'andrew.shvv@gmail.com'
 
+DEFAULT_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 10
+
+# errors the idempotent commands are retried on, see 'retry.RetryPolicy'
+TRANSIENT_ERRORS = (TransientError, requests.ConnectionError, requests.Timeout)
+
+
+def create_session(pool_connections=1, pool_maxsize=DEFAULT_POOL_SIZE, max_retries=0):
+    """
+    Creates keep-alive session with connection pool which might be shared between the public and the trading api.
+    'pool_connections' is the number of hosts to keep pools for, 'pool_maxsize' is the number of connections to
+    keep open per host, should be not less than the number of threads making calls at the same time.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          max_retries=max_retries)
+
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class PublicApi(BasePublicApi):
     url = "https://poloniex.com/public?"
+    transient_errors = TRANSIENT_ERRORS
+
+    def __init__(self,
+                 session=None,
+                 timeout=DEFAULT_TIMEOUT,
+                 scheduler=None,
+                 transforms=None,
+                 store=None,
+                 cache=None,
+                 decoder=None,
+                 raw=False,
+                 recorder=None,
+                 metrics=None,
+                 retry=None):
+        self.session = session or create_session()
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.transforms = transforms or {}
+        self.store = store
+        self.cache = cache
+        self.recorder = recorder
+        self.metrics = metrics
+        self.retry = retry
+        self.decode = get_decoder(decoder)
+        self.raw = raw
 
     def api_call(self, *args, **kwargs):
-        response = requests.get(self.url, *args, **kwargs)
+        return self.request(*args, **kwargs)
+
+    def request(self, *args, raw=None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        timer = self.metrics.timer(kwargs["params"]["command"]) if self.metrics is not None else None
+
+        response = self.session.get(self.url, *args, **kwargs)
+        if timer is not None:
+            timer.lap("network")
+
+        if self.recorder is not None:
+            self.recorder.response(kwargs.get("params"), response.status_code, response.content)
 
         if response.status_code == 200:
-            return response.json()
+            if self.raw if raw is None else raw:
+                return response.content
+
+            response = self.decode(response.content)
+            if timer is not None:
+                timer.lap("decode")
+            return response
         else:
-            raise PoloniexError('Got {} when calling {}.'.format(response.status_code, self.url))
+            raise status_error(response.status_code, response.content, self.decode, self.url)
 
     @command_operator
     def returnTicker(self):
@@ -73,21 +141,77 @@ class PublicApi(BasePublicApi):
         """
         pass
 
+    def backfill_chart_data(self, currency_pair, start, end=None, period=300):
+        """
+        Yields candles of the long range in time order, the range is fetched by chunks, so that only one chunk
+        is kept in memory.
+        """
+        check_period(period)
+        last = None
+
+        for chunk_start, chunk_end in split_range(start, end, constants.CHART_DATA_CHUNKS[period]):
+            candles = self.returnChartData(currency_pair=currency_pair,
+                                           start=chunk_start,
+                                           end=chunk_end,
+                                           period=period)
+
+            for candle in fresh_candles(candles, last):
+                last = candle["date"]
+                yield candle
+
 
 class TradingApi(BaseTradingApi):
     url = "https://poloniex.com/tradingApi?"
+    transient_errors = TRANSIENT_ERRORS
+
+    def __init__(self,
+                 api_key,
+                 api_sec,
+                 session=None,
+                 timeout=DEFAULT_TIMEOUT,
+                 scheduler=None,
+                 nonce=None,
+                 decoder=None,
+                 raw=False,
+                 transforms=None,
+                 metrics=None,
+                 retry=None):
+        self.session = session or create_session()
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.transforms = transforms or {}
+        self.metrics = metrics
+        self.retry = retry
+        self.decode = get_decoder(decoder)
+        self.raw = raw
+
+        super(TradingApi, self).__init__(api_key=api_key, api_sec=api_sec, nonce=nonce)
 
     def api_call(self, *args, **kwargs):
+        timer = self.metrics.timer(kwargs["data"]["command"]) if self.metrics is not None else None
+
         data, headers = self.secure_request(kwargs.get('data', {}), kwargs.get('headers', {}))
+        if timer is not None:
+            timer.lap("sign")
 
         kwargs['data'] = data
         kwargs['headers'] = headers
+        kwargs.setdefault("timeout", self.timeout)
+
+        response = self.session.post(self.url, *args, **kwargs)
+        if timer is not None:
+            timer.lap("network")
 
-        response = requests.post(self.url, *args, **kwargs)
         if response.status_code == 200:
-            return response.json()
+            if self.raw:
+                return response.content
+
+            response = self.decode(response.content)
+            if timer is not None:
+                timer.lap("decode")
+            return response
         else:
-            raise PoloniexError('Got {} when calling {}.'.format(response.status_code, self.url))
+            raise status_error(response.status_code, response.content, self.decode, self.url)
 
     @command_operator
     def returnBalances(self):
@@ -1,4 +1,5 @@
 import asyncio
+import logging
 import signal
 import sys
 
@@ -7,16 +8,30 @@ import aiohttp
 from poloniex.api import async, sync
 from poloniex.error import PoloniexError
 from poloniex.logger import getLogger
+from poloniex.orderbook import OrderBookEngine
+from poloniex.scheduler import SyncScheduler, AsyncScheduler
+from poloniex.sharded import ShardedPushApi
 
 __author__ = 'andrew.shvv@gmail.com'
 
 
 class Application:
-    def __init__(self, api_key=None, api_sec=None):
+    def __init__(self, api_key=None, api_sec=None, scheduler=None, nonce=None, cache=None, metrics=None,
+                 retry=None):
         super().__init__()
         self.api_key = api_key
         self.api_sec = api_sec
-        self.logger = getLogger(__name__)
+        self.nonce = nonce
+        self.cache = cache
+        # registry the apis record their latency into, see 'metrics.MetricsRegistry'
+        self.metrics = metrics
+        # retries and hedging of the idempotent commands, see 'retry.RetryPolicy'
+        self.retry = retry
+        # the application logs at every level unless 'logger.configure' is given the level
+        self.logger = getLogger(__name__, level=logging.DEBUG)
+
+        # request budget shared by the public and the trading api
+        self.scheduler = scheduler
 
         self._trading = None
         self.public = None
@@ -30,18 +45,40 @@ class Application:
 
 
 class SyncApp(Application):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, session=None, timeout=sync.DEFAULT_TIMEOUT, **kwargs):
         super().__init__(*args, **kwargs)
-        self.init_api()
-
-    def init_api(self):
-        self.public = sync.PublicApi()
+        self.init_api(session=session, timeout=timeout)
+
+    def init_api(self, session=None, timeout=sync.DEFAULT_TIMEOUT):
+        # public and trading api share one pool of keep-alive connections
+        self.session = session or sync.create_session()
+        self.scheduler = self.scheduler or SyncScheduler()
+        self.public = sync.PublicApi(session=self.session,
+                                     timeout=timeout,
+                                     scheduler=self.scheduler,
+                                     cache=self.cache,
+                                     metrics=self.metrics,
+                                     retry=self.retry)
 
         if self.api_key and self.api_sec:
-            self._trading = sync.TradingApi(api_key=self.api_key, api_sec=self.api_sec)
+            self._trading = sync.TradingApi(api_key=self.api_key,
+                                            api_sec=self.api_sec,
+                                            session=self.session,
+                                            timeout=timeout,
+                                            scheduler=self.scheduler,
+                                            nonce=self.nonce,
+                                            metrics=self.metrics,
+                                            retry=self.retry)
 
 
 class AsyncApp(Application):
+    def __init__(self, *args, shards=None, **kwargs):
+        """
+        With 'shards' the push api topics are spread over that number of processes, see 'ShardedPushApi'.
+        """
+        super().__init__(*args, **kwargs)
+        self.shards = shards
+
     def init_api(self, loop=None, session=None):
         def stop_handler(*args, **kwargs):
             self.stop()
@@ -49,11 +86,20 @@ class AsyncApp(Application):
 
         signal.signal(signal.SIGINT, stop_handler)
 
-        self.public = async.PublicApi(session=session)
-        self.push = async.PushApi(session=session)
+        self.scheduler = self.scheduler or AsyncScheduler(loop=loop)
+        self.public = async.PublicApi(session=session, scheduler=self.scheduler, cache=self.cache,
+                                      metrics=self.metrics, retry=self.retry)
+        self.push = ShardedPushApi(shards=self.shards) if self.shards else async.PushApi(session=session,
+                                                                                       metrics=self.metrics)
 
         if self.api_key and self.api_sec:
-            self._trading = async.TradingApi(api_key=self.api_key, api_sec=self.api_sec, session=session)
+            self._trading = async.TradingApi(api_key=self.api_key,
+                                             api_sec=self.api_sec,
+                                             session=session,
+                                             scheduler=self.scheduler,
+                                             nonce=self.nonce,
+                                             metrics=self.metrics,
+                                             retry=self.retry)
 
         def stop_decorator(main, api):
             async def decorator(*args, **kwargs):
@@ -63,7 +109,7 @@ class AsyncApp(Application):
             return decorator
 
         g = asyncio.gather(
-            self.push.wamp.start(),
+            self.push.start(),
             stop_decorator(self.main, self.push)()
         )
 
@@ -81,5 +127,16 @@ class AsyncApp(Application):
         else:
             self.init_api(self.loop, session)
 
+    def order_book(self, currency_pair, **kwargs):
+        """
+        Starts keeping the local order book of the market up to date with the push api, should be called from 'main'.
+        """
+        if self.shards:
+            raise PoloniexError("Order book engine needs the push api of the same process, start the app without shards")
+
+        engine = OrderBookEngine(currency_pair, public=self.public, push=self.push, **kwargs)
+        engine.start()
+        return engine
+
     async def main(self):
         raise NotImplementedError("method 'main' should be overridden!")
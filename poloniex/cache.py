@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# seconds the response of the idempotent public command is considered fresh
+DEFAULT_TTLS = {
+    "returnTicker": 1,
+    "return24hVolume": 10,
+    "returnCurrencies": 600,
+}
+
+
+def retrieve_exception(task):
+    # the error of the request nobody waits for anymore is not reported as never retrieved
+    if not task.cancelled():
+        task.exception()
+
+
+class ResponseCache:
+    """
+    In-memory cache of the public api responses with the per command ttl and LRU eviction. Concurrent identical
+    calls of the async api share the single in-flight request. Cached responses are shared by all callers
+    and should not be modified.
+    """
+
+    def __init__(self, ttls=None, maxsize=256, clock=time.monotonic):
+        self.ttls = ttls if ttls is not None else DEFAULT_TTLS
+        self.maxsize = maxsize
+        self.clock = clock
+
+        self.entries = OrderedDict()
+        self.inflight = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def handles(self, params):
+        return params is not None and params.get("command") in self.ttls
+
+    def key(self, params):
+        return tuple(sorted(params.items()))
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        expires, response = entry
+        if expires < self.clock():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, params, response):
+        if isinstance(response, dict) and response.get("error") is not None:
+            return
+
+        self.entries[key] = (self.clock() + self.ttls[params["command"]], response)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def query(self, params, fetch):
+        key = self.key(params)
+
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        response = fetch(params)
+        self.put(key, params, response)
+        return response
+
+    async def query_async(self, params, fetch):
+        key = self.key(params)
+
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+
+        task = self.inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self.inflight[key] = asyncio.ensure_future(self._fetch(key, params, fetch))
+            task.add_done_callback(retrieve_exception)
+
+        # the request is shared: cancelled caller, even the one which started it, doesn't cancel it for others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key, params, fetch):
+        try:
+            response = await fetch(params)
+            self.put(key, params, response)
+            return response
+        finally:
+            del self.inflight[key]
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+        }
@@ -0,0 +1,200 @@
+from functools import partial
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from poloniex.error import PoloniexError
+from poloniex.numeric import fixed_column
+
+__author__ = 'andrew.shvv@gmail.com'
+
+SCALE = 10 ** 8
+
+CANDLE_FIELDS = ("high", "low", "open", "close", "volume", "quoteVolume", "weightedAverage")
+TRADE_FIELDS = ("rate", "amount", "total")
+
+BUY = 0
+SELL = 1
+TRADE_TYPES = {"buy": BUY, "sell": SELL}
+
+
+def require_numpy():
+    if np is None:
+        raise PoloniexError("Columnar mode requires 'numpy' to be installed")
+
+
+def candle_dtype(scaled=False):
+    require_numpy()
+    value = np.int64 if scaled else np.float64
+    return np.dtype([("date", np.int64)] + [(field, value) for field in CANDLE_FIELDS])
+
+
+def trade_dtype(scaled=False):
+    require_numpy()
+    value = np.int64 if scaled else np.float64
+    return np.dtype([("globalTradeID", np.int64),
+                     ("tradeID", np.int64),
+                     ("date", np.int64),
+                     ("type", np.int8)] + [(field, value) for field in TRADE_FIELDS])
+
+
+def to_values(values, scaled=False):
+    """
+    Converts the list of numbers or decimal strings into the float64 or scaled int64 array. Scaled values are parsed
+    from the decimal strings directly, so they are exact in the whole int64 range, json numbers are exact up to
+    15 significant digits.
+    """
+    if scaled:
+        return np.array(fixed_column(values), dtype=np.int64)
+    return np.asarray(values, dtype=np.float64)
+
+
+def candles_to_array(candles, scaled=False):
+    """
+    Converts 'returnChartData' response into the structured array, the placeholder candle of the empty range is dropped.
+    """
+    candles = [candle for candle in candles if candle["date"]]
+
+    result = np.empty(len(candles), dtype=candle_dtype(scaled))
+    result["date"] = [candle["date"] for candle in candles]
+
+    for field in CANDLE_FIELDS:
+        result[field] = to_values([candle[field] for candle in candles], scaled)
+
+    return result
+
+
+def trades_to_array(trades, scaled=False):
+    """
+    Converts 'returnTradeHistory' response into the structured array sorted by time. The response for all markets
+    is converted into the dictionary of arrays.
+    """
+    if isinstance(trades, dict):
+        return {currency_pair: trades_to_array(value, scaled) for currency_pair, value in trades.items()}
+
+    result = np.empty(len(trades), dtype=trade_dtype(scaled))
+    result["globalTradeID"] = [trade.get("globalTradeID", 0) for trade in trades]
+    result["tradeID"] = [trade["tradeID"] for trade in trades]
+    result["date"] = np.array([trade["date"] for trade in trades], dtype="datetime64[s]").astype(np.int64)
+    result["type"] = [TRADE_TYPES[trade["type"]] for trade in trades]
+
+    for field in TRADE_FIELDS:
+        result[field] = to_values([trade[field] for trade in trades], scaled)
+
+    # exchange returns the newest trades first
+    return result[np.lexsort((result["tradeID"], result["date"]))]
+
+
+def transforms(scaled=False):
+    """
+    Returns response transforms which switch the public api into the columnar mode, candles and trades are decoded
+    into numpy structured arrays with int64 dates, int8 trade types and float64 or int64 (scaled by 10^8) values:
+
+        PublicApi(..., transforms=columnar.transforms())
+    """
+    require_numpy()
+    return {
+        "returnChartData": partial(candles_to_array, scaled=scaled),
+        "returnTradeHistory": partial(trades_to_array, scaled=scaled),
+    }
+
+
+def _buckets(dates, period):
+    """
+    Returns the start time of every bucket and the indices where the buckets start, dates should be sorted.
+    """
+    buckets = dates // period * period
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]]) if len(buckets) else np.empty(0, np.int64)
+    return buckets[starts], starts
+
+
+def _ends(starts, length):
+    return np.r_[starts[1:] - 1, length - 1] if len(starts) else starts
+
+
+def _ratio(numerator, denominator, scaled):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(denominator != 0, numerator / np.where(denominator != 0, denominator, 1), 0)
+
+    if scaled:
+        return np.rint(ratio * SCALE).astype(np.int64)
+    return ratio
+
+
+def resample(candles, period):
+    """
+    Aggregates candles into candles of the longer period.
+    """
+    dates, starts = _buckets(candles["date"], period)
+    ends = _ends(starts, len(candles))
+    scaled = candles.dtype["open"] == np.int64
+
+    result = np.empty(len(dates), dtype=candles.dtype)
+    result["date"] = dates
+
+    if not len(dates):
+        return result
+
+    result["open"] = candles["open"][starts]
+    result["close"] = candles["close"][ends]
+    result["high"] = np.maximum.reduceat(candles["high"], starts)
+    result["low"] = np.minimum.reduceat(candles["low"], starts)
+    result["volume"] = np.add.reduceat(candles["volume"], starts)
+    result["quoteVolume"] = np.add.reduceat(candles["quoteVolume"], starts)
+    result["weightedAverage"] = _ratio(result["volume"].astype(np.float64),
+                                       result["quoteVolume"].astype(np.float64),
+                                       scaled)
+    return result
+
+
+def vwap(trades, period=None):
+    """
+    Returns the volume weighted average price of the trades, or, if the period is given, the pair of arrays:
+    start times of the buckets and the average price within every bucket.
+    """
+    rate = trades["rate"].astype(np.float64)
+    amount = trades["amount"].astype(np.float64)
+    scaled = trades.dtype["rate"] == np.int64
+
+    if scaled:
+        rate /= SCALE
+        amount /= SCALE
+
+    if period is None:
+        volume = amount.sum()
+        return (rate * amount).sum() / volume if volume else None
+
+    dates, starts = _buckets(trades["date"], period)
+    if not len(dates):
+        return dates, np.empty(0, np.float64)
+
+    return dates, _ratio(np.add.reduceat(rate * amount, starts), np.add.reduceat(amount, starts), False)
+
+
+def ohlc(trades, period):
+    """
+    Builds candles of the given period from the trades, only buckets which have trades are present.
+    """
+    dates, starts = _buckets(trades["date"], period)
+    ends = _ends(starts, len(trades))
+    scaled = trades.dtype["rate"] == np.int64
+
+    result = np.empty(len(dates), dtype=candle_dtype(scaled))
+    result["date"] = dates
+
+    if not len(dates):
+        return result
+
+    rate = trades["rate"]
+    result["open"] = rate[starts]
+    result["close"] = rate[ends]
+    result["high"] = np.maximum.reduceat(rate, starts)
+    result["low"] = np.minimum.reduceat(rate, starts)
+    result["volume"] = np.add.reduceat(trades["total"], starts)
+    result["quoteVolume"] = np.add.reduceat(trades["amount"], starts)
+    result["weightedAverage"] = _ratio(result["volume"].astype(np.float64),
+                                       result["quoteVolume"].astype(np.float64),
+                                       scaled)
+    return result
@@ -2,6 +2,10 @@ __author__ = 'andrey.samokhvalov21@yandex.ru'
 
 CHART_DATA_PERIODS = [300, 900, 1800, 7200, 14400, 86400]
 
+# Backfill fetches chart data by chunks of this number of candles, chunk span in seconds depends on the period
+CHART_DATA_CHUNK_CANDLES = 2016
+CHART_DATA_CHUNKS = {period: period * CHART_DATA_CHUNK_CANDLES for period in CHART_DATA_PERIODS}
+
 # Pulled from var currencyPairArray on https://poloniex.com/exchange
 # Current as of Sun May 7 07:11:23 UTC 2017
 CURRENCY_PAIRS = [
@@ -0,0 +1,54 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+from poloniex.error import PoloniexError
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+def json_loads(body):
+    if isinstance(body, bytes):
+        body = body.decode()
+    return json.loads(body)
+
+
+DECODERS = {"json": json_loads}
+
+if ujson is not None:
+    DECODERS["ujson"] = ujson.loads
+
+if orjson is not None:
+    DECODERS["orjson"] = orjson.loads
+
+# decoder picked by 'fastest', from the fastest to the slowest one; ujson is left out as it may round floats
+# differently from the standard decoder, it is used only when asked for by name
+PREFERENCE = ["orjson", "json"]
+
+
+def get_decoder(decoder=None):
+    """
+    Returns function which decodes the response body (bytes) into python objects. 'decoder' is either the name of the
+    installed decoder, 'fastest' for the fastest installed one which decodes the same as the standard decoder,
+    or the function itself. The standard 'json' decoder is used by default.
+    """
+    if callable(decoder):
+        return decoder
+
+    if decoder is None:
+        decoder = "json"
+    elif decoder == "fastest":
+        decoder = next(name for name in PREFERENCE if name in DECODERS)
+
+    try:
+        return DECODERS[decoder]
+    except KeyError:
+        raise PoloniexError("Decoder '{}' is not available, installed: {}".format(decoder, ", ".join(DECODERS)))
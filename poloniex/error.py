@@ -8,3 +8,6 @@ class AsyncError(PoloniexError): pass
 
 
 class AddressAlreadyExist(PoloniexError): pass
+
+
+class TransientError(PoloniexError): pass
@@ -0,0 +1,208 @@
+import asyncio
+import inspect
+
+from poloniex.logger import getLogger
+
+__author__ = 'andrew.shvv@gmail.com'
+
+ORDER_BOOK_MODIFY = "orderBookModify"
+ORDER_BOOK_REMOVE = "orderBookRemove"
+NEW_TRADE = "newTrade"
+
+logger = getLogger(__name__)
+
+
+class Event:
+    """
+    Base of the compact push api events: attributes are kept in slots, so the event has no dictionary of its own.
+    Every event is the new object, events are not reused as handlers and batches may keep them. Events compare
+    and hash by their fields.
+    """
+    __slots__ = ()
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __reduce__(self):
+        # compact pickle, events are sent between processes by the sharded push api
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, name) == getattr(other, name)
+                                                 for name in self.__slots__)
+
+    def __hash__(self):
+        return hash((type(self),) + tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__,
+                               ", ".join("{}={!r}".format(name, getattr(self, name)) for name in self.__slots__))
+
+
+class Ticker(Event):
+    __slots__ = ("currency_pair", "last", "lowest_ask", "highest_bid", "percent_change", "base_volume",
+                 "quote_volume", "is_frozen", "day_high", "day_low")
+
+    def __init__(self, currency_pair, last, lowest_ask, highest_bid, percent_change, base_volume, quote_volume,
+                 is_frozen, day_high, day_low):
+        self.currency_pair = currency_pair
+        self.last = last
+        self.lowest_ask = lowest_ask
+        self.highest_bid = highest_bid
+        self.percent_change = percent_change
+        self.base_volume = base_volume
+        self.quote_volume = quote_volume
+        self.is_frozen = is_frozen
+        self.day_high = day_high
+        self.day_low = day_low
+
+
+class OrderBookModify(Event):
+    __slots__ = ("currency_pair", "type", "rate", "amount", "seq")
+
+    def __init__(self, currency_pair, type, rate, amount, seq):
+        self.currency_pair = currency_pair
+        self.type = type
+        self.rate = rate
+        self.amount = amount
+        self.seq = seq
+
+
+class OrderBookRemove(Event):
+    __slots__ = ("currency_pair", "type", "rate", "seq")
+
+    def __init__(self, currency_pair, type, rate, seq):
+        self.currency_pair = currency_pair
+        self.type = type
+        self.rate = rate
+        self.seq = seq
+
+
+class Trade(Event):
+    __slots__ = ("currency_pair", "trade_id", "type", "rate", "amount", "total", "date", "seq")
+
+    def __init__(self, currency_pair, trade_id, type, rate, amount, total, date, seq):
+        self.currency_pair = currency_pair
+        self.trade_id = trade_id
+        self.type = type
+        self.rate = rate
+        self.amount = amount
+        self.total = total
+        self.date = date
+        self.seq = seq
+
+
+class TrollboxMessage(Event):
+    __slots__ = ("id", "username", "type", "text", "reputation")
+
+    def __init__(self, id, username, type, text, reputation):
+        self.id = id
+        self.username = username
+        self.type = type
+        self.text = text
+        self.reputation = reputation
+
+
+def market_event(currency_pair, event, seq=None):
+    """
+    Converts the event of the market topic into the typed event, unknown events are returned as is.
+    """
+    type_ = event["type"]
+    data = event["data"]
+
+    if type_ == ORDER_BOOK_MODIFY:
+        return OrderBookModify(currency_pair, data["type"], data["rate"], data["amount"], seq)
+
+    elif type_ == ORDER_BOOK_REMOVE:
+        return OrderBookRemove(currency_pair, data["type"], data["rate"], seq)
+
+    elif type_ == NEW_TRADE:
+        return Trade(currency_pair, data["tradeID"], data["type"], data["rate"], data["amount"], data["total"],
+                     data["date"], seq)
+
+    return event
+
+
+def message_events(topic, data, seq=None):
+    """
+    Converts the push api message into the list of typed events, messages of the topics without the typed events
+    are returned as the single event.
+    """
+    if topic == "ticker":
+        return [Ticker(*data[:10])]
+
+    elif topic == "trollbox":
+        if len(data) != 5:
+            return []
+        type_, message_id, username, text, reputation = data
+        return [TrollboxMessage(message_id, username, type_, text, reputation)]
+
+    elif "_" in topic:
+        return [market_event(topic, event, seq) for event in data]
+
+    return [data]
+
+
+class EventBatcher:
+    """
+    Accumulates events of one or many topics and calls the handler with the dictionary: topic -> list of events,
+    once 'max_size' events are collected or 'max_latency' seconds passed since the first event of the batch.
+    Bigger batches cost less per event, but the first event of the batch waits longer for the delivery.
+    Errors of the handler are raised by 'extend' and 'flush', the error of the flush made by the timer is logged
+    and counted in 'handler_errors', its batch is dropped.
+    """
+
+    def __init__(self, handler, max_size=100, max_latency=0.05, loop=None):
+        self.handler = handler
+        self.handler_is_async = inspect.iscoroutinefunction(handler) or inspect.isgeneratorfunction(handler)
+        self.max_size = max_size
+        self.max_latency = max_latency
+        self.loop = loop or asyncio.get_event_loop()
+
+        self.batch = {}
+        self.size = 0
+        self._timer = None
+
+        self.handler_errors = 0
+
+    async def extend(self, topic, events):
+        if not events:
+            return
+
+        self.batch.setdefault(topic, []).extend(events)
+        self.size += len(events)
+
+        if self.size >= self.max_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(self.max_latency, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        asyncio.ensure_future(self._timed_flush(), loop=self.loop)
+
+    async def _timed_flush(self):
+        # nobody awaits this flush, so its error would be reported only as the never retrieved one
+        size = self.size
+        try:
+            await self.flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.handler_errors += 1
+            logger.exception("Handler failed, batch of {} events is dropped".format(size))
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self.size:
+            return
+
+        batch, self.batch, self.size = self.batch, {}, 0
+
+        if self.handler_is_async:
+            await self.handler(batch)
+        else:
+            self.handler(batch)
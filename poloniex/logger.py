@@ -1,19 +1,113 @@
-import inspect
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import sys
 from functools import wraps
 
 import pp
 
 __author__ = 'andrew.shvv@gmail.com'
 
+PRETTY_FORMAT = '\nLevel: %(levelname)s - %(name)s - %(message)s'
 
-def get_prev_method_name():
-    return inspect.stack()[2][3]
+LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "exception": logging.ERROR,
+}
+
+# attributes of the plain log record, others are the 'extra' fields
+RECORD_ATTRIBUTES = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "func"}
+
+settings = {"structured": False, "level": None}
+
+# name -> logger created by 'getLogger'
+_loggers = {}
+_handler = None
+_listener = None
+
+
+def get_prev_method_name(depth=2):
+    """
+    Name of the function which called the caller, frame lookup is much cheaper than 'inspect.stack'.
+    """
+    return sys._getframe(depth).f_code.co_name
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats the record as the single line json object with the 'extra' fields of the record.
+    """
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": getattr(record, "func", record.funcName),
+            "message": record.getMessage(),
+        }
+
+        for name, value in record.__dict__.items():
+            if name not in RECORD_ATTRIBUTES:
+                data[name] = value
+
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+
+        return json.dumps(data, default=str)
+
+
+_exception_formatter = logging.Formatter()
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues the copy of the record with the message and the traceback rendered to text, but unlike 'QueueHandler'
+    doesn't format the record itself: the formatter of the listener gets the 'extra' fields and the exception
+    of the record as if it was handled directly.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
 
 
 def pretty_wrapper(func):
+    """
+    Wraps the logging method of the logger: nothing is formatted unless the level is enabled, then the message is
+    either pretty printed with the caller name or, in the structured mode, passed as is with the caller name in the
+    'func' field.
+    """
+    logger = func.__self__
+    level = LEVELS[func.__name__]
+
     @wraps(func)
     def decorator(msg, *args, **kwargs):
+        if not logger.isEnabledFor(level):
+            return
+
+        if settings["structured"]:
+            extra = kwargs.setdefault("extra", {})
+            extra.setdefault("func", get_prev_method_name())
+            func(msg, *args, **kwargs)
+            return
+
         pretty_msg = "Func:  %s\n" % get_prev_method_name()
 
         if type(msg) == str:
@@ -35,23 +129,68 @@ def wrap_logger(logger):
     return logger
 
 
-def getLogger(name, level=logging.DEBUG):
-    # create logger
-    logger = logging.getLogger(name)
-    logger = wrap_logger(logger)
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure(structured=False, use_queue=False, level=None):
+    """
+    Sets up the handler shared by the library loggers: pretty or structured (json lines) output, written either
+    directly or, with 'use_queue', by the background thread, so logging never blocks the event loop on the stream.
+    'level' is set to the existing loggers and to the loggers created later.
+    """
+    global _handler, _listener
+
+    _stop_listener()
 
-    # create console handler and set level to debug
-    ch = logging.StreamHandler()
+    stream = logging.StreamHandler()
+    stream.setFormatter(StructuredFormatter() if structured else logging.Formatter(PRETTY_FORMAT))
 
-    # create formatter
-    formatter = logging.Formatter('\nLevel: %(levelname)s - %(name)s - %(message)s')
+    if use_queue:
+        records = queue.Queue(-1)
+        handler = RecordQueueHandler(records)
+        _listener = logging.handlers.QueueListener(records, stream)
+        _listener.start()
+    else:
+        handler = stream
+
+    for logger in _loggers.values():
+        if _handler is not None:
+            logger.removeHandler(_handler)
+        logger.addHandler(handler)
+
+        if level is not None:
+            logger.setLevel(level)
+
+    settings["structured"] = structured
+    settings["level"] = level
+    _handler = handler
+
+
+atexit.register(_stop_listener)
+
+
+def getLogger(name, level=None):
+    """
+    Returns the wrapped library logger. The level of 'configure' takes precedence, otherwise 'level' is set,
+    also to the logger which already exists. Without either the logger follows the level of the root logger.
+    """
+    logger = logging.getLogger(name)
 
-    # add formatter to ch
-    ch.setFormatter(formatter)
+    # the logger is wrapped and gets the handler once, however many times it is requested
+    if name not in _loggers:
+        if _handler is None:
+            configure()
 
-    # add ch to logger
-    logger.addHandler(ch)
+        wrap_logger(logger)
+        logger.addHandler(_handler)
+        logger.setLevel(settings["level"] or level or logging.NOTSET)
+        _loggers[name] = logger
 
-    logger.setLevel(level)
+    elif level is not None and settings["level"] is None:
+        logger.setLevel(level)
 
     return logger
@@ -0,0 +1,245 @@
+import asyncio
+import time
+from bisect import bisect_left
+
+from aiohttp import web
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# seconds spent by the api call in the stage: 'wait' (scheduler), 'sign', 'network', 'decode', 'handler', 'total'
+REQUEST_SECONDS = "poloniex_request_seconds"
+ERRORS = "poloniex_errors_total"
+
+PUSH_EVENTS = "poloniex_push_events_total"
+PUSH_HANDLER_SECONDS = "poloniex_push_handler_seconds"
+PUSH_QUEUE_LAG = "poloniex_push_queue_lag_seconds"
+PUSH_QUEUE_DEPTH = "poloniex_push_queue_depth"
+PUSH_QUEUE_DROPS = "poloniex_push_queue_drops"
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+now = time.perf_counter
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket the quantile falls into.
+        """
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Timer:
+    """
+    Records the time since the previous lap as the stage of the api call.
+    """
+    __slots__ = ("metrics", "command", "started", "last")
+
+    def __init__(self, metrics, command):
+        self.metrics = metrics
+        self.command = command
+        self.started = self.last = now()
+
+    def lap(self, stage):
+        moment = now()
+        self.metrics.stage(self.command, stage, moment - self.last)
+        self.last = moment
+
+    def restart(self):
+        """
+        Starts the next stage now, the time since the previous lap is not recorded.
+        """
+        self.last = now()
+
+    def total(self):
+        self.metrics.stage(self.command, "total", now() - self.started)
+
+
+def timed_handler(metrics, topic, handler):
+    """
+    Wraps the push api handler to count the events of the topic and record the time they are handled.
+    """
+
+    async def decorator(args, **kwargs):
+        started = now()
+        try:
+            await handler(args, **kwargs)
+        finally:
+            metrics.event(topic, now() - started)
+
+    return decorator
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, value) for name, value in labels) + "}"
+
+
+class MetricsRegistry:
+    """
+    Latency histograms, counters and gauges of the library. Apis record into the registry only when it is given,
+    otherwise the hot paths pay a single attribute check:
+
+        metrics = MetricsRegistry()
+        PublicApi(session, metrics=metrics)
+        await metrics.start_server(port=9100)        # prometheus text at /metrics
+        asyncio.ensure_future(metrics.run(print, 10))   # or the snapshot every 10 seconds
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+
+        # (name, labels) -> value
+        self.histograms = {}
+        self.counters = {}
+        self.collectors = []
+
+        self.runner = None
+        self._last_counters = {}
+        self._last_collect = now()
+
+    # recording
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def timer(self, command):
+        return Timer(self, command)
+
+    def stage(self, command, stage, seconds):
+        self.observe(REQUEST_SECONDS, seconds, command=command, stage=stage)
+
+    def error(self, command, error):
+        self.inc(ERRORS, command=command, type=type(error).__name__)
+
+    def event(self, topic, seconds):
+        self.inc(PUSH_EVENTS, topic=topic)
+        self.observe(PUSH_HANDLER_SECONDS, seconds, topic=topic)
+
+    def add_collector(self, collector):
+        """
+        'collector' is called on every export and returns the list of gauges: (name, labels dictionary, value).
+        """
+        self.collectors.append(collector)
+
+    # export
+
+    def gauges(self):
+        gauges = {}
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                gauges[(name, tuple(sorted(labels.items())))] = value
+        return gauges
+
+    def collect(self):
+        """
+        Returns the snapshot of all metrics, counters are given with the rate per second since the previous collect.
+        """
+        collected = now()
+        elapsed = collected - self._last_collect
+
+        counters = {}
+        for key, value in self.counters.items():
+            previous = self._last_counters.get(key, 0)
+            counters[key] = {"total": value, "rate": (value - previous) / elapsed if elapsed else 0}
+
+        self._last_counters = dict(self.counters)
+        self._last_collect = collected
+
+        return {
+            "histograms": {key: histogram.snapshot() for key, histogram in self.histograms.items()},
+            "counters": counters,
+            "gauges": self.gauges(),
+        }
+
+    def prometheus(self):
+        """
+        Returns all metrics in the prometheus text format, each metric family is preceded by its '# TYPE' line.
+        """
+        lines = []
+        families = set()
+
+        def family(name, type_):
+            if name not in families:
+                families.add(name)
+                lines.append("# TYPE {} {}".format(name, type_))
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            family(name, "histogram")
+            total = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                total += count
+                lines.append("{}_bucket{} {}".format(name, format_labels(labels + (("le", bound),)), total))
+            lines.append("{}_bucket{} {}".format(name, format_labels(labels + (("le", "+Inf"),)), histogram.count))
+            lines.append("{}_sum{} {}".format(name, format_labels(labels), histogram.sum))
+            lines.append("{}_count{} {}".format(name, format_labels(labels), histogram.count))
+
+        for (name, labels), value in sorted(self.counters.items()):
+            family(name, "counter")
+            lines.append("{}{} {}".format(name, format_labels(labels), value))
+
+        for (name, labels), value in sorted(self.gauges().items()):
+            family(name, "gauge")
+            lines.append("{}{} {}".format(name, format_labels(labels), value))
+
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request):
+        return web.Response(text=self.prometheus(), content_type="text/plain")
+
+    async def start_server(self, host="127.0.0.1", port=9100, path="/metrics"):
+        app = web.Application()
+        app.router.add_get(path, self.handle)
+
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+
+    async def stop_server(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def run(self, callback, interval=10):
+        """
+        Calls 'callback' with the snapshot every 'interval' seconds till cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            callback(self.collect())
@@ -0,0 +1,72 @@
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from poloniex.error import PoloniexError
+
+__author__ = 'andrew.shvv@gmail.com'
+
+COUNTER = struct.Struct("<Q")
+
+
+def now():
+    return int(time.time() * 1000)
+
+
+class Nonce:
+    """
+    Strictly increasing nonce which follows the millisecond clock, but never repeats the previous value: calls made
+    within the same millisecond get the consecutive numbers. Safe to use from many threads and coroutines.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = 0
+
+    def next(self):
+        with self._lock:
+            self._last = max(now(), self._last + 1)
+            return self._last
+
+
+class FileNonce(Nonce):
+    """
+    Nonce shared by all processes using the same api key. The last issued value is kept in the memory mapped
+    counter file, which is locked exclusively while the next value is taken.
+    """
+
+    def __init__(self, path):
+        if fcntl is None:
+            raise PoloniexError("FileNonce requires 'fcntl', which is not available on this platform")
+
+        super().__init__()
+        self.path = path
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < COUNTER.size:
+            os.ftruncate(self._fd, COUNTER.size)
+
+        self._counter = mmap.mmap(self._fd, COUNTER.size)
+
+    def next(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                last, = COUNTER.unpack_from(self._counter)
+                value = max(now(), last + 1)
+                COUNTER.pack_into(self._counter, 0, value)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+            return value
+
+    def close(self):
+        self._counter.close()
+        os.close(self._fd)
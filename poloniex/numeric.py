@@ -0,0 +1,152 @@
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from poloniex.error import PoloniexError
+
+__author__ = 'andrew.shvv@gmail.com'
+
+FIXED = "fixed"
+DECIMAL = "decimal"
+
+# prices and amounts are given with 8 fraction digits, fixed point values are integers of 10^-8 (satoshi)
+DIGITS = 8
+SCALE = 10 ** DIGITS
+
+# columns of this size and longer are parsed in one pass
+BATCH_SIZE = 64
+
+TICKER_FIELDS = ("last", "lowestAsk", "highestBid", "percentChange", "baseVolume", "quoteVolume", "high24hr", "low24hr")
+ORDER_FIELDS = ("rate", "amount", "total", "startingAmount")
+TRADE_FIELDS = ("rate", "amount", "total", "fee")
+
+
+def to_fixed(value):
+    """
+    Converts the decimal string (or the json number) into the integer number of 10^-8 units without the precision loss,
+    values with more than 8 fraction digits are rounded half to even.
+    """
+    if type(value) is float:
+        value = repr(value)
+    elif type(value) is not str:
+        return int((Decimal(value) * SCALE).to_integral_value())
+
+    i = value.find(".")
+    if i >= 0 and len(value) - i == DIGITS + 1:
+        return int(value[:i] + value[i + 1:])
+
+    return int((Decimal(value) * SCALE).to_integral_value())
+
+
+def to_decimal(value):
+    # floats go through the shortest repr, so that 0.1 is not turned into its binary approximation
+    if type(value) is float:
+        value = repr(value)
+    return Decimal(value)
+
+
+def fixed_column(values):
+    """
+    Converts the list of decimal strings into fixed point values. Long columns, where every value has exactly 8 fraction
+    digits, are converted in one pass over the joined string, others value by value. Columns of json numbers are
+    formatted with 8 fraction digits first, which is exact for numbers of up to 15 significant digits.
+    """
+    if np is not None and len(values) >= BATCH_SIZE:
+        try:
+            if type(values[0]) is str:
+                joined = " ".join(values)
+            else:
+                joined = " ".join(map("{:.8f}".format, values))
+        except (TypeError, ValueError):
+            joined = None
+
+        if joined is not None:
+            chars = np.frombuffer(joined.encode(), dtype=np.uint8)
+            dots = np.flatnonzero(chars == ord("."))
+            ends = np.r_[np.flatnonzero(chars == ord(" ")), len(chars)]
+
+            if len(dots) == len(values) and (ends - dots == DIGITS + 1).all():
+                return list(map(int, joined.replace(".", "").split(" ")))
+
+    return list(map(to_fixed, values))
+
+
+def decimal_column(values):
+    return list(map(to_decimal, values))
+
+
+class NumericDecoder:
+    """
+    Converts prices and amounts of the responses from strings into exact numbers once per payload: either fixed point
+    integers ('fixed' mode) or 'decimal.Decimal' ('decimal' mode). The original response is not modified.
+
+        PublicApi(..., transforms=NumericDecoder("fixed").transforms())
+    """
+
+    def __init__(self, mode=FIXED):
+        if mode == FIXED:
+            self.column = fixed_column
+        elif mode == DECIMAL:
+            self.column = decimal_column
+        else:
+            raise PoloniexError("Unknown numeric mode '{}'".format(mode))
+
+        self.mode = mode
+
+    def records(self, records, fields):
+        records = [dict(record) for record in records]
+        if not records:
+            return records
+
+        for field in fields:
+            if field not in records[0]:
+                continue
+
+            for record, value in zip(records, self.column([record[field] for record in records])):
+                record[field] = value
+
+        return records
+
+    def levels(self, levels):
+        prices = self.column([price for price, _ in levels])
+        amounts = self.column([amount for _, amount in levels])
+        return list(zip(prices, amounts))
+
+    def _per_market(self, response, convert):
+        if isinstance(response, dict):
+            return {currency_pair: convert(value) for currency_pair, value in response.items()}
+        return convert(response)
+
+    def ticker(self, response):
+        pairs = list(response)
+        tickers = self.records([response[pair] for pair in pairs], TICKER_FIELDS)
+        return dict(zip(pairs, tickers))
+
+    def order_book(self, response):
+        if "asks" not in response:
+            return {currency_pair: self.order_book(book) for currency_pair, book in response.items()}
+
+        book = dict(response)
+        book["asks"] = self.levels(response["asks"])
+        book["bids"] = self.levels(response["bids"])
+        return book
+
+    def open_orders(self, response):
+        return self._per_market(response, lambda orders: self.records(orders, ORDER_FIELDS))
+
+    def trade_history(self, response):
+        return self._per_market(response, lambda trades: self.records(trades, TRADE_FIELDS))
+
+    def transforms(self):
+        """
+        Returns response transforms for both public and trading apis.
+        """
+        return {
+            "returnTicker": self.ticker,
+            "returnOrderBook": self.order_book,
+            "returnOpenOrders": self.open_orders,
+            "returnTradeHistory": self.trade_history,
+        }
@@ -0,0 +1,423 @@
+import asyncio
+from bisect import bisect_left
+
+from poloniex.error import PoloniexError
+from poloniex.logger import getLogger
+
+__author__ = 'andrew.shvv@gmail.com'
+
+logger = getLogger(__name__)
+
+BID = "bid"
+ASK = "ask"
+
+ORDER_BOOK_MODIFY = "orderBookModify"
+ORDER_BOOK_REMOVE = "orderBookRemove"
+
+
+def parse_number(number, value):
+    """
+    Converts the price or amount, given as the string or the number, with 'number'. Floats are converted through
+    their shortest repr, so that 'decimal.Decimal' gets 0.1 rather than its binary approximation.
+    """
+    if type(value) is float:
+        value = repr(value)
+    return number(value)
+
+
+class BookSide:
+    """
+    Price levels of one side of the order book. Levels are kept in the pair of arrays sorted by the key, so that
+    the best level is always the last one: the key is the price for the bids and the negated price for the asks.
+    Updates near the top of the book, which are the most frequent ones, shift only the tail of the arrays.
+    """
+
+    def __init__(self, reverse=False):
+        self.reverse = reverse
+        self.keys = []
+        self.amounts = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _price(self, key):
+        return -key if self.reverse else key
+
+    def clear(self):
+        self.keys = []
+        self.amounts = []
+
+    def load(self, levels):
+        levels = sorted(levels, key=lambda level: -level[0] if self.reverse else level[0])
+        self.keys = [-price if self.reverse else price for price, _ in levels]
+        self.amounts = [amount for _, amount in levels]
+
+    def update(self, price, amount):
+        """
+        Sets the amount of the price level, the level is removed if the amount is zero.
+        """
+        keys = self.keys
+        key = -price if self.reverse else price
+        i = bisect_left(keys, key)
+
+        if i < len(keys) and keys[i] == key:
+            if amount:
+                self.amounts[i] = amount
+            else:
+                del keys[i]
+                del self.amounts[i]
+
+        elif amount:
+            keys.insert(i, key)
+            self.amounts.insert(i, amount)
+
+    def remove(self, price):
+        self.update(price, 0)
+
+    def best(self):
+        if not self.keys:
+            return None
+        return self._price(self.keys[-1]), self.amounts[-1]
+
+    def depth(self, n):
+        """
+        Returns up to 'n' best levels as the list of (price, amount), the best level goes first.
+        """
+        keys = self.keys[-n:] if n else []
+        amounts = self.amounts[-n:] if n else []
+        return [(self._price(key), amount) for key, amount in zip(reversed(keys), reversed(amounts))]
+
+    def vwap(self, size):
+        """
+        Returns the volume weighted average price of taking 'size' from this side of the book,
+        None if the book is not deep enough.
+        """
+        remaining = size
+        cost = 0
+
+        for i in range(len(self.keys) - 1, -1, -1):
+            amount = self.amounts[i]
+            price = self._price(self.keys[i])
+
+            if amount >= remaining:
+                cost += price * remaining
+                return cost / size
+
+            cost += price * amount
+            remaining -= amount
+
+        return None
+
+
+class OrderBook:
+    """
+    Local copy of the order book of one market which is seeded from the 'returnOrderBook' snapshot and updated with the
+    push api deltas. 'number' is used to parse prices and amounts, e.g. 'float' or 'decimal.Decimal'.
+    """
+
+    def __init__(self, currency_pair, number=float):
+        self.currency_pair = currency_pair
+        self.number = number
+
+        self.bids = BookSide()
+        self.asks = BookSide(reverse=True)
+        self.seq = None
+        self.is_frozen = False
+
+    def _parse(self, value):
+        return parse_number(self.number, value)
+
+    def side(self, type_):
+        if type_ == BID:
+            return self.bids
+        elif type_ == ASK:
+            return self.asks
+        else:
+            raise PoloniexError("Unknown order book side '{}'".format(type_))
+
+    def load(self, snapshot):
+        parse = self._parse
+        self.bids.load([(parse(price), parse(amount)) for price, amount in snapshot["bids"]])
+        self.asks.load([(parse(price), parse(amount)) for price, amount in snapshot["asks"]])
+        self.is_frozen = snapshot.get("isFrozen") not in (None, "0", 0)
+        self.seq = snapshot.get("seq")
+
+    def apply(self, events, seq=None):
+        """
+        Applies push api events of one message. Events other than order book modifications (e.g. 'newTrade')
+        are ignored, the book is changed only by the modify and remove events.
+        """
+        parse = self._parse
+
+        for event in events:
+            type_ = event["type"]
+            if type_ == ORDER_BOOK_MODIFY:
+                data = event["data"]
+                self.side(data["type"]).update(parse(data["rate"]), parse(data["amount"]))
+
+            elif type_ == ORDER_BOOK_REMOVE:
+                data = event["data"]
+                self.side(data["type"]).remove(parse(data["rate"]))
+
+        if seq is not None:
+            self.seq = seq
+
+    @property
+    def best_bid(self):
+        return self.bids.best()
+
+    @property
+    def best_ask(self):
+        return self.asks.best()
+
+    def depth(self, n):
+        return {
+            "bids": self.bids.depth(n),
+            "asks": self.asks.depth(n)
+        }
+
+    def vwap(self, side, size):
+        """
+        Returns the average price of buying ('ask' side) or selling ('bid' side) of 'size' at market.
+        """
+        return self.side(side).vwap(size)
+
+
+def compact(levels):
+    """
+    [[price, amount], ...] -> (prices, amounts): raw values of the snapshot side kept in two tuples.
+    """
+    if not levels:
+        return (), ()
+    prices, amounts = zip(*levels)
+    return prices, amounts
+
+
+def level_changes(old, new, parse):
+    """
+    Levels of the new side which are not in the old one or have another amount, and the removed levels with
+    the zero amount. Raw values are compared, only the changed levels are parsed.
+    """
+    old_prices, old_amounts = old
+    new_prices, new_amounts = new
+
+    if old_prices == new_prices and old_amounts == new_amounts:
+        return []
+
+    previous = dict(zip(old_prices, old_amounts))
+    changes = []
+
+    for price, amount in zip(new_prices, new_amounts):
+        if previous.pop(price, None) != amount:
+            changes.append((parse(price), parse(amount)))
+
+    for price in previous:
+        changes.append((parse(price), parse("0")))
+
+    return changes
+
+
+class BookChange:
+    __slots__ = ("currency_pair", "seq", "is_frozen", "bids", "asks", "removed")
+
+    def __init__(self, currency_pair, seq, is_frozen, bids, asks, removed=False):
+        self.currency_pair = currency_pair
+        self.seq = seq
+        self.removed = removed
+        self.is_frozen = is_frozen
+        self.bids = bids
+        self.asks = asks
+
+    def __repr__(self):
+        return "BookChange({}, seq={}, bids={}, asks={})".format(self.currency_pair, self.seq,
+                                                                  len(self.bids), len(self.asks))
+
+
+class SnapshotDiffer:
+    """
+    Compares the consecutive 'returnOrderBook(currency_pair="all")' snapshots: markets with the same 'seq' are
+    skipped without looking at their levels, others are compared level by level. Only the changed markets are
+    returned, each with the changed levels as (price, amount), the amount is zero for the levels which are gone
+    (or moved beyond the depth of the snapshot). The first snapshot returns all levels of every non-empty market.
+    The market which is gone from the snapshot is returned with 'removed' set and all its levels with zero amount.
+
+        differ = SnapshotDiffer()
+        for change in differ.diff(await public.returnOrderBook(currency_pair="all")):
+            book = books[change.currency_pair]
+            for price, amount in change.bids:
+                book.bids.update(price, amount)
+    """
+
+    def __init__(self, number=float):
+        self.number = number
+
+        # currency pair -> (seq, is frozen, compact bids, compact asks)
+        self.books = {}
+
+        self.snapshots = 0
+        self.skipped = 0
+        self.changed = 0
+
+    def _parse(self, value):
+        return parse_number(self.number, value)
+
+    def diff(self, snapshot):
+        self.snapshots += 1
+        parse = self._parse
+        books = self.books
+        changes = []
+        empty = ((), ())
+
+        for currency_pair, book in snapshot.items():
+            seq = book.get("seq")
+            previous = books.get(currency_pair)
+
+            if previous is not None and seq is not None and previous[0] == seq:
+                self.skipped += 1
+                continue
+
+            is_frozen = book.get("isFrozen") not in (None, "0", 0)
+            bids = compact(book["bids"])
+            asks = compact(book["asks"])
+            books[currency_pair] = (seq, is_frozen, bids, asks)
+
+            if previous is None:
+                previous = (None, is_frozen, empty, empty)
+
+            bid_changes = level_changes(previous[2], bids, parse)
+            ask_changes = level_changes(previous[3], asks, parse)
+
+            if bid_changes or ask_changes or is_frozen != previous[1]:
+                self.changed += 1
+                changes.append(BookChange(currency_pair, seq, is_frozen, bid_changes, ask_changes))
+
+        # markets which are gone from the snapshot have all their levels removed
+        for currency_pair in set(books).difference(snapshot):
+            seq, is_frozen, bids, asks = books.pop(currency_pair)
+            bid_changes = level_changes(bids, empty, parse)
+            ask_changes = level_changes(asks, empty, parse)
+
+            self.changed += 1
+            changes.append(BookChange(currency_pair, seq, is_frozen, bid_changes, ask_changes, removed=True))
+
+        return changes
+
+    async def run(self, public, handler, interval=1, depth=50):
+        """
+        Polls the snapshot of all markets every 'interval' seconds till cancelled, 'handler' is called with the list
+        of changes whenever there are any.
+        """
+        while True:
+            try:
+                snapshot = await public.returnOrderBook(currency_pair="all", depth=depth)
+            except asyncio.CancelledError:
+                raise
+            except PoloniexError:
+                logger.exception("Unable to take the order book snapshot")
+            else:
+                changes = self.diff(snapshot)
+                if changes:
+                    result = handler(changes)
+                    if asyncio.iscoroutine(result):
+                        await result
+
+            await asyncio.sleep(interval)
+
+
+class OrderBookEngine:
+    """
+    Keeps the order book of one market in sync with the exchange: subscribes to the market topic, takes the snapshot
+    with the public api, and applies the deltas in the sequence order. Deltas received while the snapshot is being
+    fetched are buffered, whenever the gap in the sequence numbers is found or the push api reconnects the book is
+    taken again.
+    """
+
+    def __init__(self, currency_pair, public, push, depth=1000, number=float, on_update=None, retry_delay=1):
+        self.currency_pair = currency_pair
+        self.public = public
+        self.push = push
+        self.depth = depth
+        self.on_update = on_update
+        self.retry_delay = retry_delay
+
+        self.book = OrderBook(currency_pair, number=number)
+        self.synced = False
+        self.pending = []
+        self.resyncs = 0
+        self._resync_task = None
+
+    def start(self):
+        self.push.wamp.subscribe(topic=self.currency_pair, handler=self.on_push, on_resync=self.resync)
+        self.resync()
+
+    def resync(self):
+        """
+        Schedules fetching of the new snapshot, deltas are buffered till it is loaded.
+        """
+        self.synced = False
+        self.pending = []
+
+        if self._resync_task is None or self._resync_task.done():
+            self._resync_task = asyncio.ensure_future(self._resync())
+        return self._resync_task
+
+    async def _resync(self):
+        while not self.synced:
+            self.resyncs += 1
+
+            try:
+                snapshot = await self.public.returnOrderBook(currency_pair=self.currency_pair, depth=self.depth)
+            except PoloniexError:
+                logger.exception("Unable to take '{}' order book snapshot".format(self.currency_pair))
+                await asyncio.sleep(self.retry_delay)
+                continue
+
+            self.book.load(snapshot)
+
+            # the deltas without the sequence number can't be ordered, they are applied in the arrival order
+            pending, self.pending = self.pending, []
+            if all(seq is not None for seq, _ in pending):
+                pending.sort(key=lambda item: item[0])
+            self.synced = True
+
+            for seq, events in pending:
+                if not self._apply(seq, events):
+                    logger.warning("Sequence gap in '{}' after snapshot, resync".format(self.currency_pair))
+                    self.synced = False
+                    self.pending = []
+                    break
+
+        if self.on_update:
+            self.on_update(self.book)
+
+    def _apply(self, seq, events):
+        """
+        Applies the deltas if they are next in the sequence, returns False on the gap.
+        """
+        if seq is None or self.book.seq is None:
+            self.book.apply(events, seq)
+            return True
+
+        if seq <= self.book.seq:
+            return True
+
+        if seq != self.book.seq + 1:
+            return False
+
+        self.book.apply(events, seq)
+        return True
+
+    async def on_push(self, data, seq=None, **kwargs):
+        if not self.synced:
+            self.pending.append((seq, data))
+            return
+
+        if not self._apply(seq, data):
+            logger.warning("Sequence gap in '{}': expected {}, got {}".format(self.currency_pair,
+                                                                               self.book.seq + 1,
+                                                                               seq))
+            self.resync()
+            return
+
+        if self.on_update:
+            self.on_update(self.book)
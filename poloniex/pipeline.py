@@ -0,0 +1,174 @@
+import asyncio
+from collections import OrderedDict
+
+from poloniex.error import PoloniexError
+from poloniex.logger import getLogger
+
+__author__ = 'andrew.shvv@gmail.com'
+
+CANCEL = "cancel"
+BUY = "buy"
+SELL = "sell"
+
+# requests signed concurrently might reach the exchange out of the nonce order, such requests are sent again
+NONCE_ERROR = "Nonce must be greater"
+
+logger = getLogger(__name__)
+
+
+class Intent:
+    __slots__ = ("kind", "currency_pair", "order_number", "rate", "amount")
+
+    def __init__(self, kind, currency_pair, order_number=None, rate=None, amount=None):
+        self.kind = kind
+        self.currency_pair = currency_pair
+        self.order_number = order_number
+        self.rate = rate
+        self.amount = amount
+
+    def __repr__(self):
+        if self.kind == CANCEL:
+            return "Intent(cancel {} {})".format(self.currency_pair, self.order_number)
+        return "Intent({} {} {}@{})".format(self.kind, self.currency_pair, self.amount, self.rate)
+
+
+def cancel(currency_pair, order_number):
+    return Intent(CANCEL, currency_pair, order_number=order_number)
+
+
+def buy(currency_pair, rate, amount):
+    return Intent(BUY, currency_pair, rate=rate, amount=amount)
+
+
+def sell(currency_pair, rate, amount):
+    return Intent(SELL, currency_pair, rate=rate, amount=amount)
+
+
+class OrderResult:
+    __slots__ = ("intent", "response", "error", "attempts")
+
+    def __init__(self, intent, response=None, error=None, attempts=0):
+        self.intent = intent
+        self.response = response
+        self.error = error
+        self.attempts = attempts
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return "OrderResult({!r}, {})".format(self.intent, self.response if self.ok else repr(self.error))
+
+
+class OrderBatch:
+    """
+    Asynchronous iterator over results of the batch in the order of completion, see 'OrderPipeline.submit'.
+    """
+
+    def __init__(self, pipeline, intents):
+        self.pipeline = pipeline
+        self.remaining = len(intents)
+        self.results = asyncio.Queue()
+
+        pairs = OrderedDict()
+        for intent in intents:
+            pairs.setdefault(intent.currency_pair, []).append(intent)
+
+        self.tasks = [asyncio.ensure_future(self._run_pair(pair_intents)) for pair_intents in pairs.values()]
+
+    async def _run_pair(self, intents):
+        cancels = [intent for intent in intents if intent.kind == CANCEL]
+        places = [intent for intent in intents if intent.kind != CANCEL]
+
+        results = await asyncio.gather(*[self._execute(intent) for intent in cancels])
+
+        if self.pipeline.strict and not all(result.ok for result in results):
+            for intent in places:
+                self.results.put_nowait(OrderResult(intent, error=PoloniexError("Not placed, cancel failed")))
+            return
+
+        await asyncio.gather(*[self._execute(intent) for intent in places])
+
+    async def _execute(self, intent):
+        result = await self.pipeline.execute(intent)
+        self.results.put_nowait(result)
+        return result
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.remaining:
+            raise StopAsyncIteration
+
+        self.remaining -= 1
+        return await self.results.get()
+
+    async def gather(self):
+        """
+        Waits for the whole batch, returns results in the order of completion.
+        """
+        results = []
+        while self.remaining:
+            results.append(await self.__anext__())
+        return results
+
+    def cancel(self):
+        for task in self.tasks:
+            task.cancel()
+
+
+class OrderPipeline:
+    """
+    Runs batches of cancel and place intents of the async trading api concurrently. Within the market all cancels are
+    done before any new order is placed (cancel-then-replace), markets don't wait for each other. Requests go through
+    the scheduler of the trading api, so rate limits are kept, no more than 'concurrency' requests are in flight.
+    With 'strict' orders of the market are not placed if any of its cancels failed.
+
+        pipeline = OrderPipeline(trading)
+        async for result in pipeline.submit([cancel("BTC_ETH", 123), buy("BTC_ETH", "0.01", "1")]):
+            ...
+    """
+
+    def __init__(self, trading, concurrency=10, retries=3, strict=True):
+        self.trading = trading
+        self.concurrency = concurrency
+        self.retries = retries
+        self.strict = strict
+        self._semaphore = None
+
+    def submit(self, intents):
+        return OrderBatch(self, list(intents))
+
+    def call(self, intent):
+        if intent.kind == CANCEL:
+            return self.trading.cancelOrder(order_number=intent.order_number)
+        elif intent.kind == BUY:
+            return self.trading.buy(currency_pair=intent.currency_pair, rate=intent.rate, amount=intent.amount)
+        elif intent.kind == SELL:
+            return self.trading.sell(currency_pair=intent.currency_pair, rate=intent.rate, amount=intent.amount)
+
+        raise PoloniexError("Unknown order intent '{}'".format(intent.kind))
+
+    async def execute(self, intent):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        attempts = 0
+        async with self._semaphore:
+            while True:
+                attempts += 1
+                try:
+                    response = await self.call(intent)
+                except PoloniexError as e:
+                    if NONCE_ERROR in str(e) and attempts <= self.retries:
+                        logger.warning("Nonce error on {!r}, retry".format(intent))
+                        continue
+                    return OrderResult(intent, error=e, attempts=attempts)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    return OrderResult(intent, error=e, attempts=attempts)
+
+                return OrderResult(intent, response=response, attempts=attempts)
@@ -0,0 +1,237 @@
+import asyncio
+import gzip
+import itertools
+import json
+import threading
+import time
+
+from aiohttp import web
+
+from poloniex.logger import getLogger
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# kinds of the records: received and sent websocket frames, public api responses
+FRAME_IN = "in"
+FRAME_OUT = "out"
+RESPONSE = "get"
+
+HELLO, WELCOME, SUBSCRIBE, SUBSCRIBED, EVENT = 1, 2, 32, 33, 36
+
+# seconds without the new subscription after which the playback starts, so that events of no topic are skipped
+SUBSCRIBE_SETTLE = 0.1
+
+logger = getLogger(__name__)
+
+
+def param_value(value):
+    # timestamps are sent either as integers or as floats
+    value = str(value)
+    return value[:-2] if value.endswith(".0") else value
+
+
+def params_key(params):
+    return tuple(sorted((name, param_value(value)) for name, value in (params or {}).items() if value is not None))
+
+
+def load(path):
+    """
+    Yields records of the recording: [seconds since the start, kind, *data].
+    """
+    with gzip.open(path, "rt") as recording:
+        for line in recording:
+            yield json.loads(line)
+
+
+class Recorder:
+    """
+    Writes websocket frames of the push api and responses of the public api with their time into the gzipped file,
+    one json array per line, to be played back by 'ReplayServer':
+
+        recorder = Recorder("session.jsonl.gz")
+        PushApi(session, recorder=recorder)
+        PublicApi(session, recorder=recorder)
+    """
+
+    def __init__(self, path, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.started = clock()
+        self.file = gzip.open(path, "wt")
+        self.lock = threading.Lock()
+        self.records = 0
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(",", ":"))
+        with self.lock:
+            self.file.write(line)
+            self.file.write("\n")
+            self.records += 1
+
+    def _now(self):
+        return round(self.clock() - self.started, 6)
+
+    def frame(self, data, outgoing=False):
+        self._write([self._now(), FRAME_OUT if outgoing else FRAME_IN, data])
+
+    def response(self, params, status, body):
+        if isinstance(body, bytes):
+            body = body.decode()
+        self._write([self._now(), RESPONSE, {name: value for name, value in (params or {}).items()
+                                             if value is not None}, status, body])
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ReplayServer:
+    """
+    Local stand-in of the exchange which plays the recording back: the minimal WAMP router sends the recorded events
+    of the subscribed topics with the recorded timing divided by 'speed' (as fast as possible if 'speed' is 0), and
+    the public api answers with the recorded responses of the same parameters in turn.
+
+        server = ReplayServer("session.jsonl.gz", speed=10)
+        await server.start()
+        PushApi(session, url=server.ws_url)
+        PublicApi(session).url = server.public_url
+    """
+
+    def __init__(self, path, speed=1, host="127.0.0.1", port=0, settle=SUBSCRIBE_SETTLE):
+        self.speed = speed
+        self.settle = settle
+        self.host = host
+        self.port = port
+        self.runner = None
+
+        # topic -> recorded subscription id
+        self.topics = {}
+        # (time, subscription id, frame)
+        self.events = []
+        # params key -> cycle of (status, body)
+        self.responses = {}
+
+        self._load(path)
+
+    def _load(self, path):
+        requests = {}
+        responses = {}
+
+        for record in load(path):
+            kind = record[1]
+
+            if kind == RESPONSE:
+                _, _, params, status, body = record
+                responses.setdefault(params_key(params), []).append((status, body))
+                continue
+
+            raw = json.loads(record[2])
+
+            if kind == FRAME_OUT and raw[0] == SUBSCRIBE:
+                requests[raw[1]] = raw[3]
+            elif kind == FRAME_IN and raw[0] == SUBSCRIBED and raw[1] in requests:
+                self.topics[requests[raw[1]]] = raw[2]
+            elif kind == FRAME_IN and raw[0] == EVENT:
+                self.events.append((record[0], raw[1], record[2]))
+
+        self.responses = {key: itertools.cycle(values) for key, values in responses.items()}
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/", self.handle_push)
+        app.router.add_get("/public", self.handle_public)
+
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    @property
+    def ws_url(self):
+        return "ws://{}:{}/".format(self.host, self.port)
+
+    @property
+    def public_url(self):
+        return "http://{}:{}/public?".format(self.host, self.port)
+
+    async def handle_public(self, request):
+        responses = self.responses.get(params_key(request.query))
+        if responses is None:
+            return web.json_response({"error": "Response is not recorded"})
+
+        status, body = next(responses)
+        return web.Response(status=status, text=body, content_type="application/json")
+
+    async def handle_push(self, request):
+        ws = web.WebSocketResponse(protocols=("wamp.2.json",))
+        await ws.prepare(request)
+
+        subscribed = set()
+        playback = None
+        pending = None
+
+        def start_playback():
+            nonlocal playback
+            playback = asyncio.ensure_future(self.play(ws, subscribed))
+
+        async for msg in ws:
+            data = json.loads(msg.data)
+
+            if data[0] == HELLO:
+                await ws.send_str(json.dumps([WELCOME, 1, {"roles": {"broker": {}}}]))
+
+            elif data[0] == SUBSCRIBE:
+                request_id, topic = data[1], data[3]
+                subscription = self.topics.get(topic)
+
+                if subscription is None:
+                    logger.warning("Topic '{}' is not recorded".format(topic))
+                    subscription = len(self.topics) + 1
+                    self.topics[topic] = subscription
+
+                subscribed.add(subscription)
+                await ws.send_str(json.dumps([SUBSCRIBED, request_id, subscription]))
+
+                # the playback which has not started yet waits for the rest of the subscriptions
+                if playback is None:
+                    if pending is not None:
+                        pending.cancel()
+                    pending = asyncio.get_event_loop().call_later(self.settle, start_playback)
+
+        if pending is not None:
+            pending.cancel()
+        if playback is not None:
+            playback.cancel()
+        return ws
+
+    async def play(self, ws, subscribed):
+        if not self.events:
+            return
+
+        first = self.events[0][0]
+        started = time.monotonic()
+
+        for i, (at, subscription, frame) in enumerate(self.events):
+            if subscription not in subscribed:
+                continue
+
+            if self.speed:
+                delay = (at - first) / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif not i % 100:
+                await asyncio.sleep(0)
+
+            await ws.send_str(frame)
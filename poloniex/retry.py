@@ -0,0 +1,192 @@
+import asyncio
+import random
+import time
+from collections import deque
+
+from poloniex.error import TransientError
+from poloniex.logger import getLogger
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# commands which change the account state are never sent twice, whatever their names are
+NOT_IDEMPOTENT = frozenset(["buy", "sell", "withdraw", "cancelOrder", "moveOrder", "generateNewAddress"])
+
+logger = getLogger(__name__)
+
+
+def is_idempotent(command):
+    return command.startswith("return") and command not in NOT_IDEMPOTENT
+
+
+class RetryPolicy:
+    """
+    Resilience of the idempotent ('return*') commands: failed attempts are repeated after the exponentially
+    growing delay with the jitter, no attempt is started after the deadline of the command. With 'hedge' the async
+    api sends the second request if the first one is slower than the 'hedge_quantile' of the recent latencies of
+    the command and takes whichever answer comes first, the hedged request goes past the response cache. Only errors
+    given by the api as transient are retried: 5xx and 429 responses, connection errors and timeouts.
+
+        policy = RetryPolicy(retries=2, deadlines={"returnChartData": 30}, hedge=True)
+        PublicApi(session, retry=policy)
+    """
+
+    def __init__(self,
+                 retries=2,
+                 backoff=0.1,
+                 max_backoff=2,
+                 deadline=None,
+                 deadlines=None,
+                 hedge=False,
+                 hedge_quantile=0.95,
+                 hedge_samples=20,
+                 commands=None,
+                 clock=time.monotonic):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.deadlines = deadlines or {}
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_samples = hedge_samples
+        self.commands = commands
+        self.clock = clock
+
+        # command -> recent latencies of the successful attempts
+        self.latencies = {}
+
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def handles(self, command):
+        if not is_idempotent(command):
+            return False
+        return self.commands is None or command in self.commands
+
+    def delay(self, attempt):
+        backoff = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(backoff / 2, backoff)
+
+    def expires(self, command):
+        deadline = self.deadlines.get(command, self.deadline)
+        if deadline is None:
+            return None
+        return self.clock() + deadline
+
+    def record(self, command, seconds):
+        latencies = self.latencies.get(command)
+        if latencies is None:
+            latencies = self.latencies[command] = deque(maxlen=100)
+        latencies.append(seconds)
+
+    def hedge_delay(self, command):
+        """
+        Seconds after which the hedged request is sent, None till there are enough latencies of the command.
+        """
+        latencies = self.latencies.get(command)
+        if not self.hedge or latencies is None or len(latencies) < self.hedge_samples:
+            return None
+
+        latencies = sorted(latencies)
+        return latencies[min(len(latencies) - 1, int(self.hedge_quantile * len(latencies)))]
+
+    def _next_delay(self, command, attempt, expires, error):
+        """
+        Delay before the next attempt, the error is raised again if there should be none.
+        """
+        if attempt >= self.retries:
+            raise error
+
+        delay = self.delay(attempt)
+        if expires is not None and self.clock() + delay >= expires:
+            raise TransientError("Deadline of '{}' exceeded: {}".format(command, error)) from error
+
+        self.retried += 1
+        logger.warning("Attempt {} of '{}' failed: {!r}, retry in {:.2f} seconds".format(attempt + 1, command,
+                                                                                      error, delay))
+        return delay
+
+    def call(self, command, send, errors):
+        """
+        Calls 'send' of the sync api till it succeeds, there is no hedging of the sync calls. 'send' is given the
+        seconds left till the deadline (None without one) to use them as the timeout of the request.
+        """
+        expires = self.expires(command)
+        attempt = 0
+
+        while True:
+            started = self.clock()
+            timeout = None
+            if expires is not None:
+                timeout = expires - started
+                if timeout <= 0:
+                    raise TransientError("Deadline of '{}' exceeded".format(command))
+
+            try:
+                response = send(timeout)
+            except errors as e:
+                time.sleep(self._next_delay(command, attempt, expires, e))
+                attempt += 1
+                continue
+
+            self.record(command, self.clock() - started)
+            return response
+
+    async def call_async(self, command, send, errors):
+        """
+        Awaits 'send' of the async api till it succeeds, every attempt is cancelled at the deadline. 'send' is given
+        whether the attempt is the hedged one.
+        """
+        expires = self.expires(command)
+        attempt = 0
+
+        while True:
+            started = self.clock()
+            try:
+                if expires is None:
+                    response = await self._hedged(command, send)
+                else:
+                    response = await asyncio.wait_for(self._hedged(command, send), max(0, expires - started))
+            except asyncio.TimeoutError as e:
+                if expires is not None and self.clock() >= expires:
+                    raise TransientError("Deadline of '{}' exceeded".format(command)) from e
+                await asyncio.sleep(self._next_delay(command, attempt, expires, e))
+                attempt += 1
+                continue
+            except errors as e:
+                await asyncio.sleep(self._next_delay(command, attempt, expires, e))
+                attempt += 1
+                continue
+
+            self.record(command, self.clock() - started)
+            return response
+
+    async def _hedged(self, command, send):
+        delay = self.hedge_delay(command)
+        if delay is None:
+            return await send(False)
+
+        first = asyncio.ensure_future(send(False))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedged += 1
+                tasks.add(asyncio.ensure_future(send(True)))
+
+            # the first successful answer is taken, the error is raised only if both requests failed
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
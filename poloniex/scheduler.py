@@ -0,0 +1,178 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# Poloniex allows 6 calls per second per IP/key
+DEFAULT_RATE = 6
+
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+LANES = {
+    HIGH: "high",
+    NORMAL: "normal",
+    LOW: "low",
+}
+
+PRIORITIES = {
+    "cancelOrder": HIGH,
+    "buy": HIGH,
+    "sell": HIGH,
+    "returnChartData": LOW,
+    "returnTradeHistory": LOW,
+    "returnDepositsWithdrawals": LOW,
+}
+
+
+class TokenBucket:
+    def __init__(self, rate=DEFAULT_RATE, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.clock = clock
+
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """
+        Returns the time till the next token is available, zero if it is available now.
+        """
+        self._refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class Scheduler:
+    """
+    Paces api calls with the token bucket shared by all apis of the application. Calls waiting for the token are served
+    in the priority lane order: orders placement and cancellation go ahead of the history backfills.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=None, priorities=None):
+        self.bucket = TokenBucket(rate=rate, capacity=capacity)
+        self.priorities = priorities if priorities is not None else PRIORITIES
+
+        self._waiters = []
+        self._counter = itertools.count()
+
+        self.calls = 0
+        self.waits = 0
+        self.wait_time = 0
+        self.max_wait_time = 0
+
+    def priority(self, command):
+        return self.priorities.get(command, NORMAL)
+
+    def _record(self, waited):
+        self.calls += 1
+        if waited:
+            self.waits += 1
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+
+    @property
+    def queue_depth(self):
+        depth = {name: 0 for name in LANES.values()}
+        for priority, _, _ in self._waiters:
+            depth[LANES.get(priority, LANES[NORMAL])] += 1
+        return depth
+
+    def metrics(self):
+        return {
+            "calls": self.calls,
+            "waits": self.waits,
+            "wait_time": self.wait_time,
+            "max_wait_time": self.max_wait_time,
+            "avg_wait_time": self.wait_time / self.waits if self.waits else 0,
+            "queue_depth": self.queue_depth,
+        }
+
+
+class SyncScheduler(Scheduler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._condition = threading.Condition()
+
+    def acquire(self, command):
+        """
+        Blocks the calling thread till the call is allowed.
+        """
+        started = time.monotonic()
+        blocked = False
+
+        with self._condition:
+            entry = (self.priority(command), next(self._counter), None)
+            heapq.heappush(self._waiters, entry)
+
+            while True:
+                timeout = None
+
+                if self._waiters[0] is entry:
+                    if self.bucket.consume():
+                        heapq.heappop(self._waiters)
+                        self._condition.notify_all()
+                        break
+
+                    timeout = self.bucket.delay()
+
+                blocked = True
+                self._condition.wait(timeout)
+
+        self._record(time.monotonic() - started if blocked else 0)
+
+
+class AsyncScheduler(Scheduler):
+    def __init__(self, *args, loop=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop = loop or asyncio.get_event_loop()
+        self._pump = None
+
+    async def acquire(self, command):
+        """
+        Waits till the call is allowed.
+        """
+        if not self._waiters and self.bucket.consume():
+            self._record(0)
+            return
+
+        started = self.loop.time()
+        future = self.loop.create_future()
+        heapq.heappush(self._waiters, (self.priority(command), next(self._counter), future))
+
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.ensure_future(self._release(), loop=self.loop)
+
+        await future
+        self._record(self.loop.time() - started)
+
+    async def _release(self):
+        while self._waiters:
+            delay = self.bucket.delay()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+
+            _, _, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+
+            self.bucket.consume()
+            future.set_result(None)
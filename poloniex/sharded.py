@@ -0,0 +1,277 @@
+import asyncio
+import functools
+import inspect
+import multiprocessing
+
+import aiohttp
+
+from poloniex import constants
+from poloniex.api.async import PushApi, batch_wrapper, topic_wrapper
+from poloniex.error import PoloniexError
+from poloniex.events import EventBatcher
+from poloniex.logger import getLogger
+from poloniex.wamp.dispatch import TopicQueue
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# messages of the pipe between the shard and the coordinator
+EVENTS = "events"
+RESYNC = "resync"
+SUBSCRIBE = "subscribe"
+STOP = "stop"
+
+logger = getLogger(__name__)
+
+
+def run_shard(url, conn, max_size, max_latency):
+    """
+    Entry point of the shard process: subscribes to the topics it receives from the coordinator with its own
+    connection and sends batches of the events back, till it receives the stop message or the coordinator is gone.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        loop.run_until_complete(serve_shard(url, conn, max_size, max_latency))
+    finally:
+        conn.close()
+        loop.close()
+
+
+async def serve_shard(url, conn, max_size, max_latency):
+    loop = asyncio.get_event_loop()
+
+    async with aiohttp.ClientSession() as session:
+        push = PushApi(session, url=url)
+        batcher = EventBatcher(lambda batch: conn.send((EVENTS, batch)), max_size=max_size, max_latency=max_latency)
+
+        def on_control():
+            while conn.poll():
+                try:
+                    kind, payload = conn.recv()
+                except EOFError:
+                    kind = STOP
+
+                if kind == SUBSCRIBE:
+                    topic, typed = payload
+                    handler = batch_wrapper(topic, batcher) if typed else arguments_wrapper(topic, batcher)
+                    push.wamp.subscribe(topic=topic,
+                                        handler=handler,
+                                        on_resync=functools.partial(conn.send, (RESYNC, topic)))
+                elif kind == STOP:
+                    loop.remove_reader(conn.fileno())
+                    asyncio.ensure_future(push.stop())
+                    return
+
+        loop.add_reader(conn.fileno(), on_control)
+
+        await push.start()
+        await batcher.flush()
+
+
+def arguments_wrapper(topic, batcher):
+    """
+    Batches the arguments the handlers of the topic are called with by 'PushApi.subscribe' without 'typed',
+    as (args, kwargs) of every call.
+    """
+    calls = []
+
+    def collect(*args, **kwargs):
+        calls.append((args, kwargs))
+
+    wrapped = topic_wrapper(topic, collect)
+
+    async def decorator(data, **kwargs):
+        result = wrapped(data, **kwargs)
+        if asyncio.iscoroutine(result):
+            await result
+
+        batch = calls[:]
+        del calls[:]
+        await batcher.extend(topic, batch)
+
+    return decorator
+
+
+def events_wrapper(handler, typed):
+    handler_is_async = inspect.iscoroutinefunction(handler) or inspect.isgeneratorfunction(handler)
+
+    async def decorator(event):
+        if typed:
+            result = handler(event)
+        else:
+            args, kwargs = event
+            result = handler(*args, **kwargs)
+
+        if handler_is_async:
+            await result
+
+    return decorator
+
+
+class ShardedPushApi:
+    """
+    Push api which spreads the topics over 'shards' processes, each with its own connection, so parsing of the messages
+    uses more than one core. Shards send batches of the events over pipes, the coordinator calls handlers in its own
+    event loop with the same arguments as 'PushApi' does: the event fields as keyword arguments, or with 'typed' the
+    single event object (see 'poloniex.events'), which is cheaper to send.
+
+        push = ShardedPushApi(shards=4)
+        push.subscribe("BTC_ETH", handler, typed=True, policy="block")
+        await push.start()
+    """
+    url = PushApi.url
+
+    def __init__(self, shards=None, url=None, max_size=100, max_latency=0.01):
+        self.shards = shards or multiprocessing.cpu_count()
+        self.url = url or self.url
+        self.max_size = max_size
+        self.max_latency = max_latency
+
+        # topic -> (shard, handler, queue, on_resync, typed)
+        self.subscriptions = {}
+        self.processes = []
+        self.connections = []
+        self.need_stop = False
+        self.handler_errors = 0
+
+    @property
+    def is_subscribed(self):
+        return len(self.subscriptions) != 0
+
+    def subscribe(self, topic, handler, typed=False, on_resync=None, policy=None, maxsize=1000):
+        """
+        Arguments are the same as of the 'PushApi.subscribe', topics are spread over the shards in turn.
+        """
+        if topic not in constants.AVAILABLE_SUBSCRIPTIONS:
+            raise NotImplementedError("Topic not available")
+
+        shard = len(self.subscriptions) % self.shards
+        handler = events_wrapper(handler, typed)
+        queue = TopicQueue(topic, handler, maxsize=maxsize, policy=policy) if policy else None
+        self.subscriptions[topic] = (shard, handler, queue, on_resync, typed)
+
+        if self.connections:
+            self.connections[shard].send((SUBSCRIBE, (topic, typed)))
+
+    async def start(self):
+        if self.need_stop:
+            return
+
+        context = multiprocessing.get_context("spawn")
+
+        for _ in range(self.shards):
+            conn, child_conn = context.Pipe()
+            process = context.Process(target=run_shard,
+                                      args=(self.url, child_conn, self.max_size, self.max_latency),
+                                      daemon=True)
+            process.start()
+            child_conn.close()
+
+            self.processes.append(process)
+            self.connections.append(conn)
+
+        for topic, (shard, _, _, _, typed) in self.subscriptions.items():
+            self.connections[shard].send((SUBSCRIBE, (topic, typed)))
+
+        try:
+            await asyncio.gather(*[self._pump(conn) for conn in self.connections])
+        finally:
+            # shards stop once their pipes are closed, they are waited for without blocking the loop
+            for conn in self.connections:
+                conn.close()
+
+            loop = asyncio.get_event_loop()
+            for process in self.processes:
+                await loop.run_in_executor(None, process.join)
+
+            for queue in self.queues():
+                queue.close()
+
+    async def _readable(self, conn):
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        loop.add_reader(conn.fileno(), future.set_result, None)
+
+        try:
+            await future
+        finally:
+            loop.remove_reader(conn.fileno())
+
+    async def _pump(self, conn):
+        """
+        Dispatches messages of the shard, the pipe is not read while handlers or blocking queues are busy.
+        """
+        while True:
+            if not conn.poll():
+                await self._readable(conn)
+
+            try:
+                kind, payload = conn.recv()
+            except EOFError:
+                break
+
+            if kind == EVENTS:
+                await self._dispatch(payload)
+            elif kind == RESYNC:
+                await self._resync(payload)
+
+        conn.close()
+
+    async def _dispatch(self, batch):
+        """
+        Calls handlers with the batch of events: topic -> list of events. The failure of the handler is limited to
+        its event, the other events and topics go on.
+        """
+        for topic, events in batch.items():
+            _, handler, queue, _, _ = self.subscriptions[topic]
+
+            for event in events:
+                if queue is not None:
+                    try:
+                        await queue.put(event, {})
+                    except PoloniexError:
+                        # the queue is closed on stop, the rest of the batch is dropped
+                        break
+                    continue
+
+                try:
+                    await handler(event)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    self.handler_errors += 1
+                    logger.exception("Handler of '{}' failed".format(topic))
+
+    async def _resync(self, topic):
+        on_resync = self.subscriptions[topic][3]
+        if on_resync is None:
+            return
+
+        try:
+            result = on_resync()
+            if asyncio.iscoroutine(result):
+                await result
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.handler_errors += 1
+            logger.exception("Resync handler of '{}' failed".format(topic))
+
+    async def stop(self, force=True):
+        if not force and self.is_subscribed:
+            return
+
+        self.need_stop = True
+
+        for conn in self.connections:
+            try:
+                conn.send((STOP, None))
+            except OSError:
+                pass
+
+    def queues(self):
+        return [queue for _, _, queue, _, _ in self.subscriptions.values() if queue is not None]
+
+    def metrics(self):
+        return {queue.topic: queue.metrics() for queue in self.queues()}
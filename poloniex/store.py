@@ -0,0 +1,332 @@
+import calendar
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# public trade history returns no more than this number of trades per call
+TRADE_HISTORY_LIMIT = 50000
+
+# recent trades might still be appended by the exchange, such range is not marked as stored
+TRADE_HISTORY_DELAY = 60
+
+CANDLE_FIELDS = ("high", "low", "open", "close", "volume", "quoteVolume", "weightedAverage")
+TRADE_TYPES = ["buy", "sell"]
+
+# date, fields
+CANDLE = struct.Struct("<q7d")
+
+# globalTradeID, tradeID, date, type, rate, amount, total
+TRADE = struct.Struct("<qqqb7xddd")
+
+
+def parse_date(value):
+    return calendar.timegm(time.strptime(value, "%Y-%m-%d %H:%M:%S"))
+
+
+def format_date(value):
+    return datetime.utcfromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def format_number(value):
+    return "{:.8f}".format(value)
+
+
+class CandleFormat:
+    record = CANDLE
+    limit = None
+
+    def __init__(self, period):
+        self.period = period
+        self.delay = period
+
+    def pack(self, candle):
+        return CANDLE.pack(candle["date"], *[float(candle[field]) for field in CANDLE_FIELDS])
+
+    def unpack(self, values):
+        candle = {"date": values[0]}
+        candle.update(zip(CANDLE_FIELDS, values[1:]))
+        return candle
+
+    def key(self, values):
+        return values[0]
+
+    def date(self, values):
+        return values[0]
+
+    def item_date(self, candle):
+        return candle["date"]
+
+    def sort(self, items):
+        # chart data goes in time order
+        return sorted(items, key=lambda values: values[0])
+
+
+class TradeFormat:
+    record = TRADE
+    limit = TRADE_HISTORY_LIMIT
+    delay = TRADE_HISTORY_DELAY
+
+    def pack(self, trade):
+        return TRADE.pack(trade.get("globalTradeID", 0),
+                          trade["tradeID"],
+                          parse_date(trade["date"]),
+                          TRADE_TYPES.index(trade["type"]),
+                          float(trade["rate"]),
+                          float(trade["amount"]),
+                          float(trade["total"]))
+
+    def unpack(self, values):
+        global_trade_id, trade_id, date, type_, rate, amount, total = values
+        return {
+            "globalTradeID": global_trade_id,
+            "tradeID": trade_id,
+            "date": format_date(date),
+            "type": TRADE_TYPES[type_],
+            "rate": format_number(rate),
+            "amount": format_number(amount),
+            "total": format_number(total)
+        }
+
+    def key(self, values):
+        return values[1]
+
+    def date(self, values):
+        return values[2]
+
+    def item_date(self, trade):
+        return parse_date(trade["date"])
+
+    def sort(self, items):
+        # trade history goes from the newest trade to the oldest
+        return sorted(items, key=lambda values: (values[2], values[1]), reverse=True)
+
+
+class Series:
+    """
+    Append-only file of the fixed size records of one market and period, and the index of stored segments: time range
+    which was fetched, position of its records in the file, and the time it was stored. Segments might overlap, records
+    of the later segment win. The data file might be memory mapped as is, e.g. with 'numpy.memmap'.
+    """
+
+    def __init__(self, path, format_):
+        self.path = path
+        self.format = format_
+        self.index_path = path + ".idx"
+        self.data_path = path + ".dat"
+
+        self.segments = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as index:
+                self.segments = json.load(index)["segments"]
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as index:
+            json.dump({"segments": self.segments}, index)
+        os.replace(tmp_path, self.index_path)
+
+    @property
+    def size(self):
+        return sum(segment[3] for segment in self.segments) * self.format.record.size
+
+    def missing(self, start, end):
+        """
+        Returns the list of the [start, end] sub ranges which are not covered by the stored segments.
+        """
+        missing = []
+        for segment_start, segment_end, _, _, _ in sorted(self.segments):
+            if segment_end < start:
+                continue
+            if segment_start > end:
+                break
+            if segment_start > start:
+                missing.append((start, segment_start - 1))
+            start = max(start, segment_end + 1)
+
+        if start <= end:
+            missing.append((start, end))
+        return missing
+
+    def append(self, items, start, end):
+        payload = b"".join(self.format.pack(item) for item in items)
+
+        with open(self.data_path, "ab") as data:
+            offset = data.tell() // self.format.record.size
+            data.write(payload)
+
+        self.segments.append([start, end, offset, len(items), time.time()])
+        self._save_index()
+
+    def read(self, start, end):
+        """
+        Returns stored records of the range as the dictionary: record key -> unpacked record values.
+        """
+        record = self.format.record
+        date = self.format.date
+        key = self.format.key
+        items = {}
+
+        if not self.segments or not os.path.getsize(self.data_path):
+            return items
+
+        with open(self.data_path, "rb") as data:
+            with mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                for segment_start, segment_end, offset, count, _ in self.segments:
+                    if segment_end < start or segment_start > end or not count:
+                        continue
+
+                    chunk = view[offset * record.size:(offset + count) * record.size]
+                    for values in record.iter_unpack(chunk):
+                        if start <= date(values) <= end:
+                            items[key(values)] = values
+
+        return items
+
+    def evict(self, retention=None, max_bytes=None):
+        """
+        Drops segments which ended before the retention period and, while the series is bigger than 'max_bytes',
+        the segments with the oldest data. The data file is compacted if anything was dropped.
+        """
+        segments = self.segments
+
+        if retention is not None:
+            horizon = time.time() - retention
+            segments = [segment for segment in segments if segment[1] >= horizon]
+
+        if max_bytes is not None:
+            segments = sorted(segments, key=lambda segment: segment[1])
+            size = sum(segment[3] for segment in segments) * self.format.record.size
+            while segments and size > max_bytes:
+                size -= segments.pop(0)[3] * self.format.record.size
+
+        if len(segments) != len(self.segments):
+            self._compact(segments)
+
+    def _compact(self, segments):
+        record_size = self.format.record.size
+        compacted = []
+        tmp_path = self.data_path + ".tmp"
+
+        with open(self.data_path, "rb") as source, open(tmp_path, "wb") as target:
+            for segment in sorted(segments, key=lambda segment: segment[2]):
+                start, end, offset, count, stored = segment
+                source.seek(offset * record_size)
+                compacted.append([start, end, target.tell() // record_size, count, stored])
+                target.write(source.read(count * record_size))
+
+        os.replace(tmp_path, self.data_path)
+        self.segments = compacted
+        self._save_index()
+
+
+class HistoryStore:
+    """
+    Local cache of the chart data and the public trade history, only the ranges which are not stored yet are requested
+    from the exchange:
+
+        PublicApi(..., store=HistoryStore("~/.poloniex"))
+    """
+
+    commands = ("returnChartData", "returnTradeHistory")
+
+    def __init__(self, path, retention=None, max_bytes=None):
+        self.path = os.path.expanduser(path)
+        self.retention = retention
+        self.max_bytes = max_bytes
+        self.series = {}
+
+        os.makedirs(self.path, exist_ok=True)
+
+    def handles(self, params):
+        return (params is not None and
+                params.get("command") in self.commands and
+                params.get("start") is not None and
+                params.get("end") is not None and
+                params.get("currencyPair") not in (None, "all"))
+
+    def _series(self, params):
+        if params["command"] == "returnChartData":
+            name = "{}_{}".format(params["currencyPair"], params["period"])
+            format_ = CandleFormat(params["period"])
+        else:
+            name = "{}_trades".format(params["currencyPair"])
+            format_ = TradeFormat()
+
+        if name not in self.series:
+            self.series[name] = Series(os.path.join(self.path, name), format_)
+        return self.series[name]
+
+    def plan(self, params):
+        """
+        Generator which yields params of the requests needed to complete the range, receives their responses,
+        and returns the records of the whole range. Data newer than the format delay is always requested and
+        is never stored, the exchange might still change it.
+        """
+        series = self._series(params)
+        format_ = series.format
+        start = int(params["start"])
+        end = int(params["end"])
+        horizon = int(time.time()) - format_.delay
+
+        ranges = series.missing(start, min(end, horizon))
+        if end > horizon:
+            ranges.append((max(start, horizon + 1), end))
+
+        recent = []
+
+        for missing_start, missing_end in ranges:
+            while missing_start <= missing_end:
+                response = yield dict(params, start=missing_start, end=missing_end)
+
+                if isinstance(response, dict):
+                    # error is left for the response handler
+                    return response
+
+                items = [item for item in response if item["date"]]
+                covered_start = missing_start
+
+                if format_.limit and len(items) >= format_.limit:
+                    covered_start = min(format_.item_date(item) for item in items)
+
+                stored = [item for item in items if format_.item_date(item) <= horizon]
+                recent.extend(item for item in items if format_.item_date(item) > horizon)
+
+                covered_end = min(missing_end, horizon)
+                if covered_start <= covered_end:
+                    series.append(stored, covered_start, covered_end)
+
+                if covered_start <= missing_start or covered_start >= missing_end:
+                    break
+                missing_end = covered_start
+
+        series.evict(self.retention, self.max_bytes)
+
+        items = series.read(start, end)
+        for item in recent:
+            values = format_.record.unpack(format_.pack(item))
+            items[format_.key(values)] = values
+
+        return [format_.unpack(values) for values in format_.sort(items.values())]
+
+    def query(self, params, fetch):
+        plan = self.plan(params)
+        try:
+            request = next(plan)
+            while True:
+                request = plan.send(fetch(request))
+        except StopIteration as stop:
+            return stop.value
+
+    async def query_async(self, params, fetch):
+        plan = self.plan(params)
+        try:
+            request = next(plan)
+            while True:
+                request = plan.send(await fetch(request))
+        except StopIteration as stop:
+            return stop.value
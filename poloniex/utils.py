@@ -1,22 +1,30 @@
+from datetime import datetime, timedelta
+
 __author__ = 'andrew.shvv@gmail.com'
 
 
-class switch(object):
-    def __init__(self, value):
-        self.value = value
-        self.fall = False
+def split_range(start, end, size):
+    """
+    Splits [start, end] datetime range into the consecutive chunks of 'size' seconds, chunk ends are inclusive
+    with the precision of one second.
+    """
+    end = end or datetime.now()
+    step = timedelta(seconds=size)
+    second = timedelta(seconds=1)
+
+    while start <= end:
+        chunk_end = min(start + step - second, end)
+        yield start, chunk_end
+        start += step
+
 
-    def __iter__(self):
-        """Return the match method once, then stop"""
-        yield self.match
-        raise StopIteration
+def fresh_candles(candles, last):
+    """
+    Skips the placeholder candle which is returned for the empty range and candles
+    which were already seen at the chunk boundary.
+    """
+    for candle in candles:
+        date = candle["date"]
+        if date and (last is None or date > last):
+            yield candle
 
-    def match(self, *args):
-        """Indicate whether or not to enter a case suite"""
-        if self.fall or not args:
-            return True
-        elif self.value in args:  # changed for v1.5, see below
-            self.fall = True
-            return True
-        else:
-            return False
@@ -1,22 +1,55 @@
+import asyncio
 import random
 
+import aiohttp
+# selects the asyncio framework of txaio, autobahn messages are created with it
+import autobahn.asyncio  # noqa
 from autobahn.wamp import message
+from autobahn.wamp.exception import ProtocolError
 from autobahn.wamp.role import DEFAULT_CLIENT_ROLES
 from autobahn.wamp.serializer import JsonSerializer
 
+from poloniex.decoder import get_decoder
+from poloniex import metrics
+from poloniex.error import PoloniexError
 from poloniex.logger import getLogger
+from poloniex.wamp.dispatch import TopicQueue
 
 __author__ = 'andrew.shvv@gmail.com'
 
 
+# errors after which the connection is established again
+CONNECTION_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, OSError)
+
+# seconds between the websocket pings, the connection is closed if the pong is not received in time
+HEARTBEAT = 30
+
+EVENT = message.Event.MESSAGE_TYPE
+
+
 class WAMPClient():
+    """
+    Subscribes to the topics of the WAMP router. Whenever the connection is lost or can't be established the client
+    reconnects after the exponentially growing delay with the random jitter, and subscribes to every topic again.
+    Messages published while the client was disconnected are lost, so each replayed subscription gets the resync signal,
+    so does the subscription whose 'seq' numbers show the gap. The router closing the session (ABORT, GOODBYE),
+    the malformed frame, or the missed pong of the 'heartbeat' ping are handled as the lost connection.
+    """
+
     def __init__(self,
                  url,
                  session,
                  roles=DEFAULT_CLIENT_ROLES,
                  realm='realm1',
                  protocols=('wamp.2.json',),
-                 serializer=JsonSerializer()):
+                 serializer=JsonSerializer(),
+                 reconnect=True,
+                 min_delay=1,
+                 max_delay=60,
+                 heartbeat=HEARTBEAT,
+                 decoder=None,
+                 recorder=None,
+                 metrics=None):
 
         super().__init__()
 
@@ -26,19 +59,38 @@ class WAMPClient():
         self.realm = realm
         self.roles = roles
         self.serializer = serializer
+        self.loads = get_decoder(decoder)
+        self.recorder = recorder
+        # 'metrics' method returns the queue metrics, the registry they are exported to is kept as 'registry'
+        self.registry = metrics
+        self.reconnect = reconnect
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.heartbeat = heartbeat
         self.ws = None
         self.need_stop = False
         self.connected = False
+        self.reconnects = 0
+        self.gaps = 0
+        self.handler_errors = 0
+        self._attempt = 0
+        self._stopping = asyncio.Event()
         self.handlers = {
             message.Welcome.MESSAGE_TYPE: self._on_welcome,
             message.Subscribed.MESSAGE_TYPE: self._on_subscribed,
             message.Event.MESSAGE_TYPE: self._on_event,
+            message.Error.MESSAGE_TYPE: self._on_error,
+            message.Abort.MESSAGE_TYPE: self._on_close,
+            message.Goodbye.MESSAGE_TYPE: self._on_close,
         }
 
         self.queue = {}
         self.subscriptions = {}
         self.logger = getLogger(__name__)
 
+        if self.registry is not None:
+            self.registry.add_collector(self.gauges)
+
     def get_handler(self, message_type):
         handler = self.handlers.get(message_type)
         if handler is None:
@@ -51,6 +103,7 @@ class WAMPClient():
 
     async def _on_welcome(self, msg):
         self.connected = True
+        self._attempt = 0
 
         for request_id, subscription in self.queue.items():
             topic = subscription['topic']
@@ -58,11 +111,43 @@ class WAMPClient():
             self.send(subscribe)
 
     async def _on_event(self, event):
-        subscription_id = event.subscription
-        subscription = self.subscriptions[subscription_id]
+        await self._dispatch(event.subscription, event.args, event.kwargs or {})
 
-        handler = subscription['handler']
-        await handler(event.args)
+    async def _dispatch(self, subscription_id, args, kwargs):
+        subscription = self.subscriptions.get(subscription_id)
+        if subscription is None:
+            self.logger.warning("Event of the unknown subscription {} from '{}'".format(subscription_id, self.url))
+            return
+
+        seq = kwargs.get('seq')
+
+        if seq is not None:
+            last = subscription.get('seq')
+            subscription['seq'] = seq
+
+            if last is not None and seq > last + 1:
+                self.gaps += 1
+                self.logger.warning("Sequence gap in '{}': expected {}, got {}".format(subscription['topic'],
+                                                                                       last + 1, seq))
+                await self._resync(subscription)
+
+        queue = subscription['queue']
+        if queue is not None:
+            try:
+                await queue.put(args, kwargs)
+            except PoloniexError:
+                # the queue is closed by 'stop', the message is dropped
+                self.logger.debug("Message of '{}' dropped, the queue is closed".format(subscription['topic']))
+            return
+
+        # the failure of the handler is limited to its message, the stream goes on
+        try:
+            await subscription['handler'](args, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.handler_errors += 1
+            self.logger.exception("Handler of '{}' failed".format(subscription['topic']))
 
     async def _on_subscribed(self, msg):
         request_id = msg.request
@@ -72,48 +157,208 @@ class WAMPClient():
         subscription['request_id'] = request_id
         self.subscriptions[subscription_id] = subscription
 
+        if subscription.pop('replayed', False):
+            await self._resync(subscription)
+
+    async def _resync(self, subscription):
+        on_resync = subscription.get('on_resync')
+        if on_resync is None:
+            return
+
+        try:
+            result = on_resync()
+            if asyncio.iscoroutine(result):
+                await result
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.handler_errors += 1
+            self.logger.exception("Resync handler of '{}' failed".format(subscription['topic']))
+
+    async def _on_error(self, msg):
+        subscription = self.queue.get(msg.request)
+        if msg.request_type == message.Subscribe.MESSAGE_TYPE and subscription is not None:
+            # the subscription stays queued and is sent again after the next welcome
+            self.logger.warning("Subscription to '{}' failed: {}".format(subscription['topic'], msg.error))
+            return
+
+        self.logger.warning("Error reply to the request {} of type {}: {}".format(msg.request, msg.request_type,
+                                                                                 msg.error))
+
+    async def _on_close(self, msg):
+        self.logger.warning("Session closed by '{}': {}".format(self.url, msg.reason))
+        if self.ws is not None:
+            await self.ws.close()
+
     async def _on_other(self, msg):
-        raise NotImplementedError("Unimplemented handler")
+        self.logger.warning("Unhandled message from '{}': {}".format(self.url, msg))
 
     def send(self, msg):
         payload, _ = self.serializer.serialize(msg)
-        self.ws.send_str(payload.decode())
+        payload = payload.decode()
+
+        if self.recorder is not None:
+            self.recorder.frame(payload, outgoing=True)
+
+        # aiohttp 3 sends the frame with the coroutine, which is scheduled, so that frames are sent in order
+        sent = self.ws.send_str(payload)
+        if asyncio.iscoroutine(sent):
+            asyncio.ensure_future(sent).add_done_callback(self._on_sent)
+
+    def _on_sent(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.warning("Unable to send the frame to '{}': {!r}".format(self.url, future.exception()))
 
     def recv(self, s):
         messages = self.serializer.unserialize(s.encode())
         return messages[0]
 
+    async def on_message(self, data):
+        """
+        Handles the text frame. Events, the most of the frames, are routed to the subscription right after the json
+        decoding, other messages are parsed into autobahn messages.
+        """
+        raw = self.loads(data)
+        message_type = raw[0]
+
+        if message_type == EVENT:
+            # [EVENT, subscription, publication, details, args, kwargs]
+            await self._dispatch(raw[1],
+                                 raw[4] if len(raw) > 4 else None,
+                                 raw[5] if len(raw) > 5 else {})
+            return
+
+        klass = self.serializer.MESSAGE_TYPE_MAP.get(message_type)
+        if klass is None:
+            raise ProtocolError("invalid WAMP message type {}".format(message_type))
+
+        wamp_msg = klass.parse(raw)
+        await self.get_handler(message_type)(wamp_msg)
+
     async def start(self):
+        """
+        Runs till 'stop' is called, or till the connection is lost if reconnects are disabled.
+        """
+        while not self.need_stop:
+            try:
+                await self._run()
+            except asyncio.CancelledError:
+                raise
+            except CONNECTION_ERRORS as e:
+                self.logger.warning("Connection to '{}' failed: {!r}".format(self.url, e))
+            except Exception:
+                # e.g. the malformed frame, the connection is established again
+                if not self.need_stop:
+                    self.logger.exception("Connection to '{}' failed".format(self.url))
+
+            self._disconnected()
+
+            if self.need_stop or not self.reconnect:
+                break
+
+            delay = self.delay()
+            self._attempt += 1
+            self.reconnects += 1
+            self.logger.info("Reconnect to '{}' in {:.1f} seconds".format(self.url, delay))
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self):
         async with self.session.ws_connect(url=self.url,
-                                           protocols=self.protocols) as ws:
+                                           protocols=self.protocols,
+                                           heartbeat=self.heartbeat) as ws:
             self.ws = ws
 
             if self.need_stop:
-                await self.stop()
+                await ws.close()
                 return
 
             hello = message.Hello(self.realm, self.roles)
             self.send(hello)
 
             async for ws_msg in ws:
-                wamp_msg = self.recv(ws_msg.data)
-                wamp_handler = self.get_handler(wamp_msg.MESSAGE_TYPE)
-                await wamp_handler(wamp_msg)
+                if ws_msg.type == aiohttp.WSMsgType.ERROR:
+                    # e.g. the pong is not received in time
+                    raise ws_msg.data
+                if ws_msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+
+                if self.recorder is not None:
+                    self.recorder.frame(ws_msg.data)
+                await self.on_message(ws_msg.data)
+
+    def _disconnected(self):
+        """
+        Returns subscriptions into the queue, they are sent again after the next welcome.
+        """
+        self.ws = None
+        self.connected = False
+
+        for subscription in self.subscriptions.values():
+            subscription['replayed'] = True
+            subscription.pop('seq', None)
+            self.queue[subscription.pop('request_id')] = subscription
+
+        self.subscriptions = {}
+
+    def delay(self):
+        """
+        Exponential backoff with the jitter: random delay between the half and the whole of the backoff.
+        """
+        backoff = min(self.max_delay, self.min_delay * 2 ** self._attempt)
+        return random.uniform(backoff / 2, backoff)
 
     async def stop(self):
+        self.need_stop = True
+        self._stopping.set()
+
+        # queues are closed first, so that the reading loop blocked on the full queue is released
+        for subscription in self._all_subscriptions():
+            if subscription['queue'] is not None:
+                subscription['queue'].close()
+
         if self.ws:
             await self.ws.close()
-        else:
-            self.need_stop = True
 
-    def subscribe(self, handler, topic):
+    def _all_subscriptions(self):
+        return list(self.queue.values()) + list(self.subscriptions.values())
+
+    def metrics(self):
+        """
+        Returns queue metrics of the topics subscribed with the queue policy.
+        """
+        return {subscription['topic']: subscription['queue'].metrics()
+                for subscription in self._all_subscriptions() if subscription['queue'] is not None}
+
+    def gauges(self):
+        for topic, queue in self.metrics().items():
+            labels = {"topic": topic}
+            yield metrics.PUSH_QUEUE_LAG, labels, queue["lag"]
+            yield metrics.PUSH_QUEUE_DEPTH, labels, queue["depth"]
+            yield metrics.PUSH_QUEUE_DROPS, labels, queue["drops"]
+
+    def subscribe(self, handler, topic, on_resync=None, policy=None, maxsize=1000):
+        """
+        'on_resync' is called without arguments whenever messages of the topic might have been missed. By default
+        the handler is awaited by the reading loop, with the 'policy' messages are put into the bounded queue of
+        the topic and handled by its own worker, see 'poloniex.wamp.dispatch'.
+        """
         request_id = random.randint(10 ** 14, 10 ** 15 - 1)
+
+        if self.registry is not None:
+            handler = metrics.timed_handler(self.registry, topic, handler)
+
         subscription = {
             'topic': topic,
-            'handler': handler
+            'handler': handler,
+            'on_resync': on_resync,
+            'queue': TopicQueue(topic, handler, maxsize=maxsize, policy=policy) if policy else None
         }
 
+        self.queue[request_id] = subscription
+
         if self.connected:
             self.send(message.Subscribe(request=request_id, topic=topic))
-        else:
-            self.queue[request_id] = subscription
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from collections import deque
+
+from poloniex.error import PoloniexError
+from poloniex.logger import getLogger
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# reader waits while the queue is full, slow handler slows down the whole connection but never loses messages
+BLOCK = "block"
+
+# oldest queued message is dropped to make room for the new one
+DROP_OLDEST = "drop_oldest"
+
+# only the latest message is kept, e.g. for the ticker where the newer message replaces the older one
+CONFLATE = "conflate"
+
+POLICIES = (BLOCK, DROP_OLDEST, CONFLATE)
+
+logger = getLogger(__name__)
+
+
+class TopicQueue:
+    """
+    Bounded queue of the topic messages with the worker which calls the handler, so the slow handler of one topic
+    doesn't delay handlers of the other topics. Dropping policies lose messages, topics which need every message,
+    e.g. order book deltas, should use 'block'.
+    """
+
+    def __init__(self, topic, handler, maxsize=1000, policy=BLOCK, clock=time.monotonic):
+        if policy not in POLICIES:
+            raise PoloniexError("Unknown queue policy '{}', available: {}".format(policy, ", ".join(POLICIES)))
+
+        self.topic = topic
+        self.handler = handler
+        self.policy = policy
+        self.maxsize = 1 if policy == CONFLATE else maxsize
+        self.clock = clock
+
+        # (enqueue time, args, kwargs)
+        self.items = deque()
+        self.worker = None
+        self._ready = None
+        self._space = None
+        self.closed = False
+
+        self.received = 0
+        self.delivered = 0
+        self.drops = 0
+        self.errors = 0
+        self.max_lag = 0
+
+    def _wake(self, name):
+        waiter = getattr(self, name)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def put(self, args, kwargs):
+        """
+        Queues the message, with the 'block' policy waits while the queue is full. Raises PoloniexError if the queue
+        is closed, also when it is closed while the message waits for the room.
+        """
+        if self.closed:
+            raise PoloniexError("Queue of '{}' is closed".format(self.topic))
+
+        if self.worker is None:
+            self.worker = asyncio.ensure_future(self._work())
+
+        self.received += 1
+
+        while len(self.items) >= self.maxsize:
+            if self.policy == BLOCK:
+                self._space = asyncio.get_event_loop().create_future()
+                await self._space
+            else:
+                self.items.popleft()
+                self.drops += 1
+
+        self.items.append((self.clock(), args, kwargs))
+        self._wake("_ready")
+
+    async def _work(self):
+        while True:
+            if not self.items:
+                self._ready = asyncio.get_event_loop().create_future()
+                await self._ready
+                continue
+
+            enqueued, args, kwargs = self.items.popleft()
+            self._wake("_space")
+
+            self.max_lag = max(self.max_lag, self.clock() - enqueued)
+
+            try:
+                await self.handler(args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.errors += 1
+                logger.exception("Handler of '{}' failed".format(self.topic))
+
+            self.delivered += 1
+
+    @property
+    def lag(self):
+        """
+        Seconds the oldest queued message waits for the handler.
+        """
+        if not self.items:
+            return 0
+        return self.clock() - self.items[0][0]
+
+    def metrics(self):
+        return {
+            "policy": self.policy,
+            "depth": len(self.items),
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+            "received": self.received,
+            "delivered": self.delivered,
+            "drops": self.drops,
+            "errors": self.errors,
+        }
+
+    def close(self):
+        self.closed = True
+
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+        # the producer blocked on the full queue is released with the error
+        if self._space is not None and not self._space.done():
+            self._space.set_exception(PoloniexError("Queue of '{}' is closed".format(self.topic)))
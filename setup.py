@@ -30,6 +30,10 @@ setup(
         'pp-ez',
         'requests'
     ],
+    extras_require={
+        'numpy': ['numpy'],
+        'orjson': ['orjson'],
+    },
     classifiers=[
         'Operating System :: OS Independent',
         'Programming Language :: Python :: 3.5',
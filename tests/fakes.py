@@ -0,0 +1,66 @@
+import asyncio
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+class Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.status = status_code
+        self.content = body.encode()
+
+    async def read(self):
+        return self.content
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class Session:
+    """
+    Answers every request of the sync api with the given responses in turn.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, kwargs))
+        return self.responses.pop(0)
+
+    def get(self, url, **kwargs):
+        return self.request("get", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("post", url, **kwargs)
+
+
+class AsyncSession(Session):
+    """
+    Session of the async api, every response is given after 'delay' seconds.
+    """
+
+    def __init__(self, *responses, delay=0):
+        super().__init__(*responses)
+        self.delay = delay
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, kwargs))
+        return DelayedResponse(self.responses.pop(0), self.delay)
+
+
+class DelayedResponse:
+    def __init__(self, response, delay):
+        self.response = response
+        self.delay = delay
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self.response
+
+    async def __aexit__(self, *args):
+        pass
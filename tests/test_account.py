@@ -0,0 +1,79 @@
+import unittest
+from decimal import Decimal
+
+from poloniex.account import AccountMirror
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+def buy_params(rate="0.01", amount="10"):
+    return {"command": "buy", "currencyPair": "BTC_ETH", "rate": rate, "amount": amount}
+
+
+class AccountMirrorTest(unittest.TestCase):
+    def setUp(self):
+        self.mirror = AccountMirror()
+        self.mirror("returnCompleteBalances", {}, {
+            "BTC": {"available": "1", "onOrders": "0", "btcValue": "1"},
+            "ETH": {"available": "0", "onOrders": "0", "btcValue": "0"},
+        })
+
+    def test_place_reserves_funds(self):
+        self.mirror("buy", buy_params(), {"orderNumber": 1, "resultingTrades": []})
+
+        self.assertEqual(self.mirror.available("BTC"), Decimal("0.9"))
+        self.assertEqual(self.mirror.on_orders("BTC"), Decimal("0.1"))
+        self.assertEqual(self.mirror.order(1)["amount"], Decimal("10"))
+
+    def test_fill_at_placement_is_not_applied_again(self):
+        trade = {"tradeID": "16164", "amount": "4", "total": "0.04", "rate": "0.01", "type": "buy"}
+        self.mirror("buy", buy_params(), {"orderNumber": 1, "resultingTrades": [trade]})
+
+        self.assertEqual(self.mirror.available("ETH"), Decimal("4"))
+        self.assertEqual(self.mirror.order(1)["amount"], Decimal("6"))
+
+        # the same trade is reported by 'returnOrderTrades' with the numeric id
+        self.mirror("returnOrderTrades", {"orderNumber": 1}, [dict(trade, tradeID=16164)])
+
+        self.assertEqual(self.mirror.available("ETH"), Decimal("4"))
+        self.assertEqual(self.mirror.available("BTC"), Decimal("0.9"))
+        self.assertEqual(self.mirror.on_orders("BTC"), Decimal("0.06"))
+        self.assertEqual(self.mirror.order(1)["amount"], Decimal("6"))
+
+    def test_later_fills_are_applied_once(self):
+        self.mirror("buy", buy_params(), {"orderNumber": 1, "resultingTrades": []})
+
+        trades = [{"tradeID": 1, "amount": "4", "total": "0.04"}]
+        self.mirror("returnOrderTrades", {"orderNumber": 1}, trades)
+        self.mirror("returnOrderTrades", {"orderNumber": 1}, trades)
+
+        self.assertEqual(self.mirror.available("ETH"), Decimal("4"))
+        self.assertEqual(self.mirror.order(1)["amount"], Decimal("6"))
+
+        self.mirror("returnOrderTrades", {"orderNumber": 1}, trades + [{"tradeID": 2, "amount": "6", "total": "0.06"}])
+
+        self.assertIsNone(self.mirror.order(1))
+        self.assertEqual(self.mirror.available("ETH"), Decimal("10"))
+        self.assertEqual(self.mirror.on_orders("BTC"), Decimal("0"))
+
+    def test_cancel_releases_funds(self):
+        self.mirror("buy", buy_params(), {"orderNumber": 1, "resultingTrades": []})
+        self.mirror("cancelOrder", {"orderNumber": 1}, {"success": 1})
+
+        self.assertIsNone(self.mirror.order(1))
+        self.assertEqual(self.mirror.available("BTC"), Decimal("1"))
+        self.assertEqual(self.mirror.on_orders("BTC"), Decimal("0"))
+
+    def test_open_orders_snapshot_replaces_orders(self):
+        self.mirror("buy", buy_params(), {"orderNumber": 1, "resultingTrades": []})
+        self.mirror("returnOpenOrders", {"currencyPair": "all"}, {
+            "BTC_ETH": [{"orderNumber": "2", "type": "sell", "rate": "0.02", "amount": "1", "total": "0.02"}],
+        })
+
+        self.assertIsNone(self.mirror.order(1))
+        self.assertEqual(self.mirror.order(2)["rate"], Decimal("0.02"))
+        self.assertEqual(self.mirror.mismatches, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import unittest
+from decimal import Decimal
+
+from poloniex.account import AccountMirror
+from poloniex.accounts import AccountManager
+from poloniex.error import PoloniexError, TransientError
+from poloniex.scheduler import AsyncScheduler
+from tests.fakes import Response
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+class KeyedSession:
+    """
+    Session of the trading api which answers by the api key: with the balances of the account, with the status of
+    'failures' or by raising the given exception. Every request waits for 'delay' seconds.
+    """
+
+    def __init__(self, balances, failures=None, delay=0.01):
+        self.balances = balances
+        self.failures = failures or {}
+        self.delay = delay
+        self.requests = []
+
+    def post(self, url, data=None, headers=None, **kwargs):
+        key = headers["Key"]
+        self.requests.append((key, data["nonce"]))
+
+        failure = self.failures.get(key)
+        if isinstance(failure, Exception):
+            raise failure
+        if failure is not None:
+            return Answer(Response(failure, '{"error": "failed"}'), self.delay)
+
+        body = {currency: {"available": available, "onOrders": "0", "btcValue": "0"}
+                for currency, available in self.balances[key].items()}
+        return Answer(Response(200, json.dumps(body)), self.delay)
+
+    def nonces(self, key):
+        return [nonce for request_key, nonce in self.requests if request_key == key]
+
+
+class Answer:
+    def __init__(self, response, delay):
+        self.response = response
+        self.delay = delay
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self.response
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class AccountManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.session = KeyedSession({"key-a": {"BTC": "1"}, "key-b": {"BTC": "2"}, "key-c": {"BTC": "3"}})
+        self.accounts = AccountManager(session=self.session)
+        for name in ("a", "b", "c"):
+            self.accounts.add(name, "key-" + name, "secret-" + name)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_concurrent_gathers_keep_accounts_apart(self):
+        results = self.loop.run_until_complete(asyncio.gather(*[self.accounts.returnCompleteBalances()
+                                                                for _ in range(3)]))
+
+        for result in results:
+            self.assertEqual({name: balances["BTC"]["available"] for name, balances in result.items()},
+                             {"a": "1", "b": "2", "c": "3"})
+
+        for name in ("a", "b", "c"):
+            nonces = self.session.nonces("key-" + name)
+            self.assertEqual(len(nonces), 3)
+            self.assertEqual(nonces, sorted(set(nonces)))
+            self.assertEqual(self.accounts[name].scheduler.calls, 3)
+
+        self.assertEqual(len({id(self.accounts[name].nonces) for name in self.accounts}), 3)
+        self.assertEqual(len({id(self.accounts[name].scheduler) for name in self.accounts}), 3)
+
+    def test_mirrors_follow_their_accounts(self):
+        mirrors = {}
+        for name in self.accounts:
+            mirrors[name] = AccountMirror()
+            mirrors[name].attach(self.accounts[name])
+
+        self.loop.run_until_complete(asyncio.gather(self.accounts.returnCompleteBalances(names=["a", "b"]),
+                                                    self.accounts.returnCompleteBalances(names=["b", "c"])))
+
+        self.assertEqual(mirrors["a"].available("BTC"), Decimal("1"))
+        self.assertEqual(mirrors["b"].available("BTC"), Decimal("2"))
+        self.assertEqual(mirrors["c"].available("BTC"), Decimal("3"))
+
+    def test_failed_account_does_not_fail_others(self):
+        self.session.failures = {"key-a": 422, "key-b": TransientError("connection reset")}
+        result = self.loop.run_until_complete(self.accounts.returnCompleteBalances())
+
+        self.assertIsInstance(result["a"], PoloniexError)
+        self.assertIsInstance(result["b"], TransientError)
+        self.assertEqual(result["c"]["BTC"]["available"], "3")
+
+    def test_busy_account_does_not_delay_others(self):
+        self.accounts.remove("a")
+        self.accounts.add("a", "key-a", "secret-a", scheduler=AsyncScheduler(rate=1, capacity=1))
+        finished = []
+
+        async def call(name):
+            await self.accounts[name].returnBalances()
+            finished.append(name)
+
+        async def calls():
+            tasks = [asyncio.ensure_future(call(name)) for name in ("a", "a", "b", "b", "c")]
+            # the second call of 'a' waits a second for the token of its own budget
+            _, pending = await asyncio.wait(tasks, timeout=0.2)
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending)
+
+        self.loop.run_until_complete(calls())
+
+        self.assertEqual(sorted(finished), ["a", "b", "b", "c"])
+
+    def test_account_is_added_once(self):
+        with self.assertRaises(PoloniexError):
+            self.accounts.add("a", "key-a", "secret-a")
+
+
+if __name__ == "__main__":
+    unittest.main()
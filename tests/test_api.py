@@ -0,0 +1,89 @@
+import json
+import unittest
+
+from poloniex.api import sync
+from poloniex.api.base import binder, status_error
+from poloniex.error import PoloniexError, TransientError
+from poloniex.pipeline import NONCE_ERROR
+from tests.fakes import Response, Session
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+def order_book(self, currency_pair="all", depth=50):
+    pass
+
+
+class BinderTest(unittest.TestCase):
+    def setUp(self):
+        self.bind = binder(order_book)
+
+    def test_positional_arguments(self):
+        self.assertEqual(self.bind(("BTC_ETH", 10), {}), {"currency_pair": "BTC_ETH", "depth": 10})
+
+    def test_defaults(self):
+        self.assertEqual(self.bind((), {}), {"currency_pair": "all", "depth": 50})
+        self.assertEqual(self.bind(("BTC_ETH",), {}), {"currency_pair": "BTC_ETH", "depth": 50})
+        self.assertEqual(self.bind((), {"depth": 5}), {"currency_pair": "all", "depth": 5})
+
+    def test_unknown_keyword(self):
+        with self.assertRaises(TypeError) as raised:
+            self.bind((), {"pair": "BTC_ETH"})
+        self.assertIn("pair", str(raised.exception))
+
+    def test_too_many_positional_arguments(self):
+        with self.assertRaises(TypeError):
+            self.bind(("BTC_ETH", 10, 1), {})
+
+    def test_duplicate_argument(self):
+        with self.assertRaises(TypeError):
+            self.bind(("BTC_ETH",), {"currency_pair": "BTC_LTC"})
+
+    def test_defaults_are_not_shared(self):
+        self.bind(("BTC_ETH",), {})
+        self.assertEqual(self.bind((), {}), {"currency_pair": "all", "depth": 50})
+
+    def test_api_call(self):
+        session = Session(Response(200, '{"asks": [], "bids": [], "seq": 1}'))
+        sync.PublicApi(session=session).returnOrderBook("BTC_ETH", depth=10)
+
+        method, kwargs = session.requests[0]
+        self.assertEqual(kwargs["params"], {"command": "returnOrderBook", "currencyPair": "BTC_ETH", "depth": 10})
+
+
+class StatusErrorTest(unittest.TestCase):
+    def test_exchange_message_is_kept(self):
+        body = json.dumps({"error": "Nonce must be greater than 1500000000000. You provided 1."}).encode()
+        error = status_error(422, body, json.loads, "url")
+
+        self.assertIs(type(error), PoloniexError)
+        self.assertIn(NONCE_ERROR, str(error))
+
+    def test_server_errors_are_transient(self):
+        self.assertIsInstance(status_error(503, b"<html>", json.loads, "url"), TransientError)
+        self.assertIsInstance(status_error(429, b'{"error": "slow down"}', json.loads, "url"), TransientError)
+        self.assertNotIsInstance(status_error(404, b"", json.loads, "url"), TransientError)
+
+    def test_status_is_reported_without_message(self):
+        self.assertEqual(str(status_error(502, b"Bad Gateway", json.loads, "url")), "Got 502 when calling url.")
+
+
+class SyncApiErrorTest(unittest.TestCase):
+    def test_trading_error_message(self):
+        session = Session(Response(422, '{"error": "Nonce must be greater than 2."}'))
+        api = sync.TradingApi("key", "secret", session=session)
+
+        with self.assertRaises(PoloniexError) as raised:
+            api.returnBalances()
+        self.assertIn(NONCE_ERROR, str(raised.exception))
+
+    def test_public_server_error(self):
+        session = Session(Response(503, "Service Unavailable"))
+        api = sync.PublicApi(session=session)
+
+        with self.assertRaises(TransientError):
+            api.returnTicker()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import importlib
+import unittest
+from datetime import datetime, timedelta
+
+from poloniex import constants
+from poloniex.error import PoloniexError
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# 'async' is the keyword within the coroutines, so the module is used under another name
+async_api = importlib.import_module("poloniex.api.async")
+
+PERIOD = 300
+START = datetime(2017, 1, 1)
+CHUNK = timedelta(seconds=constants.CHART_DATA_CHUNKS[PERIOD])
+
+
+class ChartApi:
+    """
+    Returns one candle per chunk. With 'fail_at' the first chunk is returned at once, the chunk starting
+    at 'fail_at' fails, and the others are held till cancelled.
+    """
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.running = 0
+        self.cancelled = 0
+
+    async def returnChartData(self, currency_pair, start, end, period):
+        self.running += 1
+        try:
+            await asyncio.sleep(0)
+            if start == self.fail_at:
+                raise PoloniexError("chunk failed")
+            if self.fail_at is not None and start != START:
+                await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
+
+        return [{"date": int(start.timestamp())}]
+
+
+class ChartDataBackfillTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def backfill(self, api, chunks, concurrency):
+        end = START + CHUNK * chunks - timedelta(seconds=1)
+        return async_api.ChartDataBackfill(api, "BTC_ETH", START, end, period=PERIOD, concurrency=concurrency)
+
+    def test_candles_in_order_with_bounded_chunks(self):
+        api = ChartApi()
+        backfill = self.backfill(api, chunks=10, concurrency=3)
+
+        async def collect():
+            candles = []
+            async for candle in backfill:
+                # chunks requested ahead plus the one being iterated
+                self.assertLessEqual(len(backfill.pending) + 1, 3)
+                candles.append(candle["date"])
+            return candles
+
+        candles = self.loop.run_until_complete(collect())
+
+        self.assertEqual(candles, [int((START + CHUNK * i).timestamp()) for i in range(10)])
+
+    def test_failed_chunk_cancels_chunks_ahead(self):
+        api = ChartApi(fail_at=START + CHUNK)
+        backfill = self.backfill(api, chunks=10, concurrency=4)
+
+        async def collect():
+            async for _ in backfill:
+                pass
+
+        with self.assertRaises(PoloniexError):
+            self.loop.run_until_complete(collect())
+
+        # chunks 2 and 3 were running, chunk 4 was requested but cancelled before it started
+        self.assertEqual(api.running, 0)
+        self.assertEqual(api.cancelled, 2)
+        self.assertFalse(backfill.pending)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import asyncio
+import importlib
+import unittest
+
+from poloniex.api import sync
+from poloniex.cache import ResponseCache
+from poloniex.scheduler import SyncScheduler, AsyncScheduler
+from tests.fakes import Response, Session, AsyncSession
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# 'async' is the keyword within the coroutines, so the module is used under another name
+async_api = importlib.import_module("poloniex.api.async")
+
+TICKER = '{"BTC_ETH": {"last": "0.01"}}'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResponseCache(clock=self.clock)
+        self.fetched = []
+
+    def fetch(self, params):
+        self.fetched.append(params)
+        return {"fetched": len(self.fetched)}
+
+    def test_response_is_fresh_till_ttl(self):
+        params = {"command": "returnTicker"}
+
+        self.assertEqual(self.cache.query(params, self.fetch), {"fetched": 1})
+        self.assertEqual(self.cache.query(params, self.fetch), {"fetched": 1})
+
+        self.clock.now = 2
+        self.assertEqual(self.cache.query(params, self.fetch), {"fetched": 2})
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_errors_are_not_cached(self):
+        params = {"command": "returnTicker"}
+        self.cache.query(params, lambda params: {"error": "busy"})
+
+        self.assertEqual(self.cache.query(params, self.fetch), {"fetched": 1})
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ResponseCache(maxsize=2, clock=self.clock)
+        for pair in ("A", "B", "A", "C"):
+            cache.query({"command": "returnTicker", "pair": pair}, self.fetch)
+
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(len(self.fetched), 3)
+
+
+class SyncApiCacheTest(unittest.TestCase):
+    def test_hit_takes_no_rate_limit_token(self):
+        scheduler = SyncScheduler()
+        session = Session(Response(200, TICKER))
+        api = sync.PublicApi(session=session, scheduler=scheduler, cache=ResponseCache())
+
+        for _ in range(5):
+            self.assertEqual(api.returnTicker(), {"BTC_ETH": {"last": "0.01"}})
+
+        self.assertEqual(len(session.requests), 1)
+        self.assertEqual(scheduler.calls, 1)
+
+
+class AsyncApiCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_hit_takes_no_rate_limit_token(self):
+        scheduler = AsyncScheduler(loop=self.loop)
+        session = AsyncSession(Response(200, TICKER))
+        api = async_api.PublicApi(session, scheduler=scheduler, cache=ResponseCache())
+
+        async def calls():
+            for _ in range(5):
+                await api.returnTicker()
+
+        self.loop.run_until_complete(calls())
+
+        self.assertEqual(len(session.requests), 1)
+        self.assertEqual(scheduler.calls, 1)
+
+    def test_concurrent_calls_share_the_request(self):
+        session = AsyncSession(Response(200, TICKER), delay=0.01)
+        api = async_api.PublicApi(session, cache=ResponseCache())
+
+        responses = self.loop.run_until_complete(asyncio.gather(*[api.returnTicker() for _ in range(5)]))
+
+        self.assertEqual(len(session.requests), 1)
+        self.assertEqual(responses, [{"BTC_ETH": {"last": "0.01"}}] * 5)
+
+    def test_cancelled_leader_does_not_cancel_followers(self):
+        session = AsyncSession(Response(200, TICKER), delay=0.05)
+        api = async_api.PublicApi(session, cache=ResponseCache())
+
+        async def cancel_leader():
+            leader = asyncio.ensure_future(api.returnTicker())
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(api.returnTicker())
+            await asyncio.sleep(0.01)
+
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(self.loop.run_until_complete(cancel_leader()), {"BTC_ETH": {"last": "0.01"}})
+        self.assertEqual(len(session.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+
+import numpy as np
+
+from poloniex import columnar
+from poloniex.columnar import BUY, SELL
+
+__author__ = 'andrew.shvv@gmail.com'
+
+CANDLES = [
+    {"date": 0, "high": "0.03", "low": "0.01", "open": "0.01", "close": "0.02", "volume": "2", "quoteVolume": "100",
+     "weightedAverage": "0.02"},
+    {"date": 300, "high": "0.05", "low": "0.02", "open": "0.02", "close": "0.04", "volume": "6", "quoteVolume": "200",
+     "weightedAverage": "0.03"},
+    {"date": 600, "high": "0.04", "low": "0.03", "open": "0.04", "close": "0.03", "volume": "3", "quoteVolume": "100",
+     "weightedAverage": "0.03"},
+]
+
+TRADES = [
+    {"globalTradeID": 3, "tradeID": 3, "date": "1970-01-01 00:05:10", "type": "sell", "rate": "0.03",
+     "amount": "1", "total": "0.03"},
+    {"globalTradeID": 2, "tradeID": 2, "date": "1970-01-01 00:00:20", "type": "buy", "rate": "0.02",
+     "amount": "3", "total": "0.06"},
+    {"globalTradeID": 1, "tradeID": 1, "date": "1970-01-01 00:00:10", "type": "buy", "rate": "0.01",
+     "amount": "1", "total": "0.01"},
+]
+
+
+class ToValuesTest(unittest.TestCase):
+    def test_scaled_strings_are_exact_at_bound(self):
+        values = ["89999999.99999999", "90000000.00000001", "92233720368.54775807"]
+        result = columnar.to_values(values, scaled=True)
+
+        self.assertEqual(result.dtype, np.int64)
+        self.assertEqual(result.tolist(), [8999999999999999, 9000000000000001, 9223372036854775807])
+
+    def test_scaled_long_column_is_exact(self):
+        values = ["{}.{:08d}".format(90000000 + i, i) for i in range(100)]
+        result = columnar.to_values(values, scaled=True)
+
+        self.assertEqual(result.tolist(), [int(value.replace(".", "")) for value in values])
+
+    def test_scaled_numbers(self):
+        self.assertEqual(columnar.to_values([0.1, 3, 0], scaled=True).tolist(), [10000000, 300000000, 0])
+
+    def test_float_values(self):
+        result = columnar.to_values(["0.5", 1])
+
+        self.assertEqual(result.dtype, np.float64)
+        self.assertEqual(result.tolist(), [0.5, 1.0])
+
+
+class ArraysTest(unittest.TestCase):
+    def test_placeholder_candle_is_dropped(self):
+        placeholder = dict(CANDLES[0], date=0)
+        candles = columnar.candles_to_array([placeholder] + [dict(candle, date=candle["date"] + 300)
+                                                             for candle in CANDLES])
+
+        self.assertEqual(candles["date"].tolist(), [300, 600, 900])
+
+    def test_trades_are_sorted_by_time(self):
+        trades = columnar.trades_to_array(TRADES, scaled=True)
+
+        self.assertEqual(trades["tradeID"].tolist(), [1, 2, 3])
+        self.assertEqual(trades["date"].tolist(), [10, 20, 310])
+        self.assertEqual(trades["type"].tolist(), [BUY, BUY, SELL])
+        self.assertEqual(trades["rate"].tolist(), [1000000, 2000000, 3000000])
+
+    def test_trades_of_all_markets(self):
+        trades = columnar.trades_to_array({"BTC_ETH": TRADES, "BTC_LTC": []})
+
+        self.assertEqual(len(trades["BTC_ETH"]), 3)
+        self.assertEqual(len(trades["BTC_LTC"]), 0)
+
+
+class AggregationTest(unittest.TestCase):
+    def test_resample(self):
+        candles = columnar.candles_to_array([dict(candle, date=candle["date"] + 1200) for candle in CANDLES],
+                                            scaled=True)
+        result = columnar.resample(candles, 1800)
+
+        self.assertEqual(result["date"].tolist(), [0, 1800])
+        self.assertEqual(result["open"].tolist(), [1000000, 4000000])
+        self.assertEqual(result["close"].tolist(), [4000000, 3000000])
+        self.assertEqual(result["high"].tolist(), [5000000, 4000000])
+        self.assertEqual(result["volume"].tolist(), [800000000, 300000000])
+        self.assertEqual(result["weightedAverage"].tolist(), [2666667, 3000000])
+
+    def test_vwap(self):
+        trades = columnar.trades_to_array(TRADES)
+
+        self.assertAlmostEqual(columnar.vwap(trades), 0.1 / 5)
+
+        dates, prices = columnar.vwap(trades, period=300)
+        self.assertEqual(dates.tolist(), [0, 300])
+        self.assertAlmostEqual(prices[0], 0.07 / 4)
+        self.assertAlmostEqual(prices[1], 0.03)
+
+    def test_ohlc(self):
+        candles = columnar.ohlc(columnar.trades_to_array(TRADES, scaled=True), 300)
+
+        self.assertEqual(candles["date"].tolist(), [0, 300])
+        self.assertEqual(candles["open"].tolist(), [1000000, 3000000])
+        self.assertEqual(candles["close"].tolist(), [2000000, 3000000])
+        self.assertEqual(candles["quoteVolume"].tolist(), [400000000, 100000000])
+
+    def test_empty(self):
+        trades = columnar.trades_to_array([])
+
+        self.assertIsNone(columnar.vwap(trades))
+        self.assertEqual(len(columnar.ohlc(trades, 300)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+from poloniex.decoder import DECODERS, get_decoder, json_loads
+from poloniex.error import PoloniexError
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+class GetDecoderTest(unittest.TestCase):
+    def test_standard_decoder_by_default(self):
+        self.assertIs(get_decoder(), json_loads)
+        self.assertEqual(get_decoder()(b'{"rate": 0.1}'), {"rate": 0.1})
+
+    def test_fastest_is_not_ujson(self):
+        self.assertIs(get_decoder("fastest"), DECODERS.get("orjson", json_loads))
+
+    def test_function_and_unknown_name(self):
+        self.assertIs(get_decoder(len), len)
+
+        with self.assertRaises(PoloniexError):
+            get_decoder("simdjson")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import unittest
+
+from poloniex.error import PoloniexError
+from poloniex.wamp import dispatch
+from poloniex.wamp.client import WAMPClient
+from poloniex.wamp.dispatch import TopicQueue
+
+__author__ = 'andrew.shvv@gmail.com'
+
+SUBSCRIBED, EVENT = 33, 36
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class Handler:
+    """
+    Records the messages, each call waits till 'release' is called.
+    """
+
+    def __init__(self):
+        self.received = []
+        self.released = asyncio.Event()
+
+    def release(self):
+        self.released.set()
+
+    async def __call__(self, args, **kwargs):
+        await self.released.wait()
+        self.received.append(args)
+
+
+class TopicQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.handler = Handler()
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def put(self, queue, *messages):
+        for message in messages:
+            self.loop.run_until_complete(queue.put(message, {}))
+
+    def drain(self, queue):
+        self.handler.release()
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        queue.close()
+
+    def test_block_waits_for_room(self):
+        queue = TopicQueue("BTC_ETH", self.handler, maxsize=2, policy=dispatch.BLOCK)
+        # the worker takes the first message and waits in the handler, two more fill the queue
+        self.put(queue, 1, 2, 3)
+
+        blocked = asyncio.ensure_future(queue.put(4, {}))
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.assertFalse(blocked.done())
+
+        self.drain(queue)
+
+        self.assertTrue(blocked.done())
+        self.assertEqual(self.handler.received, [1, 2, 3, 4])
+        self.assertEqual(queue.drops, 0)
+
+    def test_close_releases_blocked_producer(self):
+        queue = TopicQueue("BTC_ETH", self.handler, maxsize=1, policy=dispatch.BLOCK)
+        self.put(queue, 1, 2)
+
+        blocked = asyncio.ensure_future(queue.put(3, {}))
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        queue.close()
+
+        with self.assertRaises(PoloniexError):
+            self.loop.run_until_complete(blocked)
+        with self.assertRaises(PoloniexError):
+            self.put(queue, 4)
+
+    def test_drop_oldest(self):
+        queue = TopicQueue("BTC_ETH", self.handler, maxsize=2, policy=dispatch.DROP_OLDEST)
+        self.put(queue, 1, 2, 3, 4, 5)
+
+        self.assertEqual(queue.metrics()["depth"], 2)
+        self.assertEqual(queue.drops, 2)
+
+        self.drain(queue)
+        self.assertEqual(self.handler.received, [1, 4, 5])
+
+    def test_conflate_keeps_latest(self):
+        queue = TopicQueue("ticker", self.handler, policy=dispatch.CONFLATE)
+        self.put(queue, 1, 2, 3, 4)
+
+        self.drain(queue)
+        self.assertEqual(self.handler.received, [1, 4])
+        self.assertEqual(queue.drops, 2)
+
+    def test_metrics(self):
+        clock = FakeClock()
+        queue = TopicQueue("BTC_ETH", self.handler, maxsize=10, policy=dispatch.BLOCK, clock=clock)
+        self.put(queue, 1, 2, 3)
+        clock.now = 2
+
+        metrics = queue.metrics()
+        self.assertEqual(metrics["depth"], 2)
+        self.assertEqual(metrics["lag"], 2)
+        self.assertEqual(metrics["received"], 3)
+        self.assertEqual(metrics["delivered"], 0)
+
+        self.drain(queue)
+        metrics = queue.metrics()
+        self.assertEqual(metrics["depth"], 0)
+        self.assertEqual(metrics["delivered"], 3)
+        self.assertEqual(metrics["max_lag"], 2)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(PoloniexError):
+            TopicQueue("BTC_ETH", self.handler, policy="latest")
+
+
+class WAMPClientQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_stop_releases_blocked_reader(self):
+        client = WAMPClient(url="ws://localhost", session=None)
+        client.subscribe(handler=Handler(), topic="BTC_ETH", policy=dispatch.BLOCK, maxsize=1)
+        request_id = next(iter(client.queue))
+
+        async def read():
+            await client.on_message(json.dumps([SUBSCRIBED, request_id, 1]))
+            for seq in range(1, 5):
+                await client.on_message(json.dumps([EVENT, 1, seq, {}, [seq], {"seq": seq}]))
+
+        reader = asyncio.ensure_future(read())
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.assertFalse(reader.done())
+
+        self.loop.run_until_complete(client.stop())
+        self.loop.run_until_complete(asyncio.wait_for(reader, 1))
+
+        self.assertEqual(client.metrics()["BTC_ETH"]["received"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import pickle
+import unittest
+
+from poloniex.events import EventBatcher, OrderBookModify, Ticker, Trade, TrollboxMessage, message_events
+
+__author__ = 'andrew.shvv@gmail.com'
+
+TICKER = ["BTC_ETH", "0.01", "0.011", "0.009", "0.5", "100", "10000", 0, "0.012", "0.008"]
+
+
+class EventTest(unittest.TestCase):
+    def test_equal_events_have_equal_hash(self):
+        first = OrderBookModify("BTC_ETH", "bid", "0.01", "1", 1)
+        second = OrderBookModify("BTC_ETH", "bid", "0.01", "1", 1)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len({first, second}), 1)
+        self.assertNotEqual(first, OrderBookModify("BTC_ETH", "bid", "0.01", "2", 1))
+
+    def test_pickle(self):
+        event = Ticker(*TICKER)
+        self.assertEqual(pickle.loads(pickle.dumps(event)), event)
+
+    def test_market_message(self):
+        message = [
+            {"type": "orderBookModify", "data": {"type": "bid", "rate": "0.01", "amount": "1"}},
+            {"type": "newTrade", "data": {"tradeID": "7", "type": "buy", "rate": "0.01", "amount": "1",
+                                          "total": "0.01", "date": "2017-05-07 07:11:23"}},
+        ]
+
+        self.assertEqual(message_events("BTC_ETH", message, seq=5), [
+            OrderBookModify("BTC_ETH", "bid", "0.01", "1", 5),
+            Trade("BTC_ETH", "7", "buy", "0.01", "1", "0.01", "2017-05-07 07:11:23", 5),
+        ])
+
+    def test_ticker_and_trollbox_messages(self):
+        self.assertEqual(message_events("ticker", TICKER), [Ticker(*TICKER)])
+        self.assertEqual(message_events("trollbox", ["trollboxMessage", 1, "user", "hi", 10]),
+                         [TrollboxMessage(1, "user", "trollboxMessage", "hi", 10)])
+        self.assertEqual(message_events("trollbox", ["trollboxMessage"]), [])
+
+
+class EventBatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.batches = []
+        self.errors = []
+        self.loop.set_exception_handler(lambda loop, context: self.errors.append(context))
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def extend(self, batcher, topic, events):
+        self.loop.run_until_complete(batcher.extend(topic, events))
+
+    def wait(self, seconds):
+        self.loop.run_until_complete(asyncio.sleep(seconds))
+
+    def test_flush_by_size(self):
+        batcher = EventBatcher(self.batches.append, max_size=3, max_latency=10)
+        self.extend(batcher, "BTC_ETH", [1, 2])
+        self.assertEqual(self.batches, [])
+
+        self.extend(batcher, "BTC_LTC", [3])
+        self.assertEqual(self.batches, [{"BTC_ETH": [1, 2], "BTC_LTC": [3]}])
+        self.assertIsNone(batcher._timer)
+
+    def test_flush_by_time(self):
+        async def handler(batch):
+            self.batches.append(batch)
+
+        batcher = EventBatcher(handler, max_size=100, max_latency=0.01)
+        self.extend(batcher, "BTC_ETH", [1])
+        self.extend(batcher, "BTC_ETH", [2])
+        self.wait(0.05)
+
+        self.assertEqual(self.batches, [{"BTC_ETH": [1, 2]}])
+
+    def test_timed_flush_error_is_logged(self):
+        def handler(batch):
+            if 1 in batch["BTC_ETH"]:
+                raise ValueError("bad batch")
+            self.batches.append(batch)
+
+        batcher = EventBatcher(handler, max_size=100, max_latency=0.01)
+        with self.assertLogs("poloniex.events", "ERROR"):
+            self.extend(batcher, "BTC_ETH", [1])
+            self.wait(0.05)
+
+        self.extend(batcher, "BTC_ETH", [2])
+        self.wait(0.05)
+
+        self.assertEqual(batcher.handler_errors, 1)
+        self.assertEqual(self.batches, [{"BTC_ETH": [2]}])
+        self.assertEqual(self.errors, [])
+
+    def test_size_flush_error_is_raised(self):
+        def handler(batch):
+            raise ValueError("bad batch")
+
+        batcher = EventBatcher(handler, max_size=1)
+        with self.assertRaises(ValueError):
+            self.extend(batcher, "BTC_ETH", [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import io
+import json
+import logging
+import sys
+import unittest
+
+from poloniex import logger as logger_module
+from poloniex.app import Application
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+class LoggerTest(unittest.TestCase):
+    def setUp(self):
+        self.stderr, sys.stderr = sys.stderr, io.StringIO()
+        # the handler writes into the stream it is created with
+        logger_module.configure()
+
+    def tearDown(self):
+        logger_module._stop_listener()
+        sys.stderr = self.stderr
+        logger_module.configure()
+
+    def lines(self):
+        logger_module._stop_listener()
+        return [json.loads(line) for line in sys.stderr.getvalue().splitlines()]
+
+    def test_structured_queued_exception(self):
+        logger_module.configure(structured=True, use_queue=True, level=logging.INFO)
+        logger = logger_module.getLogger("tests.logger.queued")
+
+        try:
+            raise ValueError("bad value")
+        except ValueError:
+            logger.exception("failed %s", "call", extra={"command": "buy"})
+
+        record, = self.lines()
+
+        self.assertEqual(record["message"], "failed call")
+        self.assertEqual(record["command"], "buy")
+        self.assertEqual(record["func"], "test_structured_queued_exception")
+        self.assertIn("ValueError: bad value", record["exception"])
+
+    def test_default_level_follows_root(self):
+        logger = logger_module.getLogger("tests.logger.default")
+
+        self.assertEqual(logger.level, logging.NOTSET)
+        self.assertEqual(logger.getEffectiveLevel(), logging.getLogger().getEffectiveLevel())
+
+    def test_application_logs_debug(self):
+        app = Application()
+        app.logger.debug("volume")
+
+        self.assertTrue(app.logger.isEnabledFor(logging.DEBUG))
+        self.assertIn("volume", sys.stderr.getvalue())
+
+    def test_level_is_applied_to_existing_logger(self):
+        logger = logger_module.getLogger("tests.logger.existing")
+        logger_module.getLogger("tests.logger.existing", level=logging.INFO)
+
+        self.assertEqual(logger.level, logging.INFO)
+
+    def test_configured_level_takes_precedence(self):
+        logger_module.configure(level=logging.ERROR)
+        logger = logger_module.getLogger("tests.logger.configured", level=logging.DEBUG)
+        logger_module.getLogger("tests.logger.configured", level=logging.DEBUG)
+
+        self.assertEqual(logger.level, logging.ERROR)
+
+
+if __name__ == "__main__":
+    unittest.main()
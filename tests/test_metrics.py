@@ -0,0 +1,38 @@
+import unittest
+
+from poloniex import metrics
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+class PrometheusTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry(buckets=(0.1, 1))
+        self.registry.stage("returnTicker", "network", 0.05)
+        self.registry.stage("returnTicker", "decode", 0.5)
+        self.registry.error("buy", ValueError())
+        self.registry.add_collector(lambda: [(metrics.PUSH_QUEUE_DEPTH, {"topic": "ticker"}, 3)])
+
+        self.lines = self.registry.prometheus().splitlines()
+
+    def test_type_line_once_per_family(self):
+        types = [line for line in self.lines if line.startswith("# TYPE")]
+
+        self.assertEqual(types, [
+            "# TYPE poloniex_request_seconds histogram",
+            "# TYPE poloniex_errors_total counter",
+            "# TYPE poloniex_push_queue_depth gauge",
+        ])
+
+    def test_type_line_precedes_samples(self):
+        first = self.lines.index("# TYPE poloniex_errors_total counter")
+        self.assertEqual(self.lines[first + 1], 'poloniex_errors_total{command="buy",type="ValueError"} 1')
+
+    def test_histogram_buckets_are_cumulative(self):
+        self.assertIn('poloniex_request_seconds_bucket{command="returnTicker",stage="decode",le="1"} 1', self.lines)
+        self.assertIn('poloniex_request_seconds_bucket{command="returnTicker",stage="network",le="0.1"} 1', self.lines)
+        self.assertIn('poloniex_request_seconds_count{command="returnTicker",stage="network"} 1', self.lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from poloniex.api import sync
+from poloniex.nonce import COUNTER, FileNonce, Nonce
+from tests.fakes import Response, Session
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+class NonceTest(unittest.TestCase):
+    def test_values_increase(self):
+        nonce = Nonce()
+        values = [nonce.next() for _ in range(1000)]
+
+        self.assertEqual(values, sorted(set(values)))
+
+    def test_threads_never_share_value(self):
+        nonce = Nonce()
+        values = []
+
+        def take():
+            taken = [nonce.next() for _ in range(1000)]
+            values.extend(taken)
+
+        threads = [threading.Thread(target=take) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(values)), 8000)
+
+
+class FileNonceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "nonce")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_instances_share_counter(self):
+        first, second = FileNonce(self.path), FileNonce(self.path)
+        values = [source.next() for _ in range(500) for source in (first, second)]
+        first.close()
+        second.close()
+
+        self.assertEqual(values, sorted(set(values)))
+
+    def test_counter_ahead_of_clock(self):
+        with open(self.path, "wb") as counter:
+            counter.write(COUNTER.pack(2 ** 62))
+
+        nonce = FileNonce(self.path)
+        self.assertEqual(nonce.next(), 2 ** 62 + 1)
+        nonce.close()
+
+
+class TradingApiNonceTest(unittest.TestCase):
+    def test_every_request_is_signed_with_new_nonce(self):
+        session = Session(Response(200, "{}"), Response(200, "{}"))
+        api = sync.TradingApi("key", "secret", session=session)
+
+        api.returnBalances()
+        api.returnBalances()
+
+        first, second = [kwargs["data"]["nonce"] for _, kwargs in session.requests]
+        self.assertGreater(second, first)
+
+
+if __name__ == "__main__":
+    unittest.main()
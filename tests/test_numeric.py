@@ -0,0 +1,67 @@
+import unittest
+from decimal import Decimal
+
+from poloniex import numeric
+from poloniex.error import PoloniexError
+from poloniex.numeric import NumericDecoder, fixed_column, to_decimal, to_fixed
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+class ConversionTest(unittest.TestCase):
+    def test_to_fixed(self):
+        self.assertEqual(to_fixed("0.00000001"), 1)
+        self.assertEqual(to_fixed("1.5"), 150000000)
+        self.assertEqual(to_fixed("12"), 1200000000)
+        self.assertEqual(to_fixed("0.000000005"), 0)
+        self.assertEqual(to_fixed("0.000000015"), 2)
+
+    def test_to_fixed_numbers(self):
+        self.assertEqual(to_fixed(0.1), 10000000)
+        self.assertEqual(to_fixed(3), 300000000)
+        self.assertEqual(to_fixed(Decimal("0.12345678")), 12345678)
+
+    def test_to_decimal(self):
+        self.assertEqual(to_decimal("0.1"), Decimal("0.1"))
+        self.assertEqual(to_decimal(0.1), Decimal("0.1"))
+        self.assertEqual(to_decimal(Decimal("0.1")), Decimal("0.1"))
+
+    def test_long_column_matches_values(self):
+        values = ["{}.{:08d}".format(i, i * 7) for i in range(numeric.BATCH_SIZE * 2)]
+        self.assertEqual(fixed_column(values), [to_fixed(value) for value in values])
+
+        values[-1] = "1.5"
+        self.assertEqual(fixed_column(values)[-1], 150000000)
+
+        numbers = [i / 4 for i in range(numeric.BATCH_SIZE)]
+        self.assertEqual(fixed_column(numbers), [to_fixed(number) for number in numbers])
+
+
+class NumericDecoderTest(unittest.TestCase):
+    def test_order_book(self):
+        response = {"asks": [["0.02000000", "1.00000000"]], "bids": [["0.01000000", 2]], "seq": 1}
+        book = NumericDecoder().transforms()["returnOrderBook"](response)
+
+        self.assertEqual(book, {"asks": [(2000000, 100000000)], "bids": [(1000000, 200000000)], "seq": 1})
+        self.assertEqual(response["asks"], [["0.02000000", "1.00000000"]])
+
+    def test_all_order_books(self):
+        response = {"BTC_ETH": {"asks": [], "bids": [["0.01", "1"]], "seq": 1}}
+        books = NumericDecoder(numeric.DECIMAL).order_book(response)
+
+        self.assertEqual(books["BTC_ETH"]["bids"], [(Decimal("0.01"), Decimal("1"))])
+
+    def test_records_keep_other_fields(self):
+        trades = [{"tradeID": 1, "rate": "0.01", "amount": "2", "total": "0.02", "type": "buy"}]
+        decoded, = NumericDecoder(numeric.DECIMAL).trade_history(trades)
+
+        self.assertEqual(decoded, {"tradeID": 1, "rate": Decimal("0.01"), "amount": Decimal("2"),
+                                   "total": Decimal("0.02"), "type": "buy"})
+
+    def test_unknown_mode(self):
+        with self.assertRaises(PoloniexError):
+            NumericDecoder("float")
+
+
+if __name__ == "__main__":
+    unittest.main()
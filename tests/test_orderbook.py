@@ -0,0 +1,170 @@
+import asyncio
+import unittest
+from decimal import Decimal
+
+from poloniex.orderbook import OrderBook, OrderBookEngine, SnapshotDiffer
+
+__author__ = 'andrew.shvv@gmail.com'
+
+SNAPSHOT = {
+    "asks": [["0.02", "1"], ["0.03", "2"]],
+    "bids": [["0.01", "3"], ["0.005", "4"]],
+    "isFrozen": "0",
+    "seq": 10,
+}
+
+
+def modify(side, rate, amount):
+    return {"type": "orderBookModify", "data": {"type": side, "rate": rate, "amount": amount}}
+
+
+def remove(side, rate):
+    return {"type": "orderBookRemove", "data": {"type": side, "rate": rate, "amount": "0"}}
+
+
+class Public:
+    """
+    Returns the snapshots one by one, each is held till 'release' is called.
+    """
+
+    def __init__(self, *snapshots):
+        self.snapshots = list(snapshots)
+        self.released = asyncio.Event()
+        self.calls = 0
+
+    def release(self):
+        self.released.set()
+
+    async def returnOrderBook(self, currency_pair, depth):
+        self.calls += 1
+        await self.released.wait()
+        self.released.clear()
+        return self.snapshots.pop(0)
+
+
+class OrderBookTest(unittest.TestCase):
+    def setUp(self):
+        self.book = OrderBook("BTC_ETH")
+        self.book.load(SNAPSHOT)
+
+    def test_load(self):
+        self.assertEqual(self.book.best_bid, (0.01, 3))
+        self.assertEqual(self.book.best_ask, (0.02, 1))
+        self.assertEqual(self.book.seq, 10)
+        self.assertFalse(self.book.is_frozen)
+
+    def test_apply(self):
+        self.book.apply([modify("bid", "0.015", "1"), remove("ask", "0.02"), {"type": "newTrade", "data": {}}], 11)
+
+        self.assertEqual(self.book.depth(2), {"bids": [(0.015, 1), (0.01, 3)], "asks": [(0.03, 2)]})
+        self.assertEqual(self.book.seq, 11)
+
+    def test_vwap(self):
+        self.assertAlmostEqual(self.book.vwap("ask", 2), 0.025)
+        self.assertIsNone(self.book.vwap("ask", 4))
+
+    def test_decimal_numbers(self):
+        book = OrderBook("BTC_ETH", number=Decimal)
+        book.load({"asks": [[0.1, Decimal("1.5")]], "bids": [], "seq": 1})
+
+        self.assertEqual(book.best_ask, (Decimal("0.1"), Decimal("1.5")))
+
+
+class OrderBookEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def engine(self, *snapshots):
+        return OrderBookEngine("BTC_ETH", public=Public(*snapshots), push=None)
+
+    def push(self, engine, *messages):
+        for seq, events in messages:
+            self.loop.run_until_complete(engine.on_push(events, seq=seq))
+
+    def sync(self, engine, task=None):
+        task = task or engine.resync()
+        engine.public.release()
+        self.loop.run_until_complete(task)
+
+    def test_pending_deltas_are_applied_in_order(self):
+        engine = self.engine(SNAPSHOT)
+        task = engine.resync()
+
+        self.push(engine,
+                  (12, [modify("bid", "0.01", "7")]),
+                  (11, [modify("bid", "0.01", "5")]),
+                  (10, [modify("bid", "0.01", "9")]))
+        self.sync(engine, task)
+
+        self.assertTrue(engine.synced)
+        self.assertEqual(engine.book.best_bid, (0.01, 7))
+        self.assertEqual(engine.book.seq, 12)
+
+    def test_pending_deltas_without_seq(self):
+        engine = self.engine(SNAPSHOT)
+        task = engine.resync()
+
+        self.push(engine, (None, [modify("bid", "0.01", "5")]), (11, [modify("bid", "0.01", "6")]))
+        self.sync(engine, task)
+
+        self.assertTrue(engine.synced)
+        self.assertEqual(engine.book.best_bid, (0.01, 6))
+
+    def test_gap_takes_snapshot_again(self):
+        engine = self.engine(SNAPSHOT, dict(SNAPSHOT, bids=[["0.01", "8"]], seq=20))
+        self.sync(engine)
+
+        self.push(engine, (12, [modify("bid", "0.01", "5")]))
+        self.assertFalse(engine.synced)
+
+        self.sync(engine)
+        self.assertEqual(engine.public.calls, 2)
+        self.assertEqual(engine.book.best_bid, (0.01, 8))
+
+        self.push(engine, (21, [modify("bid", "0.01", "5")]))
+        self.assertEqual(engine.book.best_bid, (0.01, 5))
+
+
+class SnapshotDifferTest(unittest.TestCase):
+    def setUp(self):
+        self.differ = SnapshotDiffer()
+        self.differ.diff({"BTC_ETH": SNAPSHOT, "BTC_LTC": dict(SNAPSHOT, seq=5)})
+
+    def test_unchanged_seq_is_skipped(self):
+        changes = self.differ.diff({"BTC_ETH": SNAPSHOT, "BTC_LTC": dict(SNAPSHOT, seq=5)})
+
+        self.assertEqual(changes, [])
+        self.assertEqual(self.differ.skipped, 2)
+
+    def test_changed_levels(self):
+        book = dict(SNAPSHOT, bids=[["0.01", "5"], ["0.004", "1"]], seq=11)
+        change, = self.differ.diff({"BTC_ETH": book, "BTC_LTC": dict(SNAPSHOT, seq=5)})
+
+        self.assertEqual(change.currency_pair, "BTC_ETH")
+        self.assertEqual(sorted(change.bids), [(0.004, 1), (0.005, 0), (0.01, 5)])
+        self.assertEqual(change.asks, [])
+        self.assertFalse(change.removed)
+
+    def test_removed_market(self):
+        change, = self.differ.diff({"BTC_ETH": SNAPSHOT})
+
+        self.assertEqual(change.currency_pair, "BTC_LTC")
+        self.assertTrue(change.removed)
+        self.assertEqual(sorted(change.bids), [(0.005, 0), (0.01, 0)])
+        self.assertEqual(sorted(change.asks), [(0.02, 0), (0.03, 0)])
+        self.assertEqual(self.differ.diff({"BTC_ETH": SNAPSHOT}), [])
+
+    def test_decimal_numbers(self):
+        differ = SnapshotDiffer(number=Decimal)
+        change, = differ.diff({"BTC_ETH": {"asks": [[Decimal("0.02"), 1.5]], "bids": [], "seq": 1}})
+
+        self.assertEqual(change.asks, [(Decimal("0.02"), Decimal("1.5"))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import unittest
+
+from poloniex import pipeline
+from poloniex.error import PoloniexError
+from poloniex.pipeline import OrderPipeline
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+class Trading:
+    """
+    Records the start and the end of every call. 'delays' and 'failures' are keyed by the currency pair for orders
+    and by the order number for cancels; failures are lists of errors raised by the consecutive calls.
+    """
+
+    def __init__(self, delays=None, failures=None):
+        self.delays = delays or {}
+        self.failures = failures or {}
+        self.log = []
+        self.running = 0
+        self.max_running = 0
+
+    async def _call(self, name, key):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.log.append(("start", name, key))
+        try:
+            await asyncio.sleep(self.delays.get(key, 0))
+            failures = self.failures.get(key)
+            if failures:
+                raise failures.pop(0)
+        finally:
+            self.running -= 1
+            self.log.append(("end", name, key))
+
+        return {"key": key}
+
+    def cancelOrder(self, order_number):
+        return self._call("cancel", order_number)
+
+    def buy(self, currency_pair, rate, amount):
+        return self._call("buy", currency_pair)
+
+    def sell(self, currency_pair, rate, amount):
+        return self._call("sell", currency_pair)
+
+
+def nonce_error():
+    return PoloniexError("Nonce must be greater than 1500000000001. You provided 1500000000000.")
+
+
+class OrderPipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def submit(self, trading, intents, **kwargs):
+        return self.loop.run_until_complete(OrderPipeline(trading, **kwargs).submit(intents).gather())
+
+    def test_cancels_go_before_places_of_market(self):
+        trading = Trading(delays={1: 0.02, 2: 0.01})
+        results = self.submit(trading, [pipeline.buy("BTC_ETH", "0.01", "1"),
+                                        pipeline.cancel("BTC_ETH", 1),
+                                        pipeline.cancel("BTC_ETH", 2)])
+
+        self.assertTrue(all(result.ok for result in results))
+        buy_started = trading.log.index(("start", "buy", "BTC_ETH"))
+        self.assertLess(trading.log.index(("end", "cancel", 1)), buy_started)
+        self.assertLess(trading.log.index(("end", "cancel", 2)), buy_started)
+
+    def test_markets_do_not_wait_for_each_other(self):
+        trading = Trading(delays={1: 0.02})
+        self.submit(trading, [pipeline.cancel("BTC_ETH", 1), pipeline.sell("BTC_LTC", "0.01", "1")])
+
+        self.assertLess(trading.log.index(("end", "sell", "BTC_LTC")), trading.log.index(("end", "cancel", 1)))
+
+    def test_strict_skips_places_after_failed_cancel(self):
+        trading = Trading(failures={1: [PoloniexError("Invalid order number")]})
+        results = self.submit(trading, [pipeline.cancel("BTC_ETH", 1), pipeline.buy("BTC_ETH", "0.01", "1")])
+
+        self.assertEqual([result.ok for result in results], [False, False])
+        self.assertNotIn(("start", "buy", "BTC_ETH"), trading.log)
+
+    def test_not_strict_places_after_failed_cancel(self):
+        trading = Trading(failures={1: [PoloniexError("Invalid order number")]})
+        results = self.submit(trading, [pipeline.cancel("BTC_ETH", 1), pipeline.buy("BTC_ETH", "0.01", "1")],
+                              strict=False)
+
+        self.assertEqual([result.ok for result in results], [False, True])
+
+    def test_nonce_error_is_retried(self):
+        trading = Trading(failures={"BTC_ETH": [nonce_error(), nonce_error()]})
+        result, = self.submit(trading, [pipeline.buy("BTC_ETH", "0.01", "1")])
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.attempts, 3)
+
+    def test_retries_are_limited(self):
+        trading = Trading(failures={"BTC_ETH": [nonce_error(), nonce_error()]})
+        result, = self.submit(trading, [pipeline.buy("BTC_ETH", "0.01", "1")], retries=1)
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.attempts, 2)
+
+    def test_other_errors_are_not_retried(self):
+        trading = Trading(failures={"BTC_ETH": [PoloniexError("Not enough BTC.")]})
+        result, = self.submit(trading, [pipeline.buy("BTC_ETH", "0.01", "1")])
+
+        self.assertEqual(result.attempts, 1)
+        self.assertIn("Not enough", str(result.error))
+
+    def test_results_in_completion_order(self):
+        trading = Trading(delays={"BTC_ETH": 0.03, "BTC_LTC": 0.01})
+        batch = OrderPipeline(trading).submit([pipeline.buy("BTC_ETH", "0.01", "1"),
+                                               pipeline.buy("BTC_XMR", "0.01", "1"),
+                                               pipeline.buy("BTC_LTC", "0.01", "1")])
+
+        async def collect():
+            pairs = []
+            async for result in batch:
+                pairs.append(result.intent.currency_pair)
+            return pairs
+
+        self.assertEqual(self.loop.run_until_complete(collect()), ["BTC_XMR", "BTC_LTC", "BTC_ETH"])
+
+    def test_concurrency_is_limited(self):
+        trading = Trading(delays={pair: 0.01 for pair in ("A", "B", "C", "D")})
+        self.submit(trading, [pipeline.buy(pair, "0.01", "1") for pair in ("A", "B", "C", "D")], concurrency=2)
+
+        self.assertEqual(trading.max_running, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+import asyncio
+import importlib
+import unittest
+
+from poloniex.api import sync
+from poloniex.cache import ResponseCache
+from poloniex.error import PoloniexError, TransientError
+from poloniex.retry import RetryPolicy
+from tests.fakes import Response, Session
+
+__author__ = 'andrew.shvv@gmail.com'
+
+# 'async' is the keyword within the coroutines, so the module is used under another name
+async_api = importlib.import_module("poloniex.api.async")
+
+TICKER = '{"BTC_ETH": {"last": "0.01"}}'
+BUSY = '{"error": "busy"}'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class Sender:
+    """
+    Raises the given errors in turn and answers with the number of the call when they are over.
+    """
+
+    def __init__(self, *errors, clock=None, duration=0):
+        self.errors = list(errors)
+        self.clock = clock
+        self.duration = duration
+        self.calls = []
+
+    def __call__(self, timeout):
+        self.calls.append(timeout)
+        if self.clock is not None:
+            self.clock.now += self.duration
+        if self.errors:
+            raise self.errors.pop(0)
+        return len(self.calls)
+
+
+class SlowFirstSession:
+    """
+    Session of the async api which answers the first request after 'delay' seconds and the others at once.
+    """
+
+    def __init__(self, body, delay):
+        self.body = body
+        self.delay = delay
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append(("get", kwargs))
+        return Delayed(Response(200, self.body), self.delay if len(self.requests) == 1 else 0)
+
+
+class Delayed:
+    def __init__(self, response, delay):
+        self.response = response
+        self.delay = delay
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self.response
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_backoff_grows_till_max(self):
+        policy = RetryPolicy(backoff=0.1, max_backoff=0.5)
+
+        for attempt, backoff in enumerate([0.1, 0.2, 0.4, 0.5, 0.5]):
+            delay = policy.delay(attempt)
+            self.assertGreaterEqual(delay, backoff / 2)
+            self.assertLessEqual(delay, backoff)
+
+    def test_transient_errors_are_retried(self):
+        policy = RetryPolicy(retries=2, backoff=0.001)
+        send = Sender(TransientError("busy"), TransientError("busy"))
+
+        self.assertEqual(policy.call("returnTicker", send, TransientError), 3)
+        self.assertEqual(policy.retried, 2)
+
+    def test_retries_are_limited(self):
+        policy = RetryPolicy(retries=2, backoff=0.001)
+        send = Sender(*[TransientError("busy")] * 3)
+
+        with self.assertRaises(TransientError):
+            policy.call("returnTicker", send, TransientError)
+        self.assertEqual(len(send.calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        send = Sender(PoloniexError("Invalid currency pair"))
+
+        with self.assertRaises(PoloniexError):
+            RetryPolicy(backoff=0.001).call("returnTicker", send, TransientError)
+        self.assertEqual(len(send.calls), 1)
+
+    def test_state_changing_commands_are_not_handled(self):
+        policy = RetryPolicy(commands=["buy", "sell", "returnTicker"])
+
+        self.assertFalse(policy.handles("buy"))
+        self.assertFalse(policy.handles("sell"))
+        self.assertFalse(policy.handles("cancelOrder"))
+        self.assertTrue(policy.handles("returnTicker"))
+        self.assertFalse(policy.handles("returnOrderBook"))
+
+    def test_attempt_is_bounded_by_deadline(self):
+        clock = FakeClock()
+        policy = RetryPolicy(retries=5, backoff=0.001, deadline=10, clock=clock)
+        send = Sender(*[TransientError("busy")] * 5, clock=clock, duration=4)
+
+        with self.assertRaises(TransientError) as context:
+            policy.call("returnTicker", send, TransientError)
+
+        self.assertIn("Deadline", str(context.exception))
+        # every attempt is given the time left till the deadline as the timeout
+        self.assertEqual(send.calls, [10, 6, 2])
+
+    def test_no_timeout_without_deadline(self):
+        send = Sender()
+        RetryPolicy().call("returnTicker", send, TransientError)
+
+        self.assertEqual(send.calls, [None])
+
+
+class SyncApiRetryTest(unittest.TestCase):
+    def test_idempotent_command_is_retried(self):
+        session = Session(Response(503, BUSY), Response(200, TICKER))
+        api = sync.PublicApi(session=session, retry=RetryPolicy(backoff=0.001))
+
+        self.assertEqual(api.returnTicker(), {"BTC_ETH": {"last": "0.01"}})
+        self.assertEqual(len(session.requests), 2)
+
+    def test_buy_and_sell_are_sent_once(self):
+        session = Session(Response(503, BUSY), Response(503, BUSY))
+        api = sync.TradingApi("key", "secret", session=session, retry=RetryPolicy(backoff=0.001))
+
+        with self.assertRaises(TransientError):
+            api.buy("BTC_ETH", "0.01", "1")
+        with self.assertRaises(TransientError):
+            api.sell("BTC_ETH", "0.01", "1")
+
+        self.assertEqual(len(session.requests), 2)
+
+    def test_deadline_is_request_timeout(self):
+        session = Session(Response(200, TICKER))
+        api = sync.PublicApi(session=session, timeout=10, retry=RetryPolicy(deadline=3))
+        api.returnTicker()
+
+        method, kwargs = session.requests[0]
+        self.assertLessEqual(kwargs["timeout"], 3)
+
+    def test_shorter_api_timeout_is_kept(self):
+        session = Session(Response(200, TICKER))
+        api = sync.PublicApi(session=session, timeout=1, retry=RetryPolicy(deadline=30))
+        api.returnTicker()
+
+        method, kwargs = session.requests[0]
+        self.assertEqual(kwargs["timeout"], 1)
+
+
+class AsyncRetryTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def hedging_policy(self, command):
+        policy = RetryPolicy(hedge=True, hedge_samples=1)
+        policy.record(command, 0.01)
+        return policy
+
+    def test_slow_attempt_is_hedged(self):
+        policy = self.hedging_policy("returnTicker")
+
+        async def send(hedged):
+            await asyncio.sleep(0 if hedged else 1)
+            return "hedged" if hedged else "first"
+
+        response = self.loop.run_until_complete(policy.call_async("returnTicker", send, TransientError))
+
+        self.assertEqual(response, "hedged")
+        self.assertEqual(policy.hedged, 1)
+        self.assertEqual(policy.hedge_wins, 1)
+
+    def test_fast_attempt_is_not_hedged(self):
+        policy = self.hedging_policy("returnTicker")
+
+        async def send(hedged):
+            return "hedged" if hedged else "first"
+
+        response = self.loop.run_until_complete(policy.call_async("returnTicker", send, TransientError))
+
+        self.assertEqual(response, "first")
+        self.assertEqual(policy.hedged, 0)
+
+    def test_deadline_cancels_attempt(self):
+        policy = RetryPolicy(deadline=0.01)
+
+        async def send(hedged):
+            await asyncio.sleep(1)
+
+        with self.assertRaises(TransientError):
+            self.loop.run_until_complete(policy.call_async("returnTicker", send, TransientError))
+
+    def test_hedged_request_goes_past_cache(self):
+        session = SlowFirstSession(TICKER, delay=0.2)
+        policy = self.hedging_policy("returnTicker")
+        api = async_api.PublicApi(session, cache=ResponseCache(), retry=policy)
+
+        response = self.loop.run_until_complete(asyncio.wait_for(api.returnTicker(), 0.1))
+
+        self.assertEqual(response, {"BTC_ETH": {"last": "0.01"}})
+        self.assertEqual(len(session.requests), 2)
+        self.assertEqual(policy.hedge_wins, 1)
+
+        # the first request still fills the cache after it is answered
+        self.loop.run_until_complete(asyncio.sleep(0.2))
+
+
+if __name__ == "__main__":
+    unittest.main()
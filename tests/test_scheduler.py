@@ -0,0 +1,97 @@
+import asyncio
+import time
+import unittest
+
+from poloniex.scheduler import AsyncScheduler, SyncScheduler, TokenBucket
+
+__author__ = 'andrew.shvv@gmail.com'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=6, clock=clock)
+
+        self.assertEqual(sum(bucket.consume() for _ in range(10)), 6)
+        self.assertAlmostEqual(bucket.delay(), 1 / 6)
+
+        clock.now = 0.5
+        self.assertEqual(bucket.delay(), 0)
+        self.assertEqual(sum(bucket.consume() for _ in range(10)), 3)
+
+    def test_tokens_are_capped(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=6, capacity=2, clock=clock)
+
+        clock.now = 100
+        self.assertEqual(sum(bucket.consume() for _ in range(10)), 2)
+
+
+class AsyncSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.scheduler = AsyncScheduler(rate=100, capacity=1, loop=self.loop)
+        self.served = []
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    async def call(self, command):
+        await self.scheduler.acquire(command)
+        self.served.append(command)
+
+    def test_waiting_calls_are_served_by_priority(self):
+        async def calls():
+            # the only token is taken, the rest wait in their lanes
+            await self.call("returnTicker")
+            await asyncio.gather(self.call("returnChartData"), self.call("returnBalances"), self.call("cancelOrder"))
+
+        self.loop.run_until_complete(calls())
+
+        self.assertEqual(self.served, ["returnTicker", "cancelOrder", "returnBalances", "returnChartData"])
+        self.assertEqual(self.scheduler.calls, 4)
+        self.assertEqual(self.scheduler.waits, 3)
+
+    def test_cancelled_call_does_not_take_token(self):
+        async def calls():
+            await self.call("returnTicker")
+            cancelled = asyncio.ensure_future(self.call("buy"))
+            waiting = asyncio.ensure_future(self.call("returnBalances"))
+            await asyncio.sleep(0)
+
+            cancelled.cancel()
+            await waiting
+
+        self.loop.run_until_complete(calls())
+
+        self.assertEqual(self.served, ["returnTicker", "returnBalances"])
+        self.assertEqual(self.scheduler.calls, 2)
+        self.assertEqual(self.scheduler.queue_depth, {"high": 0, "normal": 0, "low": 0})
+
+
+class SyncSchedulerTest(unittest.TestCase):
+    def test_calls_are_paced(self):
+        scheduler = SyncScheduler(rate=100, capacity=2)
+
+        started = time.monotonic()
+        for _ in range(4):
+            scheduler.acquire("returnTicker")
+        elapsed = time.monotonic() - started
+
+        self.assertGreaterEqual(elapsed, 0.015)
+        self.assertEqual(scheduler.calls, 4)
+        self.assertEqual(scheduler.waits, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
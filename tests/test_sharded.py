@@ -0,0 +1,99 @@
+import asyncio
+import pickle
+import unittest
+
+from poloniex.events import OrderBookModify
+from poloniex.sharded import ShardedPushApi, arguments_wrapper, events_wrapper
+
+__author__ = 'andrew.shvv@gmail.com'
+
+MESSAGE = [
+    {"type": "orderBookModify", "data": {"type": "bid", "rate": "0.01", "amount": "1"}},
+    {"type": "newTrade", "data": {"tradeID": "1", "type": "buy", "rate": "0.01", "amount": "1", "total": "0.01"}},
+]
+
+
+class Batcher:
+    def __init__(self):
+        self.batches = []
+
+    async def extend(self, topic, events):
+        self.batches.append((topic, events))
+
+
+class ShardWrappersTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_untyped_handler_gets_push_api_arguments(self):
+        batcher = Batcher()
+        self.loop.run_until_complete(arguments_wrapper("BTC_ETH", batcher)(MESSAGE, seq=1))
+
+        topic, calls = batcher.batches[0]
+        # calls are sent to the coordinator over the pipe
+        calls = pickle.loads(pickle.dumps(calls))
+
+        received = []
+        handler = events_wrapper(lambda **event: received.append(event), typed=False)
+        for call in calls:
+            self.loop.run_until_complete(handler(call))
+
+        self.assertEqual(topic, "BTC_ETH")
+        self.assertEqual(received[0], dict(MESSAGE[0], currency_pair="BTC_ETH"))
+        self.assertEqual(len(received), 2)
+
+    def test_typed_handler_gets_event(self):
+        received = []
+        event = OrderBookModify("BTC_ETH", "bid", "0.01", "1", 1)
+
+        async def handler(event):
+            received.append(event)
+
+        self.loop.run_until_complete(events_wrapper(handler, typed=True)(event))
+
+        self.assertEqual(received, [event])
+
+
+class ShardedDispatchTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.push = ShardedPushApi(shards=2)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_failed_handler_does_not_stop_other_topics(self):
+        received = []
+
+        def failing(event):
+            raise ValueError("bad event")
+
+        async def handler(event):
+            received.append(event)
+
+        self.push.subscribe("BTC_ETH", failing, typed=True)
+        self.push.subscribe("BTC_LTC", handler, typed=True)
+
+        batch = {"BTC_ETH": ["a", "b"], "BTC_LTC": ["c", "d"]}
+        self.loop.run_until_complete(self.push._dispatch(batch))
+
+        self.assertEqual(received, ["c", "d"])
+        self.assertEqual(self.push.handler_errors, 2)
+
+    def test_failed_resync_is_counted(self):
+        def on_resync():
+            raise RuntimeError("resync failed")
+
+        self.push.subscribe("BTC_ETH", lambda event: None, typed=True, on_resync=on_resync)
+        self.loop.run_until_complete(self.push._resync("BTC_ETH"))
+
+        self.assertEqual(self.push.handler_errors, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
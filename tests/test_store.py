@@ -0,0 +1,80 @@
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from poloniex.api import sync
+from poloniex.scheduler import SyncScheduler
+from poloniex.store import HistoryStore, TradeFormat, format_date
+from tests.fakes import Response, Session
+
+__author__ = 'andrew.shvv@gmail.com'
+
+START = 1500000000
+END = START + 100
+
+
+def date(timestamp):
+    return datetime.fromtimestamp(timestamp)
+
+
+def trades(*offsets):
+    return Response(200, json.dumps([{
+        "globalTradeID": offset,
+        "tradeID": offset,
+        "date": format_date(START + offset),
+        "type": "buy",
+        "rate": "0.01000000",
+        "amount": "1.00000000",
+        "total": "0.01000000",
+    } for offset in offsets]))
+
+
+class HistoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = HistoryStore(self.path)
+
+        # two trades per page, so that the range takes two pages
+        self.limit, TradeFormat.limit = TradeFormat.limit, 2
+
+    def tearDown(self):
+        TradeFormat.limit = self.limit
+        shutil.rmtree(self.path)
+
+    def api(self, *responses):
+        scheduler = SyncScheduler()
+        session = Session(*responses)
+        return sync.PublicApi(session=session, scheduler=scheduler, store=self.store), session, scheduler
+
+    def test_every_page_takes_token(self):
+        api, session, scheduler = self.api(trades(90, 60), trades(10))
+
+        history = api.returnTradeHistory(currency_pair="BTC_ETH", start=date(START), end=date(END))
+
+        self.assertEqual([trade["tradeID"] for trade in history], [90, 60, 10])
+        self.assertEqual(len(session.requests), 2)
+        self.assertEqual(scheduler.calls, 2)
+        self.assertEqual(session.requests[1][1]["params"]["end"], START + 60)
+
+    def test_stored_range_takes_no_token(self):
+        api, session, scheduler = self.api(trades(90, 60), trades(10))
+        api.returnTradeHistory(currency_pair="BTC_ETH", start=date(START), end=date(END))
+
+        history = api.returnTradeHistory(currency_pair="BTC_ETH", start=date(START + 50), end=date(END))
+
+        self.assertEqual([trade["tradeID"] for trade in history], [90, 60])
+        self.assertEqual(scheduler.calls, 2)
+
+    def test_missing_ranges(self):
+        api, session, scheduler = self.api(trades(90, 60), trades(10))
+        api.returnTradeHistory(currency_pair="BTC_ETH", start=date(START), end=date(END))
+
+        series = self.store._series({"command": "returnTradeHistory", "currencyPair": "BTC_ETH"})
+
+        self.assertEqual(series.missing(START - 10, END + 10), [(START - 10, START - 1), (END + 1, END + 10)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import unittest
+
+import aiohttp
+
+from poloniex.wamp.client import WAMPClient
+
+__author__ = 'andrew.shvv@gmail.com'
+
+WELCOME, ABORT, ERROR, SUBSCRIBE, SUBSCRIBED, EVENT = 2, 3, 8, 32, 33, 36
+
+WELCOME_FRAME = json.dumps([WELCOME, 1, {"roles": {"broker": {}}}])
+
+
+def event(subscription, seq, data):
+    return json.dumps([EVENT, subscription, seq, {}, [data], {"seq": seq}])
+
+
+class WAMPClientTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.client = WAMPClient(url="ws://localhost", session=None)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def subscribe(self, handler, on_resync=None):
+        self.client.subscribe(handler=handler, topic="BTC_ETH", on_resync=on_resync)
+        request_id = next(iter(self.client.queue))
+        self.receive(json.dumps([SUBSCRIBED, request_id, 1]))
+
+    def receive(self, *frames):
+        for frame in frames:
+            self.loop.run_until_complete(self.client.on_message(frame))
+
+    def test_events_are_dispatched_with_seq(self):
+        received = []
+
+        async def handler(args, **kwargs):
+            received.append((args, kwargs["seq"]))
+
+        self.subscribe(handler)
+        self.receive(event(1, 1, "a"), event(1, 2, "b"))
+
+        self.assertEqual(received, [(["a"], 1), (["b"], 2)])
+
+    def test_failed_handler_does_not_stop_the_stream(self):
+        received = []
+
+        async def handler(args, **kwargs):
+            if args == ["bad"]:
+                raise ValueError("bad message")
+            received.append(args)
+
+        self.subscribe(handler)
+        self.receive(event(1, 1, "bad"), event(1, 2, "good"))
+
+        self.assertEqual(received, [["good"]])
+        self.assertEqual(self.client.handler_errors, 1)
+
+    def test_gap_calls_resync(self):
+        resyncs = []
+
+        async def handler(args, **kwargs):
+            pass
+
+        def on_resync():
+            resyncs.append(True)
+            raise RuntimeError("resync failed")
+
+        self.subscribe(handler, on_resync=on_resync)
+        self.receive(event(1, 1, "a"), event(1, 3, "c"), event(1, 4, "d"))
+
+        self.assertEqual(len(resyncs), 1)
+        self.assertEqual(self.client.gaps, 1)
+        self.assertEqual(self.client.handler_errors, 1)
+
+
+class WebSocket:
+    """
+    Gives the frames in turn, then waits till closed.
+    """
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.sent = []
+        self.closed = False
+
+    def send_str(self, payload):
+        self.sent.append(json.loads(payload))
+
+    async def close(self):
+        self.closed = True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        if self.frames and not self.closed:
+            frame = self.frames.pop(0)
+            if callable(frame):
+                frame = frame()
+            return aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, frame, None)
+
+        while not self.closed:
+            await asyncio.sleep(0.001)
+        raise StopAsyncIteration
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class WebSocketSession:
+    def __init__(self, *connections):
+        self.connections = list(connections)
+        self.connects = []
+
+    def ws_connect(self, url, **kwargs):
+        self.connects.append(kwargs)
+        return WebSocket(self.connections.pop(0))
+
+
+class WAMPClientReconnectTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.received = []
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def run_client(self, *connections):
+        """
+        Runs the client till the first event is received on one of the connections.
+        """
+        session = WebSocketSession(*connections)
+        self.client = WAMPClient(url="ws://localhost", session=session, min_delay=0.001, heartbeat=5)
+
+        async def handler(args, **kwargs):
+            self.received.append(args)
+            await self.client.stop()
+
+        self.client.subscribe(handler=handler, topic="BTC_ETH")
+        self.request_id = next(iter(self.client.queue))
+
+        self.loop.run_until_complete(asyncio.wait_for(self.client.start(), 2))
+        return session
+
+    def subscribed(self):
+        return json.dumps([SUBSCRIBED, self.request_id, 1])
+
+    def test_reconnect_after_protocol_error(self):
+        session = self.run_client([WELCOME_FRAME, json.dumps([999, "malformed"])],
+                                  [WELCOME_FRAME, self.subscribed, event(1, 1, "a")])
+
+        self.assertEqual(self.received, [["a"]])
+        self.assertEqual(self.client.reconnects, 1)
+        self.assertEqual(session.connects[0]["heartbeat"], 5)
+
+    def test_reconnect_after_abort(self):
+        self.run_client([WELCOME_FRAME, json.dumps([ABORT, {}, "wamp.close.system_shutdown"])],
+                        [WELCOME_FRAME, self.subscribed, event(1, 1, "a")])
+
+        self.assertEqual(self.received, [["a"]])
+        self.assertEqual(self.client.reconnects, 1)
+
+    def test_subscribe_error_keeps_connection(self):
+        error = lambda: json.dumps([ERROR, SUBSCRIBE, self.request_id, {}, "wamp.error.not_authorized"])
+        self.run_client([WELCOME_FRAME, error, json.dumps([EVENT, 7, 1, {}, ["x"]]), self.subscribed,
+                         event(1, 1, "a")])
+
+        self.assertEqual(self.received, [["a"]])
+        self.assertEqual(self.client.reconnects, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()